@@ -1,24 +1,163 @@
 import sqlite3
 import json
-from datetime import datetime
+import os
+import threading
+import queue
+import time
+import atexit
+import signal
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass, asdict
-from flask import Flask, request, jsonify, make_response
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, g, request, jsonify, make_response
 import uuid
+import base64
+import hashlib
+import hmac
 from flask_cors import CORS
+import click
 
 # Database setup
 DATABASE = 'scrumboard.db'
 
+# PRAGMA áp dụng khi mở connection, có thể ghi đè qua biến môi trường
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SCRUMBOARD_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SCRUMBOARD_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': int(os.environ.get('SCRUMBOARD_SQLITE_CACHE_SIZE', '-16000')),
+    'mmap_size': int(os.environ.get('SCRUMBOARD_SQLITE_MMAP_SIZE', '134217728')),
+    'temp_store': os.environ.get('SCRUMBOARD_SQLITE_TEMP_STORE', 'MEMORY'),
+    'busy_timeout': int(os.environ.get('SCRUMBOARD_SQLITE_BUSY_TIMEOUT', '5000')),
+}
+# Số connection rảnh tối đa được giữ lại trong pool
+SQLITE_POOL_SIZE = int(os.environ.get('SCRUMBOARD_SQLITE_POOL_SIZE', '16'))
+# Số lệnh VM của SQLite giữa hai lần kiểm tra deadline của request
+SQLITE_PROGRESS_STEPS = 10000
+
+class PooledConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._on_commit = {}
+        # Hết deadline (time.monotonic()) thì câu query đang chạy bị ngắt với
+        # OperationalError('interrupted'), xem REQUEST_TIMEOUT
+        self.deadline = None
+        self.set_progress_handler(self._check_deadline, SQLITE_PROGRESS_STEPS)
+
+    def _check_deadline(self):
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    # Đăng ký callback chạy sau khi transaction hiện tại commit thành công,
+    # trùng key thì chỉ chạy một lần; rollback sẽ bỏ các callback này
+    def on_commit(self, key, callback):
+        self._on_commit[key] = callback
+
+    def commit(self):
+        sqlite3.Connection.commit(self)
+        callbacks = list(self._on_commit.values())
+        self._on_commit.clear()
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        self._on_commit.clear()
+        sqlite3.Connection.rollback(self)
+
+    # close() không đóng connection thật mà chỉ bỏ transaction dang dở,
+    # connection được trả về pool khi request kết thúc
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def close_physical(self):
+        sqlite3.Connection.close(self)
+
+# Connection SQLite không được dùng tiếp qua fork(): process con (worker của gunicorn)
+# bỏ các connection kế thừa từ process cha và mở connection mới
+class ConnectionPool:
+    def __init__(self, max_idle):
+        self.max_idle = max_idle
+        self._pid = os.getpid()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inherited = []
+
+    def _open(self):
+        # BEGIN IMMEDIATE để transaction ghi lấy write lock ngay (chờ theo busy_timeout)
+        conn = sqlite3.connect(
+            DATABASE,
+            factory=PooledConnection,
+            timeout=SQLITE_PRAGMAS['busy_timeout'] / 1000,
+            isolation_level='IMMEDIATE',
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in SQLITE_PRAGMAS.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _check_fork(self):
+        if self._pid == os.getpid():
+            return
+        # Giữ tham chiếu để connection của process cha không bị đóng (và nhả lock
+        # của process cha) khi bị thu gom trong process con
+        self._inherited.extend(self._idle)
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._inherited.append(conn)
+        self._pid = os.getpid()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def acquire(self):
+        self._check_fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        self._local.conn = conn
+        return conn
+
+    def release(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        conn.deadline = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close_physical()
+
+    # Đóng các connection rảnh, gọi trước khi fork worker
+    def close_idle(self):
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+        for conn in idle:
+            conn.close_physical()
+
+db_pool = ConnectionPool(SQLITE_POOL_SIZE)
+
+# Mỗi thread dùng chung một connection lấy từ pool cho tới khi được release
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return db_pool.acquire()
 
-def init_database():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def release_db_connection():
+    db_pool.release()
+
+# Migration 1: các bảng gốc, đúng như schema trước khi có schema_version. DB cũ đã có
+# sẵn các bảng này nên CREATE TABLE IF NOT EXISTS chỉ bổ sung phần còn thiếu
+def migrate_base_schema(cursor):
     # Create tables with proper foreign key constraints
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS companies (
@@ -142,7 +281,54 @@ def init_database():
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_board_id ON cards(board_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_labels_board_id ON labels(board_id)')
     
-    # Sau khi tạo bảng boards
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_tasks (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            frequency TEXT DEFAULT 'daily',
+            start_date TEXT,
+            end_date TEXT,
+            is_active INTEGER DEFAULT 1,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES members(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_task_instances (
+            id TEXT PRIMARY KEY,
+            daily_task_id TEXT NOT NULL,
+            task_date TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            started_at TEXT,
+            completed_at TEXT,
+            notes TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (daily_task_id) REFERENCES daily_tasks(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS widgets (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            config TEXT,
+            position INTEGER DEFAULT 0,
+            is_active INTEGER DEFAULT 1,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES members(id) ON DELETE CASCADE
+        )
+    ''')
+
+# Dữ liệu mẫu (board Daily Tasks, tài khoản/công ty/phòng ban mẫu), không chạy khi
+# khởi động mà tạo bằng: flask --app api seed
+def seed_database(cursor):
     cursor.execute('SELECT id FROM boards WHERE title = ?', ('Daily Tasks',))
     if not cursor.fetchone():
         board_id = str(uuid.uuid4())
@@ -196,44 +382,53 @@ def init_database():
     cursor.execute('UPDATE members SET company_id = ?, department_id = ? WHERE email = ?', (company_id, None, 'company@example.com'))
     cursor.execute('UPDATE members SET company_id = ?, department_id = ? WHERE email = ?', (company_id, department_id, 'department@example.com'))
     cursor.execute('UPDATE members SET company_id = ?, department_id = ? WHERE email = ?', (company_id, department_id, 'user@example.com'))
-    
-    # Thêm bảng daily_tasks
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_tasks (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            title TEXT NOT NULL,
-            description TEXT,
-            frequency TEXT DEFAULT 'daily',
-            start_date TEXT,
-            end_date TEXT,
-            is_active INTEGER DEFAULT 1,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES members(id) ON DELETE CASCADE
-        )
-    ''')
-    
+
+# Index cho tra cứu member theo email và theo name.
+# Email là unique nếu dữ liệu hiện có không trùng; nếu đang có email trùng thì tạm
+# dùng index thường, dọn xong dữ liệu thì thêm migration mới tạo lại index dạng unique
+def create_member_indexes(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_members_name ON members(name)')
+    cursor.execute('PRAGMA index_list(members)')
+    unique = {row['name']: row['unique'] for row in cursor.fetchall()}.get('idx_members_email')
+    if unique:
+        return
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_task_instances (
-            id TEXT PRIMARY KEY,
-            daily_task_id TEXT NOT NULL,
-            task_date TEXT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            started_at TEXT,
-            completed_at TEXT,
-            notes TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (daily_task_id) REFERENCES daily_tasks(id) ON DELETE CASCADE
-        )
+        SELECT 1 FROM members WHERE email IS NOT NULL
+        GROUP BY email HAVING COUNT(*) > 1 LIMIT 1
     ''')
-    
-    conn.commit()
-    conn.close()
+    if cursor.fetchone():
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_members_email ON members(email)')
+        return
+    cursor.execute('DROP INDEX IF EXISTS idx_members_email')
+    cursor.execute('CREATE UNIQUE INDEX idx_members_email ON members(email)')
 
-def migrate_database():
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Migration 11: index phụ cho các điều kiện lọc/sắp xếp hay dùng, thay idx_daily_tasks_user
+# bằng index (user_id, is_active). Kiểm tra bằng: flask --app api audit-indexes
+def create_filter_indexes(cursor):
+    cursor.execute('DROP INDEX IF EXISTS idx_daily_tasks_user')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_board_members_member ON board_members(member_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_card_labels_label ON card_labels(label_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_board_archived_status ON cards(board_id, archived, status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_start_date ON cards(start_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_widgets_user_active_position ON widgets(user_id, is_active, position)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_tasks_user_active ON daily_tasks(user_id, is_active)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_boards_company ON boards(company_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_boards_department ON boards(department_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_boards_public_activity ON boards(is_public, last_activity)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_members_company ON members(company_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_members_department ON members(department_id)')
+
+# Migration 12: board theo owner, sắp theo last_activity (nhánh owner của get_boards)
+def create_board_owner_activity_index(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_boards_owner_activity ON boards(owner_id, last_activity)')
+
+# Migration 13: list/card theo vị trí trong board/list (sắp xếp và chèn giữa hai vị trí)
+def create_position_indexes(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_lists_board_position ON lists(board_id, position)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_list_position ON cards(list_id, position)')
+
+# Migration 2: các cột được thêm dần vào bảng gốc
+def migrate_legacy_columns(cursor):
     # Thêm trường archived cho lists nếu chưa có
     cursor.execute("PRAGMA table_info(lists)")
     columns = [row[1] for row in cursor.fetchall()]
@@ -270,58 +465,81 @@ def migrate_database():
     columns = [row[1] for row in cursor.fetchall()]
     if 'status' not in columns:
         cursor.execute('ALTER TABLE cards ADD COLUMN status TEXT DEFAULT "todo"')
-    
-    # Thêm bảng widgets nếu chưa có
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='widgets'")
-    if not cursor.fetchone():
-        cursor.execute('''
-            CREATE TABLE widgets (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                type TEXT NOT NULL,
-                title TEXT NOT NULL,
-                config TEXT,
-                position INTEGER DEFAULT 0,
-                is_active INTEGER DEFAULT 1,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES members(id) ON DELETE CASCADE
-            )
-        ''')
-    
-    # Thêm bảng daily_tasks sau bảng widgets
+    # Thêm trường updated_at cho cards (recent_activities sắp xếp theo cột này)
+    if 'updated_at' not in columns:
+        cursor.execute('ALTER TABLE cards ADD COLUMN updated_at TEXT')
+        cursor.execute('UPDATE cards SET updated_at = created_at')
+
+# Change log append-only cho delta sync (/api/boards/<id>/changes)
+def migrate_change_log(cursor):
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_tasks (
-            id TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            title TEXT NOT NULL,
-            description TEXT,
-            frequency TEXT DEFAULT 'daily',
-            start_date TEXT,
-            end_date TEXT,
-            is_active INTEGER DEFAULT 1,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES members(id) ON DELETE CASCADE
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            board_id TEXT NOT NULL,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            changed_at TEXT NOT NULL
         )
     ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_log_board_seq ON change_log(board_id, seq)')
 
+# Tách checklist ra bảng riêng, chuyển dữ liệu JSON cũ trong cards.checklist_items sang
+def migrate_checklist_items(cursor):
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_task_instances (
-            id TEXT PRIMARY KEY,
-            daily_task_id TEXT NOT NULL,
-            task_date TEXT NOT NULL,
-            status TEXT DEFAULT 'pending',
-            started_at TEXT,
-            completed_at TEXT,
-            notes TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (daily_task_id) REFERENCES daily_tasks(id) ON DELETE CASCADE
+        CREATE TABLE IF NOT EXISTS checklist_items (
+            id TEXT NOT NULL,
+            card_id TEXT NOT NULL,
+            text TEXT NOT NULL DEFAULT '',
+            checked INTEGER NOT NULL DEFAULT 0,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (card_id, id),
+            FOREIGN KEY (card_id) REFERENCES cards(id) ON DELETE CASCADE
         )
     ''')
-    
-    conn.commit()
-    conn.close()
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_checklist_items_card_position ON checklist_items(card_id, position)')
+    cursor.execute('SELECT id, checklist_items FROM cards WHERE checklist_items IS NOT NULL')
+    for row in cursor.fetchall():
+        try:
+            items = json.loads(row['checklist_items']) if row['checklist_items'] else []
+        except ValueError:
+            items = []
+        cursor.execute('DELETE FROM checklist_items WHERE card_id = ?', (row['id'],))
+        cursor.executemany('''
+            INSERT OR REPLACE INTO checklist_items (id, card_id, text, checked, position)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (item.get('id') or str(uuid.uuid4()), row['id'], item.get('text') or '',
+             1 if item.get('checked') else 0, position)
+            for position, item in enumerate(items if isinstance(items, list) else []) if isinstance(item, dict)
+        ])
+    cursor.execute('UPDATE cards SET checklist_items = NULL WHERE checklist_items IS NOT NULL')
+
+# Version tăng dần theo phạm vi (board:<id>, boards, widgets:<user_id>,
+# daily-tasks:<user_id>), dùng làm ETag cho conditional GET
+def migrate_entity_versions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS entity_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+# Mỗi task chỉ có một instance mỗi ngày. Trước khi tạo unique index, bỏ các
+# instance trùng và giữ dòng đầu tiên (dòng mà các API cũ vẫn đọc và cập nhật)
+def migrate_daily_task_instances_unique(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_daily_task_instances_task_date'")
+    if not cursor.fetchone():
+        cursor.execute('''
+            DELETE FROM daily_task_instances
+            WHERE rowid NOT IN (
+                SELECT MIN(rowid) FROM daily_task_instances GROUP BY daily_task_id, task_date
+            )
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX idx_daily_task_instances_task_date
+            ON daily_task_instances(daily_task_id, task_date)
+        ''')
 
 # Data models
 @dataclass
@@ -370,21 +588,546 @@ class Card:
 
 # Flask app setup
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": ["ETag", "X-Next-Cursor"]}})
+
+# Thời gian tối đa (giây) một request được chạy query SQLite, 0 là không giới hạn.
+# Hết giờ thì query bị ngắt và request trả 503
+REQUEST_TIMEOUT = float(os.environ.get('SCRUMBOARD_REQUEST_TIMEOUT', '30'))
+
+@app.before_request
+def start_request_deadline():
+    if REQUEST_TIMEOUT > 0:
+        get_db_connection().deadline = time.monotonic() + REQUEST_TIMEOUT
+
+@app.teardown_request
+def return_db_connection(exc):
+    release_db_connection()
+
+@app.errorhandler(sqlite3.OperationalError)
+def handle_operational_error(error):
+    if str(error) != 'interrupted':
+        raise error
+    return jsonify({'error': 'Request timed out'}), 503
 
 # Utility functions
 def generate_id():
     return str(uuid.uuid4())
 
-def update_board_activity(board_id: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'UPDATE boards SET last_activity = ? WHERE id = ?',
-        (datetime.now().isoformat(), board_id)
+# Ghi last_activity của board: lần ghi đầu tiên trong mỗi khoảng
+# BOARD_ACTIVITY_INTERVAL giây đi chung transaction của request, các lần sau
+# trong cùng khoảng được gộp lại và do background writer ghi một lượt.
+# Lượt ghi của background writer chỉ đổi version 'boards' (danh sách board), không
+# đổi version board:<id> nên không làm mất board cache/ETag: last_activity trong
+# payload get_board là giá trị lúc board đổi version gần nhất, có thể chậm hơn DB
+# tới lần ghi kế tiếp lên board. Danh sách board (get_boards) luôn đọc giá trị mới
+BOARD_ACTIVITY_INTERVAL = float(os.environ.get('SCRUMBOARD_ACTIVITY_INTERVAL', '1.0'))
+# Số board trong _last_write trước khi dọn các entry đã quá BOARD_ACTIVITY_INTERVAL
+BOARD_ACTIVITY_PRUNE_AT = 1024
+
+class BoardActivityTracker:
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last_write = {}   # board_id -> time.monotonic() của lần ghi gần nhất đã commit
+        self._pending = {}      # board_id -> last_activity chờ ghi
+        self._prune_at = BOARD_ACTIVITY_PRUNE_AT
+        self.stats = {
+            'touches': 0,
+            'inline_writes': 0,
+            'coalesced': 0,
+            'flushed_boards': 0,
+            'flush_transactions': 0,
+            'flush_errors': 0
+        }
+
+    def touch(self, cursor, board_id):
+        now = time.monotonic()
+        timestamp = datetime.now().isoformat()
+        with self._lock:
+            self.stats['touches'] += 1
+            last = self._last_write.get(board_id)
+            if last is None or now - last >= self.interval:
+                self.stats['inline_writes'] += 1
+                inline = True
+            else:
+                self._pending[board_id] = timestamp
+                self.stats['coalesced'] += 1
+                inline = False
+        if inline:
+            cursor.execute('UPDATE boards SET last_activity = ? WHERE id = ?', (timestamp, board_id))
+            # Chỉ tính là đã ghi khi transaction của request commit; rollback thì lần
+            # touch sau lại ghi inline
+            cursor.connection.on_commit(('activity', board_id),
+                                        lambda: self._written([(board_id, timestamp)], now))
+        else:
+            self._start_writer()
+            self._wakeup.set()
+
+    def _written(self, written, now):
+        with self._lock:
+            for board_id, timestamp in written:
+                self._last_write[board_id] = now
+                if self._pending.get(board_id, timestamp) <= timestamp:
+                    self._pending.pop(board_id, None)
+            if len(self._last_write) > self._prune_at:
+                # Entry quá interval tương đương không có entry (lần sau ghi inline)
+                self._last_write = {
+                    board_id: last for board_id, last in self._last_write.items()
+                    if now - last < self.interval
+                }
+                self._prune_at = max(BOARD_ACTIVITY_PRUNE_AT, 2 * len(self._last_write))
+
+    def _start_writer(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='board-activity-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # Các board chưa ghi đã được trả lại _pending, lượt sau thử lại
+                app.logger.exception('Flushing board last_activity failed, retrying')
+                self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending = list(self._pending.items())
+            self._pending.clear()
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                'UPDATE boards SET last_activity = ? WHERE id = ?',
+                [(timestamp, board_id) for board_id, timestamp in pending]
+            )
+            # Danh sách board sắp theo last_activity nên ETag của get_boards phải đổi;
+            # board cache giữ nguyên (xem ghi chú ở BOARD_ACTIVITY_INTERVAL)
+            bump_version(cursor, 'boards')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # Trả lại các board chưa ghi, giữ timestamp mới hơn nếu có touch trong lúc ghi
+            with self._lock:
+                for board_id, timestamp in pending:
+                    if self._pending.get(board_id, '') < timestamp:
+                        self._pending[board_id] = timestamp
+                self.stats['flush_errors'] += 1
+            raise
+        finally:
+            release_db_connection()
+        self._written(pending, time.monotonic())
+        with self._lock:
+            self.stats['flushed_boards'] += len(pending)
+            self.stats['flush_transactions'] += 1
+        return len(pending)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+            stats['tracked'] = len(self._last_write)
+        return stats
+
+board_activity = BoardActivityTracker(BOARD_ACTIVITY_INTERVAL)
+atexit.register(board_activity.flush)
+
+def update_board_activity(cursor, board_id: str):
+    board_activity.touch(cursor, board_id)
+
+# Cache LRU cho JSON đã serialize của get_board, giới hạn theo số entry và tổng byte.
+# Entry bị xóa sau khi transaction ghi lên board commit, nên cache hit không cần
+# đọc SQLite
+BOARD_CACHE_MAX_ENTRIES = int(os.environ.get('SCRUMBOARD_BOARD_CACHE_ENTRIES', '256'))
+BOARD_CACHE_MAX_BYTES = int(os.environ.get('SCRUMBOARD_BOARD_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+class BoardCache:
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # board_id -> {'version', 'etag', 'body'}
+        self._generations = {}          # board_id -> số lần invalidate
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def get(self, board_id):
+        with self._lock:
+            entry = self._entries.get(board_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(board_id)
+            self.stats['hits'] += 1
+            return entry
+
+    def generation(self, board_id):
+        with self._lock:
+            return self._generations.get(board_id, 0)
+
+    # Chỉ lưu nếu board không bị invalidate kể từ lúc đọc generation,
+    # tránh ghi đè bằng dữ liệu cũ đọc trước khi một transaction khác commit
+    def put(self, board_id, generation, version, etag, body):
+        entry = {'version': version, 'etag': etag, 'body': body}
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if self._generations.get(board_id, 0) != generation:
+                return entry
+            self._discard(board_id)
+            self._entries[board_id] = entry
+            self._bytes += len(body)
+            self.stats['stores'] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.stats['evictions'] += 1
+        return entry
+
+    def invalidate(self, board_id):
+        with self._lock:
+            self._generations[board_id] = self._generations.get(board_id, 0) + 1
+            if self._discard(board_id):
+                self.stats['invalidations'] += 1
+
+    def _discard(self, board_id):
+        entry = self._entries.pop(board_id, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry['body'])
+        return True
+
+    # board_id -> version của các entry đang cache
+    def versions(self):
+        with self._lock:
+            return {board_id: entry['version'] for board_id, entry in self._entries.items()}
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+board_cache = BoardCache(BOARD_CACHE_MAX_ENTRIES, BOARD_CACHE_MAX_BYTES)
+
+# Version của từng phạm vi dữ liệu, luôn tăng (kể cả sau khi xóa)
+def bump_version(cursor, scope):
+    cursor.execute('''
+        INSERT INTO entity_versions (scope, version) VALUES (?, 1)
+        ON CONFLICT(scope) DO UPDATE SET version = version + 1
+    ''', (scope,))
+
+def get_version(cursor, scope):
+    cursor.execute('SELECT version FROM entity_versions WHERE scope = ?', (scope,))
+    row = cursor.fetchone()
+    return row['version'] if row else 0
+
+# Đổi version của board và xóa board khỏi cache khi transaction commit
+def bump_board_version(cursor, board_id):
+    bump_version(cursor, f'board:{board_id}')
+    bump_version(cursor, 'boards')
+    cursor.connection.on_commit(('board', board_id), lambda: board_cache.invalidate(board_id))
+
+# Gọi trong transaction của mọi thao tác ghi lên board (lists, cards, labels, members)
+def touch_board(cursor, board_id):
+    bump_board_version(cursor, board_id)
+    update_board_activity(cursor, board_id)
+
+# Change log: mỗi thao tác ghi thêm một dòng (board, entity, action) trong cùng transaction.
+# Chỉ giữ CHANGE_LOG_RETENTION dòng gần nhất, cursor cũ hơn thì client nhận lại snapshot
+CHANGE_LOG_RETENTION = int(os.environ.get('SCRUMBOARD_CHANGE_LOG_RETENTION', '50000'))
+CHANGE_LOG_PRUNE_EVERY = 1000
+CHANGE_ENTITY_TYPES = ('board', 'list', 'card', 'label', 'member')
+
+def record_changes(cursor, board_id, entity_type, entity_ids, action='update'):
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+    changed_at = datetime.now().isoformat()
+    cursor.executemany('''
+        INSERT INTO change_log (board_id, entity_type, entity_id, action, changed_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(board_id, entity_type, entity_id, action, changed_at) for entity_id in entity_ids])
+    # updated_at của card đổi cùng lúc với change log
+    if entity_type == 'card' and action != 'delete':
+        cursor.executemany('UPDATE cards SET updated_at = ? WHERE id = ?',
+                           [(changed_at, entity_id) for entity_id in entity_ids])
+    cursor.execute('SELECT last_insert_rowid()')
+    last_seq = cursor.fetchone()[0]
+    if last_seq // CHANGE_LOG_PRUNE_EVERY != (last_seq - len(entity_ids)) // CHANGE_LOG_PRUNE_EVERY:
+        cursor.execute('DELETE FROM change_log WHERE seq <= ?', (last_seq - CHANGE_LOG_RETENTION,))
+    # Báo cho các client SSE sau khi commit, mỗi board một event mang cursor cuối của transaction
+    cursor.connection.on_commit(
+        ('events', board_id),
+        lambda: board_events.publish(board_id, {'board_id': board_id, 'cursor': last_seq})
     )
+
+def record_change(cursor, board_id, entity_type, entity_id, action='update'):
+    record_changes(cursor, board_id, entity_type, [entity_id], action)
+
+# Pub/sub trong process cho /api/boards/<id>/events. Mỗi client có một queue giới hạn;
+# event chỉ mang cursor của change log nên khi queue đầy có thể bỏ event cũ nhất mà
+# client không mất thay đổi nào (lần gọi /changes kế tiếp sẽ lấy đủ). Vì cùng lý do,
+# event có cursor không mới hơn event đã phát cho board đó thì bỏ qua
+SSE_QUEUE_SIZE = int(os.environ.get('SCRUMBOARD_SSE_QUEUE_SIZE', '16'))
+SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SCRUMBOARD_SSE_HEARTBEAT', '15'))
+SSE_MAX_SUBSCRIBERS = int(os.environ.get('SCRUMBOARD_SSE_MAX_SUBSCRIBERS', '500'))
+
+class BoardEventHub:
+    def __init__(self, queue_size, max_subscribers):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}  # board_id -> set các queue.Queue
+        self._cursors = {}      # board_id -> cursor của event mới nhất đã phát
+        self._count = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self.stats = {
+            'published': 0,
+            'delivered': 0,
+            'dropped': 0,
+            'rejected': 0,
+            'skipped': 0
+        }
+
+    def subscribe(self, board_id):
+        with self._lock:
+            if self._closed or self._count >= self.max_subscribers:
+                self.stats['rejected'] += 1
+                return None
+            subscriber = queue.Queue(self.queue_size)
+            self._subscribers.setdefault(board_id, set()).add(subscriber)
+            self._count += 1
+            return subscriber
+
+    def unsubscribe(self, board_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(board_id)
+            if subscribers is None or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            self._count -= 1
+            if not subscribers:
+                del self._subscribers[board_id]
+
+    def publish(self, board_id, event):
+        with self._lock:
+            if event['cursor'] <= self._cursors.get(board_id, 0):
+                self.stats['skipped'] += 1
+                return
+            self._cursors[board_id] = event['cursor']
+            subscribers = list(self._subscribers.get(board_id, ()))
+        dropped = 0
+        for subscriber in subscribers:
+            dropped += self._put(subscriber, event)
+        with self._lock:
+            self.stats['published'] += 1
+            self.stats['delivered'] += len(subscribers)
+            self.stats['dropped'] += dropped
+
+    # Queue đầy thì bỏ event cũ nhất, trả về số event đã bỏ
+    def _put(self, subscriber, event):
+        dropped = 0
+        while True:
+            try:
+                subscriber.put_nowait(event)
+                return dropped
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                    dropped += 1
+                except queue.Empty:
+                    pass
+
+    # Kết thúc mọi stream đang mở (worker tắt): client tự kết nối lại sau retry
+    def close(self):
+        with self._lock:
+            self._closed = True
+            subscribers = [subscriber for group in self._subscribers.values() for subscriber in group]
+        for subscriber in subscribers:
+            self._put(subscriber, None)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['subscribers'] = self._count
+            stats['boards'] = len(self._subscribers)
+        return stats
+
+board_events = BoardEventHub(SSE_QUEUE_SIZE, SSE_MAX_SUBSCRIBERS)
+
+def _list_card_ids(cursor, list_id):
+    cursor.execute('SELECT id FROM cards WHERE list_id = ?', (list_id,))
+    return [row['id'] for row in cursor.fetchall()]
+
+def make_etag(*parts):
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+# Trả về 304 nếu If-None-Match của client khớp etag, ngược lại None
+def not_modified(etag):
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+def with_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    return response
+
+# Phân trang keyset cho các API trả danh sách: ?limit=&cursor=&fields=.
+# Body vẫn là mảng như cũ, cursor của trang sau nằm trong header X-Next-Cursor.
+# Không có limit lẫn cursor thì trả toàn bộ danh sách như trước khi có phân trang
+# (frontend chưa đọc X-Next-Cursor); có cursor mà không có limit thì dùng PAGE_DEFAULT_LIMIT
+PAGE_DEFAULT_LIMIT = int(os.environ.get('SCRUMBOARD_PAGE_DEFAULT_LIMIT', '100'))
+PAGE_MAX_LIMIT = int(os.environ.get('SCRUMBOARD_PAGE_MAX_LIMIT', '500'))
+
+_table_columns = {}
+
+def table_columns(cursor, table):
+    columns = _table_columns.get(table)
+    if columns is None:
+        cursor.execute(f'PRAGMA table_info({table})')
+        columns = _table_columns[table] = [row['name'] for row in cursor.fetchall()]
+    return columns
+
+def encode_page_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_page_cursor(token, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+# Các điều kiện "đứng sau cursor", mỗi điều kiện là một nhánh riêng để SQLite seek
+# được bằng index: k0 sau v0, rồi k0 IS v0 AND k1 sau v1, ... NULL đứng cuối khi DESC
+# và đứng đầu khi ASC (như ORDER BY của SQLite); rowid không bao giờ NULL
+def keyset_conditions(order, values):
+    conditions = []
+    for i, (expr, direction) in enumerate(order):
+        prefix = [f'{order[j][0]} IS ?' for j in range(i)]
+        value = values[i]
+        if value is None:
+            after = [] if direction == 'DESC' else [(f'{expr} IS NOT NULL', [])]
+        else:
+            after = [(f"{expr} {'<' if direction == 'DESC' else '>'} ?", [value])]
+            if direction == 'DESC' and not expr.endswith('rowid'):
+                after.append((f'{expr} IS NULL', []))
+        for condition, params in after:
+            conditions.append((' AND '.join(prefix + [condition]), list(values[:i]) + params))
+    return conditions
+
+# Dựng câu SELECT của một trang keyset (không đọc request hay DB). branches là danh
+# sách (điều kiện, params) được OR với nhau; values là giá trị cursor hoặc None cho
+# trang đầu; limit None là không giới hạn. Mỗi tổ hợp nhánh x điều kiện cursor là một
+# câu con có ORDER BY/LIMIT riêng, UNION gộp lại (bỏ trùng) nên mỗi câu con chỉ đọc
+# tối đa limit dòng theo index
+def build_page_query(table, alias, selected, branches, order, values, limit):
+    select = [f'{alias}.{column}' for column in selected]
+    select += [f'{expr} AS _sort{i}' for i, (expr, _) in enumerate(order)]
+    keysets = keyset_conditions(order, values) if values is not None else [(None, [])]
+    order_by = ', '.join(f'{expr} {direction}' for expr, direction in order)
+    limit_sql = ' LIMIT ?' if limit is not None else ''
+    limit_params = [limit] if limit is not None else []
+    parts = []
+    params = []
+    for where, where_params in branches:
+        for keyset, keyset_params in keysets:
+            conditions = [f'({condition})' for condition in (where, keyset) if condition]
+            sql = f"SELECT {', '.join(select)} FROM {table} {alias}"
+            if conditions:
+                sql += f" WHERE {' AND '.join(conditions)}"
+            parts.append(f'{sql} ORDER BY {order_by}{limit_sql}')
+            params.extend(list(where_params) + keyset_params + limit_params)
+    if len(parts) == 1:
+        return parts[0], params
+    sql = ' UNION '.join(f'SELECT * FROM ({part})' for part in parts)
+    sql += f" ORDER BY {', '.join(f'_sort{i} {direction}' for i, (_, direction) in enumerate(order))}{limit_sql}"
+    params.extend(limit_params)
+    return sql, params
+
+# order là danh sách (biểu thức, 'ASC'/'DESC'), biểu thức cuối phải duy nhất (thường là rowid)
+# để thứ tự ổn định. where là một điều kiện (với params) hoặc danh sách nhánh
+# (điều kiện, params) được OR với nhau. Chỉ các cột trong fields= được SELECT. Lỗi tham số ném ValueError
+def fetch_page(cursor, table, alias, where, params, order):
+    token = request.args.get('cursor')
+    if 'limit' in request.args or token:
+        try:
+            limit = int(request.args.get('limit', PAGE_DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1:
+            raise ValueError('limit must be a positive integer')
+        limit = min(limit, PAGE_MAX_LIMIT)
+    else:
+        limit = None
+    columns = table_columns(cursor, table)
+    fields = request.args.get('fields')
+    if fields:
+        selected = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in selected if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    else:
+        selected = columns
+    values = decode_page_cursor(token, len(order)) if token else None
+    branches = where if isinstance(where, list) else [(where, params)]
+    sql, query_params = build_page_query(table, alias, selected, branches, order, values,
+                                         limit + 1 if limit is not None else None)
+    cursor.execute(sql, query_params)
+    rows = cursor.fetchall()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_page_cursor([rows[-1][f'_sort{i}'] for i in range(len(order))])
+    return [{column: row[column] for column in selected} for row in rows], next_cursor
+
+def page_response(items, next_cursor):
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+# Lỗi nghiệp vụ của một thao tác ghi, được chuyển thành response {'error': ...}
+class OperationError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+# Chạy một thao tác ghi (op_*) trong transaction của request
+def run_operation(operation, *args, status=200):
+    conn = get_db_connection()
+    try:
+        result = operation(conn.cursor(), *args)
+    except OperationError as e:
+        conn.close()
+        return jsonify({'error': e.message}), e.status
     conn.commit()
     conn.close()
+    return jsonify(result), status
 
 # Board API endpoints
 @app.route('/api/boards', methods=['GET'])
@@ -392,22 +1135,26 @@ def get_boards():
     email = request.args.get('email')
     conn = get_db_connection()
     cursor = conn.cursor()
-    if email:
-        cursor.execute('SELECT id FROM members WHERE name = ? OR email = ?', (email, email))
-        member = cursor.fetchone()
-        member_id = member['id'] if member else None
-        cursor.execute('''
-            SELECT DISTINCT b.* FROM boards b
-            LEFT JOIN board_members bm ON b.id = bm.board_id
-            WHERE b.is_public = 1 OR b.owner_id = ? OR bm.member_id = ?
-            ORDER BY b.last_activity DESC
-        ''', (member_id, member_id))
-        boards = [dict(row) for row in cursor.fetchall()]
-    else:
-        cursor.execute('SELECT * FROM boards WHERE is_public = 1 ORDER BY last_activity DESC')
-        boards = [dict(row) for row in cursor.fetchall()]
+    etag = make_etag('boards', get_version(cursor, 'boards'), request.query_string.decode('utf-8'))
+    cached = not_modified(etag)
+    if cached:
+        conn.close()
+        return cached
+    # Sắp theo cột gốc để dùng được index (is_public, last_activity) và (owner_id, last_activity)
+    order = [('b.last_activity', 'DESC'), ('b.rowid', 'DESC')]
+    branches = [('b.is_public = 1', ())]
+    try:
+        member = current_member(email) if email else None
+        if member:
+            branches.append(('b.owner_id = ?', (member['id'],)))
+            branches.append(('b.id IN (SELECT bm.board_id FROM board_members bm WHERE bm.member_id = ?)',
+                             (member['id'],)))
+        boards, next_cursor = fetch_page(cursor, 'boards', 'b', branches, (), order)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
     conn.close()
-    return jsonify(boards)
+    return with_etag(page_response(boards, next_cursor), etag)
 
 @app.route('/api/boards', methods=['POST'])
 def create_board():
@@ -416,15 +1163,8 @@ def create_board():
         return jsonify({'error': 'Board title is required'}), 400
     board_id = generate_id()
     owner_email = data.get('owner_email')
-    owner_id = None
-    if owner_email:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM members WHERE name = ? OR email = ?', (owner_email, owner_email))
-        member = cursor.fetchone()
-        if member:
-            owner_id = member['id']
-        conn.close()
+    owner = current_member(owner_email) if owner_email else None
+    owner_id = owner['id'] if owner else None
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
@@ -438,10 +1178,113 @@ def create_board():
             INSERT INTO board_members (board_id, member_id)
             VALUES (?, ?)
         ''', (board_id, owner_id))
+    bump_board_version(cursor, board_id)
+    invalidate_board_permissions(cursor, board_id)
     conn.commit()
     conn.close()
     return jsonify({'id': board_id, 'message': 'Board created successfully'}), 201
 
+# Cache quyền dùng chung cho các decorator require_*: email -> member (company,
+# department) và (email, board) -> role trên board. Mỗi entry sống tối đa
+# AUTHZ_CACHE_TTL giây và bị bỏ khi board hoặc email tương ứng bị invalidate
+# (thêm/sửa role/xóa member khỏi board, tạo/xóa board, tạo member). Khi miss thì
+# query trên connection của request.
+AUTHZ_CACHE_MAX_ENTRIES = int(os.environ.get('SCRUMBOARD_AUTHZ_CACHE_ENTRIES', '10000'))
+AUTHZ_CACHE_TTL = float(os.environ.get('SCRUMBOARD_AUTHZ_CACHE_TTL', '30'))
+
+class PermissionResolver:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires, generations, value)
+        self._generations = {}          # ('board', board_id) | ('member', email) -> số lần invalidate
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    # Chỉ lưu kết quả nếu các scope không bị invalidate trong lúc đang query
+    def _resolve(self, key, scopes, load):
+        now = time.monotonic()
+        with self._lock:
+            generations = tuple(self._generations.get(scope, 0) for scope in scopes)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == generations:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[2]
+            self.stats['misses'] += 1
+        value = load(get_db_connection().cursor())
+        with self._lock:
+            if tuple(self._generations.get(scope, 0) for scope in scopes) == generations:
+                self._entries[key] = (now + self.ttl, generations, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+        return value
+
+    # {'id', 'company_id', 'department_id'} của member có email này, hoặc None
+    def member(self, email):
+        def load(cursor):
+            cursor.execute('SELECT id, company_id, department_id FROM members WHERE email = ?', (email,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        return self._resolve(('member', email), (('member', email),), load)
+
+    # {'role', 'owner_id', 'member_id'} của email trên board, hoặc None nếu không phải member
+    def board_access(self, email, board_id):
+        def load(cursor):
+            cursor.execute('''
+                SELECT bm.role, b.owner_id, m.id as member_id
+                FROM board_members bm
+                JOIN members m ON bm.member_id = m.id
+                JOIN boards b ON bm.board_id = b.id
+                WHERE bm.board_id = ? AND m.email = ?
+            ''', (board_id, email))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        return self._resolve(('board', email, board_id), (('board', board_id), ('member', email)), load)
+
+    def _invalidate(self, scope):
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            self.stats['invalidations'] += 1
+
+    def invalidate_board(self, board_id):
+        self._invalidate(('board', board_id))
+
+    def invalidate_member(self, email):
+        self._invalidate(('member', email))
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        stats['ttl'] = self.ttl
+        return stats
+
+permissions = PermissionResolver(AUTHZ_CACHE_MAX_ENTRIES, AUTHZ_CACHE_TTL)
+
+# Gọi trong transaction thay đổi quyền trên board, cache được bỏ sau khi commit
+def invalidate_board_permissions(cursor, board_id):
+    cursor.connection.on_commit(('permissions', board_id), lambda: permissions.invalidate_board(board_id))
+
+def invalidate_member_permissions(cursor, email):
+    cursor.connection.on_commit(('permissions-member', email), lambda: permissions.invalidate_member(email))
+
+# Member của email trong request hiện tại (dict có id, company_id, department_id hoặc
+# None). Mỗi email chỉ resolve một lần mỗi request, qua cache member của permissions
+def current_member(email):
+    identities = g.setdefault('identities', {})
+    if email not in identities:
+        identities[email] = permissions.member(email)
+    return identities[email]
+
 # Thêm decorator kiểm tra quyền quản lý board
 def require_board_admin(func):
     from functools import wraps
@@ -451,17 +1294,7 @@ def require_board_admin(func):
         user_email = request.args.get('user_email')
         if not user_email or not board_id:
             return jsonify({'error': 'Missing user_email or board_id'}), 403
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT bm.role, b.owner_id, m.id as member_id
-            FROM board_members bm
-            JOIN members m ON bm.member_id = m.id
-            JOIN boards b ON bm.board_id = b.id
-            WHERE bm.board_id = ? AND m.email = ?
-        ''', (board_id, user_email))
-        result = cursor.fetchone()
-        conn.close()
+        result = permissions.board_access(user_email, board_id)
         if not result or (result['role'] != 'admin' and result['owner_id'] != result['member_id']):
             return jsonify({'error': 'Permission denied. Admin access required.'}), 403
         return func(*args, **kwargs)
@@ -476,17 +1309,7 @@ def require_board_member(func):
         user_email = request.args.get('user_email')
         if not user_email or not board_id:
             return jsonify({'error': 'Missing user_email or board_id'}), 403
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT bm.role, b.owner_id, m.id as member_id
-            FROM board_members bm
-            JOIN members m ON bm.member_id = m.id
-            JOIN boards b ON bm.board_id = b.id
-            WHERE bm.board_id = ? AND m.email = ?
-        ''', (board_id, user_email))
-        result = cursor.fetchone()
-        conn.close()
+        result = permissions.board_access(user_email, board_id)
         if not result:
             return jsonify({'error': 'Permission denied. Board member access required.'}), 403
         return func(*args, **kwargs)
@@ -506,10 +1329,11 @@ def add_member_to_board(board_id, member_id):
             INSERT INTO board_members (board_id, member_id, role)
             VALUES (?, ?, ?)
         ''', (board_id, member_id, role))
+        touch_board(cursor, board_id)
+        invalidate_board_permissions(cursor, board_id)
+        record_change(cursor, board_id, 'member', member_id, 'create')
         conn.commit()
         conn.close()
-        
-        update_board_activity(board_id)
         return jsonify({'message': 'Member added to board successfully'})
     except sqlite3.IntegrityError:
         conn.close()
@@ -528,6 +1352,9 @@ def update_member_role(board_id, member_id):
     cursor.execute('''
         UPDATE board_members SET role = ? WHERE board_id = ? AND member_id = ?
     ''', (role, board_id, member_id))
+    touch_board(cursor, board_id)
+    invalidate_board_permissions(cursor, board_id)
+    record_change(cursor, board_id, 'member', member_id)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Member role updated successfully'})
@@ -548,40 +1375,73 @@ def get_board_members(board_id):
     conn.close()
     return jsonify(members)
 
-@app.route('/api/boards/<board_id>', methods=['GET'])
-def get_board(board_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Get board info
+# Dựng toàn bộ board với số query cố định (board, lists, cards, card labels,
+# board labels, members) rồi gom nhóm bằng dict index, thay cho query lồng
+# theo từng list/card
+def assemble_board(cursor, board_id):
     cursor.execute('SELECT * FROM boards WHERE id = ?', (board_id,))
     board = cursor.fetchone()
     if not board:
-        return jsonify({'error': 'Board not found'}), 404
+        return None
     board_data = dict(board)
-    # Get lists with cards (chỉ lấy list chưa archived)
-    cursor.execute('SELECT * FROM lists WHERE board_id = ? AND (archived IS NULL OR archived = 0) ORDER BY position', (board_id,))
+    # Lists chưa archived
+    cursor.execute('''
+        SELECT * FROM lists
+        WHERE board_id = ? AND (archived IS NULL OR archived = 0)
+        ORDER BY position, rowid
+    ''', (board_id,))
     lists = []
+    cards_by_list = {}
     for list_row in cursor.fetchall():
         list_data = dict(list_row)
-        # Get cards for this list (chỉ lấy card chưa archived)
-        cursor.execute('SELECT * FROM cards WHERE list_id = ? AND (archived IS NULL OR archived = 0) ORDER BY position', (list_data['id'],))
-        cards = []
-        for card_row in cursor.fetchall():
-            card_data = dict(card_row)
-            if card_data.get('checklist_items'):
-                card_data['checklist_items'] = json.loads(card_data['checklist_items'])
-            else:
-                card_data['checklist_items'] = []
-            # Get labels for this card
-            cursor.execute('''
-                SELECT l.* FROM labels l
-                JOIN card_labels cl ON l.id = cl.label_id
-                WHERE cl.card_id = ?
-            ''', (card_data['id'],))
-            card_data['labels'] = [dict(label) for label in cursor.fetchall()]
-            cards.append(card_data)
-        list_data['cards'] = cards
+        list_data['cards'] = cards_by_list[list_data['id']] = []
         lists.append(list_data)
+    # Cards chưa archived của tất cả các list trên, kèm tiến độ checklist
+    cursor.execute('''
+        SELECT c.*,
+            (SELECT COUNT(*) FROM checklist_items ci WHERE ci.card_id = c.id) AS checklist_total,
+            (SELECT COUNT(*) FROM checklist_items ci WHERE ci.card_id = c.id AND ci.checked = 1) AS checklist_done
+        FROM cards c
+        JOIN lists l ON c.list_id = l.id
+        WHERE l.board_id = ? AND (l.archived IS NULL OR l.archived = 0)
+        AND (c.archived IS NULL OR c.archived = 0)
+        ORDER BY c.position, c.rowid
+    ''', (board_id,))
+    cards_by_id = {}
+    for card_row in cursor.fetchall():
+        card_data = dict(card_row)
+        card_data['checklist_items'] = []
+        card_data['labels'] = []
+        cards_by_id[card_data['id']] = card_data
+        cards_by_list[card_data['list_id']].append(card_data)
+    # Checklist của các card
+    cursor.execute('''
+        SELECT ci.card_id, ci.id, ci.text, ci.checked FROM lists ls
+        JOIN cards c ON c.list_id = ls.id
+        JOIN checklist_items ci ON ci.card_id = c.id
+        WHERE ls.board_id = ?
+        ORDER BY ci.card_id, ci.position
+    ''', (board_id,))
+    for item_row in cursor.fetchall():
+        card_data = cards_by_id.get(item_row['card_id'])
+        if card_data is not None:
+            card_data['checklist_items'].append(
+                {'id': item_row['id'], 'text': item_row['text'], 'checked': bool(item_row['checked'])}
+            )
+    # Labels của các card
+    cursor.execute('''
+        SELECT cl.card_id AS label_card_id, l.* FROM lists ls
+        JOIN cards c ON c.list_id = ls.id
+        JOIN card_labels cl ON cl.card_id = c.id
+        JOIN labels l ON l.id = cl.label_id
+        WHERE ls.board_id = ?
+        ORDER BY cl.card_id, cl.label_id
+    ''', (board_id,))
+    for label_row in cursor.fetchall():
+        label = dict(label_row)
+        card_data = cards_by_id.get(label.pop('label_card_id'))
+        if card_data is not None:
+            card_data['labels'].append(label)
     board_data['lists'] = lists
     # Get board labels
     cursor.execute('SELECT * FROM labels WHERE board_id = ?', (board_id,))
@@ -593,8 +1453,421 @@ def get_board(board_id):
         WHERE bm.board_id = ?
     ''', (board_id,))
     board_data['members'] = [dict(row) for row in cursor.fetchall()]
+    return board_data
+
+@app.route('/api/boards/<board_id>', methods=['GET'])
+def get_board(board_id):
+    entry = board_cache.get(board_id)
+    if entry is None:
+        generation = board_cache.generation(board_id)
+        conn = get_db_connection()
+        # Đọc version và dữ liệu board trong cùng một snapshot
+        conn.execute('BEGIN')
+        cursor = conn.cursor()
+        version = get_version(cursor, f'board:{board_id}')
+        etag = make_etag('board', board_id, version)
+        cached = not_modified(etag)
+        if cached:
+            conn.close()
+            return cached
+        board_data = assemble_board(cursor, board_id)
+        conn.close()
+        if not board_data:
+            return jsonify({'error': 'Board not found'}), 404
+        entry = board_cache.put(board_id, generation, version, etag, jsonify(board_data).get_data())
+    cached = not_modified(entry['etag'])
+    if cached:
+        return cached
+    return with_etag(app.response_class(entry['body'], mimetype='application/json'), entry['etag'])
+
+def _sse_message(event, data, event_id=None):
+    lines = [] if event_id is None else [f'id: {event_id}']
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+# Stream SSE báo board có thay đổi; client nhận cursor rồi gọi /changes?since=<cursor cũ>.
+# Event đầu tiên luôn là cursor hiện tại để client bắt kịp những gì lỡ mất khi chưa kết nối
+@app.route('/api/boards/<board_id>/events', methods=['GET'])
+def stream_board_events(board_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT 1 FROM boards WHERE id = ?', (board_id,))
+    if not cursor.fetchone():
+        conn.close()
+        return jsonify({'error': 'Board not found'}), 404
+    subscriber = board_events.subscribe(board_id)
+    if subscriber is None:
+        conn.close()
+        return jsonify({'error': 'Too many event subscribers'}), 503
+    # Đăng ký trước rồi mới đọc cursor để không lọt event nào ở giữa
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    row = cursor.fetchone()
+    latest = row['seq'] if row else 0
+    conn.close()
+
+    def stream():
+        try:
+            yield f'retry: {int(SSE_HEARTBEAT_INTERVAL * 1000)}\n\n'
+            yield _sse_message('changes', {'board_id': board_id, 'cursor': latest}, latest)
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    # Heartbeat giữ kết nối qua proxy và phát hiện client đã ngắt
+                    yield ': heartbeat\n\n'
+                    continue
+                if event is None:
+                    return
+                yield _sse_message('changes', event, event['cursor'])
+        finally:
+            board_events.unsubscribe(board_id, subscriber)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Full-text search (FTS5). search_docs ánh xạ rowid của search_index sang entity
+# (board/list/card) kèm board_id và cờ archived để lọc quyền ngay trong SQL.
+# Card được index theo title, description và nội dung checklist.
+SEARCH_MAX_LIMIT = 50
+
+# _SEARCH_DOC_SQL và _search_doc_triggers là một phần của migration 6, không sửa;
+# đổi trigger thì thêm migration mới
+_SEARCH_DOC_SQL = {
+    'board': ("SELECT NEW.id, NEW.id, 0",
+              "NEW.title", "COALESCE(NEW.description, '')"),
+    'list': ("SELECT NEW.id, NEW.board_id, COALESCE(NEW.archived, 0)",
+             "NEW.title", "''"),
+    'card': ('''SELECT NEW.id, l.board_id, COALESCE(NEW.archived, 0) OR COALESCE(l.archived, 0)
+                FROM lists l WHERE l.id = NEW.list_id''',
+             "NEW.title",
+             '''COALESCE(NEW.description, '') || ' ' || COALESCE(
+                (SELECT group_concat(text, ' ') FROM checklist_items WHERE card_id = NEW.id), '')'''),
+}
+
+def _search_doc_triggers(entity_type, table, watched):
+    doc_select, title_sql, body_sql = _SEARCH_DOC_SQL[entity_type]
+    refresh = f'''
+        DELETE FROM search_index WHERE rowid = (
+            SELECT rowid FROM search_docs WHERE entity_type = '{entity_type}' AND entity_id = NEW.id);
+        INSERT INTO search_docs (entity_type, entity_id, board_id, archived)
+            SELECT '{entity_type}', * FROM ({doc_select}) WHERE true
+            ON CONFLICT (entity_type, entity_id) DO UPDATE
+            SET board_id = excluded.board_id, archived = excluded.archived;
+        INSERT INTO search_index (rowid, title, body)
+            SELECT rowid, {title_sql}, {body_sql} FROM search_docs
+            WHERE entity_type = '{entity_type}' AND entity_id = NEW.id;
+    '''
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {table} BEGIN {refresh} END',
+        f'CREATE TRIGGER IF NOT EXISTS search_{table}_au AFTER UPDATE OF {watched} ON {table} BEGIN {refresh} END',
+        f'''CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM search_index WHERE rowid = (
+                SELECT rowid FROM search_docs WHERE entity_type = '{entity_type}' AND entity_id = OLD.id);
+            DELETE FROM search_docs WHERE entity_type = '{entity_type}' AND entity_id = OLD.id;
+        END''',
+    ]
+
+def create_search_index(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+    if cursor.fetchone():
+        return
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE search_index USING fts5(
+                title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '3 4'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite không có FTS5: /api/search trả 501
+        return
+    # bm25 mặc định cho cột rank: khớp ở title nặng gấp 10 lần body
+    cursor.execute("INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_docs (
+            rowid INTEGER PRIMARY KEY,
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            board_id TEXT,
+            archived INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (entity_type, entity_id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_docs_board ON search_docs(board_id)')
+    statements = (
+        _search_doc_triggers('board', 'boards', 'title, description') +
+        _search_doc_triggers('list', 'lists', 'title, archived') +
+        _search_doc_triggers('card', 'cards', 'title, description, list_id, archived')
+    )
+    # Archive/restore list thì card trong list cũng ẩn/hiện theo
+    statements.append('''
+        CREATE TRIGGER IF NOT EXISTS search_lists_archive AFTER UPDATE OF archived ON lists BEGIN
+            UPDATE search_docs SET archived = (
+                SELECT COALESCE(c.archived, 0) OR COALESCE(NEW.archived, 0)
+                FROM cards c WHERE c.id = search_docs.entity_id)
+            WHERE entity_type = 'card'
+            AND entity_id IN (SELECT id FROM cards WHERE list_id = NEW.id);
+        END
+    ''')
+    # Checklist thay đổi thì index lại card chứa nó (UPDATE OF title kích hoạt search_cards_au)
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS search_checklist_items_{event.lower()} AFTER {event} ON checklist_items BEGIN
+                UPDATE cards SET title = title WHERE id = {row}.card_id;
+            END
+        ''')
+    for statement in statements:
+        cursor.execute(statement)
+    # Index dữ liệu đang có
+    cursor.execute('''
+        INSERT INTO search_docs (entity_type, entity_id, board_id, archived)
+        SELECT 'board', id, id, 0 FROM boards
+        UNION ALL
+        SELECT 'list', id, board_id, COALESCE(archived, 0) FROM lists
+        UNION ALL
+        SELECT 'card', c.id, l.board_id, COALESCE(c.archived, 0) OR COALESCE(l.archived, 0)
+        FROM cards c JOIN lists l ON l.id = c.list_id
+    ''')
+    cursor.execute('''
+        INSERT INTO search_index (rowid, title, body)
+        SELECT d.rowid, b.title, COALESCE(b.description, '')
+        FROM search_docs d JOIN boards b ON d.entity_type = 'board' AND b.id = d.entity_id
+        UNION ALL
+        SELECT d.rowid, l.title, ''
+        FROM search_docs d JOIN lists l ON d.entity_type = 'list' AND l.id = d.entity_id
+        UNION ALL
+        SELECT d.rowid, c.title, COALESCE(c.description, '') || ' ' || COALESCE(
+            (SELECT group_concat(text, ' ') FROM checklist_items WHERE card_id = c.id), '')
+        FROM search_docs d JOIN cards c ON d.entity_type = 'card' AND c.id = d.entity_id
+    ''')
+
+# Mỗi từ trong query thành một token prefix "từ"*, các token AND với nhau.
+# Từ ngắn hơn SEARCH_MIN_PREFIX chỉ khớp nguyên từ, tránh quét quá nhiều term
+SEARCH_MIN_PREFIX = 3
+
+def build_match_query(text):
+    terms = [term.replace('"', '') for term in text.split()]
+    return ' '.join(
+        f'"{term}"*' if len(term) >= SEARCH_MIN_PREFIX else f'"{term}"'
+        for term in terms if term
+    )
+
+# Dựng câu tìm kiếm (không đọc request hay DB). values là (rank, rowid) của cursor
+# hoặc None cho trang đầu. Board member xem được gồm ba nhánh seek bằng index như
+# get_boards: public, sở hữu, là thành viên
+def build_search_query(match, member_id, board_id, entity_type, values, limit):
+    conditions = ['search_index MATCH ?', 'd.archived = 0', '''d.board_id IN (
+        SELECT b.id FROM boards b WHERE b.is_public = 1
+        UNION ALL SELECT b.id FROM boards b WHERE b.owner_id = ?
+        UNION ALL SELECT bm.board_id FROM board_members bm WHERE bm.member_id = ?
+    )''']
+    params = [match, member_id, member_id]
+    if board_id:
+        conditions.append('d.board_id = ?')
+        params.append(board_id)
+    if entity_type:
+        conditions.append('d.entity_type = ?')
+        params.append(entity_type)
+    if values is not None:
+        rank, rowid = values
+        conditions.append('(search_index.rank > ? OR (search_index.rank = ? AND d.rowid > ?))')
+        params.extend([rank, rank, rowid])
+    params.append(limit)
+    sql = f'''
+        SELECT d.rowid AS doc_rowid, d.entity_type, d.entity_id, d.board_id,
+            search_index.rank AS rank,
+            highlight(search_index, 0, '<mark>', '</mark>') AS title,
+            snippet(search_index, -1, '<mark>', '</mark>', '…', 12) AS snippet
+        FROM search_index
+        JOIN search_docs d ON d.rowid = search_index.rowid
+        WHERE {' AND '.join(conditions)}
+        ORDER BY search_index.rank, d.rowid
+        LIMIT ?
+    '''
+    return sql, params
+
+# Tìm kiếm board/list/card mà member (email) xem được, xếp theo bm25 (title nặng hơn body).
+# ?q=&email=&board_id=&type=&limit=&cursor= ; cursor trang sau nằm trong header X-Next-Cursor
+@app.route('/api/search', methods=['GET'])
+def search():
+    match = build_match_query(request.args.get('q', ''))
+    if not match:
+        return jsonify({'error': 'q is required'}), 400
+    email = request.args.get('email')
+    board_id = request.args.get('board_id')
+    entity_type = request.args.get('type')
+    if entity_type and entity_type not in ('board', 'list', 'card'):
+        return jsonify({'error': 'type must be board, list or card'}), 400
+    try:
+        limit = min(int(request.args.get('limit', 20)), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")
+    if not cursor.fetchone():
+        conn.close()
+        return jsonify({'error': 'Full-text search is not available'}), 501
+    member = current_member(email) if email else None
+    member_id = member['id'] if member else None
+    values = None
+    token = request.args.get('cursor')
+    if token:
+        try:
+            values = decode_page_cursor(token, 2)
+        except ValueError as e:
+            conn.close()
+            return jsonify({'error': str(e)}), 400
+    sql, params = build_search_query(match, member_id, board_id, entity_type, values, limit + 1)
+    try:
+        cursor.execute(sql, params)
+    except sqlite3.OperationalError:
+        conn.close()
+        return jsonify({'error': 'Invalid search query'}), 400
+    rows = cursor.fetchall()
+    conn.close()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_page_cursor([rows[-1]['rank'], rows[-1]['doc_rowid']])
+    results = [{
+        'type': row['entity_type'],
+        'id': row['entity_id'],
+        'board_id': row['board_id'],
+        'title': row['title'],
+        'snippet': row['snippet'],
+        'rank': row['rank']
+    } for row in rows]
+    return page_response(results, next_cursor)
+
+# Chạy một câu SELECT có mệnh đề "IN ({ids})" theo từng nhóm id để không vượt giới hạn tham số
+def _select_in(cursor, sql, params, ids, chunk_size=500):
+    rows = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        cursor.execute(sql.format(ids=', '.join('?' * len(chunk))), list(params) + chunk)
+        rows.extend(cursor.fetchall())
+    return rows
+
+# Trạng thái hiện tại của các entity đã đổi, cùng dạng với payload của get_board.
+# Entity không còn hiển thị trên board (đã xóa, archive, chuyển board) sẽ không có trong kết quả
+def load_changed_entities(cursor, board_id, ids_by_type):
+    loaded = {entity_type: {} for entity_type in CHANGE_ENTITY_TYPES}
+    if ids_by_type['board']:
+        cursor.execute('SELECT * FROM boards WHERE id = ?', (board_id,))
+        row = cursor.fetchone()
+        if row:
+            loaded['board'][board_id] = dict(row)
+    for row in _select_in(cursor, '''
+        SELECT * FROM lists
+        WHERE board_id = ? AND (archived IS NULL OR archived = 0) AND id IN ({ids})
+    ''', (board_id,), ids_by_type['list']):
+        loaded['list'][row['id']] = dict(row)
+    cards = loaded['card']
+    for row in _select_in(cursor, '''
+        SELECT c.*,
+            (SELECT COUNT(*) FROM checklist_items ci WHERE ci.card_id = c.id) AS checklist_total,
+            (SELECT COUNT(*) FROM checklist_items ci WHERE ci.card_id = c.id AND ci.checked = 1) AS checklist_done
+        FROM cards c
+        JOIN lists l ON c.list_id = l.id
+        WHERE l.board_id = ? AND (l.archived IS NULL OR l.archived = 0)
+        AND (c.archived IS NULL OR c.archived = 0) AND c.id IN ({ids})
+    ''', (board_id,), ids_by_type['card']):
+        card_data = dict(row)
+        card_data['checklist_items'] = []
+        card_data['labels'] = []
+        cards[card_data['id']] = card_data
+    card_ids = list(cards)
+    for row in _select_in(cursor, '''
+        SELECT card_id, id, text, checked FROM checklist_items
+        WHERE card_id IN ({ids})
+        ORDER BY card_id, position
+    ''', (), card_ids):
+        cards[row['card_id']]['checklist_items'].append(
+            {'id': row['id'], 'text': row['text'], 'checked': bool(row['checked'])}
+        )
+    for row in _select_in(cursor, '''
+        SELECT cl.card_id AS label_card_id, l.* FROM card_labels cl
+        JOIN labels l ON l.id = cl.label_id
+        WHERE cl.card_id IN ({ids})
+        ORDER BY cl.card_id, cl.label_id
+    ''', (), card_ids):
+        label = dict(row)
+        cards[label.pop('label_card_id')]['labels'].append(label)
+    for row in _select_in(cursor, '''
+        SELECT * FROM labels WHERE board_id = ? AND id IN ({ids})
+    ''', (board_id,), ids_by_type['label']):
+        loaded['label'][row['id']] = dict(row)
+    for row in _select_in(cursor, '''
+        SELECT m.*, bm.role, bm.joined_at FROM members m
+        JOIN board_members bm ON m.id = bm.member_id
+        WHERE bm.board_id = ? AND m.id IN ({ids})
+    ''', (board_id,), ids_by_type['member']):
+        loaded['member'][row['id']] = dict(row)
+    return loaded
+
+# Delta sync: các list/card/label/member được tạo, sửa, xóa sau cursor `since`.
+# Không có since, since không hợp lệ hoặc change log đã bị cắt qua since thì trả snapshot đầy đủ
+@app.route('/api/boards/<board_id>/changes', methods=['GET'])
+def get_board_changes(board_id):
+    since = request.args.get('since', type=int)
+    conn = get_db_connection()
+    # Cursor và dữ liệu phải cùng một snapshot
+    conn.execute('BEGIN')
+    cursor = conn.cursor()
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+    row = cursor.fetchone()
+    latest = row['seq'] if row else 0
+    cursor.execute('SELECT MIN(seq) FROM change_log')
+    first_seq = cursor.fetchone()[0] or latest + 1
+    if since is None or since < 0 or since > latest or since + 1 < first_seq:
+        board_data = assemble_board(cursor, board_id)
+        conn.close()
+        if not board_data:
+            return jsonify({'error': 'Board not found'}), 404
+        return jsonify({'cursor': latest, 'snapshot': board_data})
+    cursor.execute('SELECT 1 FROM boards WHERE id = ?', (board_id,))
+    if not cursor.fetchone():
+        conn.close()
+        return jsonify({'error': 'Board not found'}), 404
+    cursor.execute('''
+        SELECT entity_type, entity_id, action FROM change_log
+        WHERE board_id = ? AND seq > ? AND seq <= ?
+        ORDER BY seq
+    ''', (board_id, since, latest))
+    # Gộp các thay đổi của cùng một entity, chỉ cần biết nó có được tạo mới sau since không
+    created_since = {}
+    for change in cursor.fetchall():
+        key = (change['entity_type'], change['entity_id'])
+        if key not in created_since:
+            created_since[key] = change['action'] == 'create'
+    ids_by_type = {entity_type: [] for entity_type in CHANGE_ENTITY_TYPES}
+    for entity_type, entity_id in created_since:
+        ids_by_type[entity_type].append(entity_id)
+    current = load_changed_entities(cursor, board_id, ids_by_type)
     conn.close()
-    return jsonify(board_data)
+    changes = {f'{entity_type}s': {'created': [], 'updated': [], 'deleted': []}
+               for entity_type in CHANGE_ENTITY_TYPES if entity_type != 'board'}
+    result = {'cursor': latest, 'board': current['board'].get(board_id)}
+    for (entity_type, entity_id), created in created_since.items():
+        if entity_type == 'board':
+            continue
+        bucket = changes[f'{entity_type}s']
+        entity = current[entity_type].get(entity_id)
+        if entity is None:
+            # Tạo rồi xóa trong cùng khoảng thì client không cần biết
+            if not created:
+                bucket['deleted'].append(entity_id)
+        elif created:
+            bucket['created'].append(entity)
+        else:
+            bucket['updated'].append(entity)
+    result.update(changes)
+    return jsonify(result)
 
 @app.route('/api/boards/<board_id>', methods=['PUT'])
 def update_board(board_id):
@@ -609,6 +1882,8 @@ def update_board(board_id):
         WHERE id = ?
     ''', (data['title'], data.get('description'), data.get('icon'),
           datetime.now().isoformat(), board_id))
+    bump_board_version(cursor, board_id)
+    record_change(cursor, board_id, 'board', board_id)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Board updated successfully'})
@@ -618,100 +1893,118 @@ def delete_board(board_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('DELETE FROM boards WHERE id = ?', (board_id,))
+    bump_board_version(cursor, board_id)
+    invalidate_board_permissions(cursor, board_id)
+    record_change(cursor, board_id, 'board', board_id, 'delete')
     conn.commit()
     conn.close()
     return jsonify({'message': 'Board deleted successfully'})
 
 # List API endpoints
-@app.route('/api/boards/<board_id>/lists', methods=['POST'])
-def create_list(board_id):
-    data = request.get_json()
+def op_create_list(cursor, board_id, data):
     if not data or not data.get('title'):
-        return jsonify({'error': 'List title is required'}), 400
+        raise OperationError('List title is required')
     list_id = generate_id()
-    conn = get_db_connection()
-    cursor = conn.cursor()
     cursor.execute('''
         INSERT INTO lists (id, board_id, title, position)
         VALUES (?, ?, ?, ?)
     ''', (list_id, board_id, data['title'], data.get('position', 0)))
-    conn.commit()
-    conn.close()
-    update_board_activity(board_id)
-    return jsonify({'id': list_id, 'message': 'List created successfully'}), 201
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'list', list_id, 'create')
+    return {'id': list_id, 'message': 'List created successfully'}
 
-@app.route('/api/lists/<list_id>', methods=['PUT'])
-def update_list(list_id):
-    data = request.get_json()
+def op_update_list(cursor, list_id, data):
     if not data or not data.get('title'):
-        return jsonify({'error': 'List title is required'}), 400
-    conn = get_db_connection()
-    cursor = conn.cursor()
+        raise OperationError('List title is required')
     # Get board_id for activity update
     cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
-    board_id = cursor.fetchone()[0]
+    result = cursor.fetchone()
+    if not result:
+        raise OperationError('List not found', 404)
     cursor.execute('''
         UPDATE lists 
         SET title = ?, position = ?
         WHERE id = ?
     ''', (data['title'], data.get('position', 0), list_id))
-    conn.commit()
-    conn.close()
-    update_board_activity(board_id)
-    return jsonify({'message': 'List updated successfully'})
+    touch_board(cursor, result['board_id'])
+    record_change(cursor, result['board_id'], 'list', list_id)
+    return {'message': 'List updated successfully'}
 
-@app.route('/api/lists/<list_id>', methods=['DELETE'])
-def delete_list(list_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def op_delete_list(cursor, list_id, data=None):
     # Get board_id for activity update
     cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
     result = cursor.fetchone()
+    if not result:
+        raise OperationError('List not found', 404)
+    cursor.execute('DELETE FROM lists WHERE id = ?', (list_id,))
+    touch_board(cursor, result['board_id'])
+    # Card của list cũng biến khỏi board
+    record_change(cursor, result['board_id'], 'list', list_id, 'delete')
+    record_changes(cursor, result['board_id'], 'card', _list_card_ids(cursor, list_id))
+    return {'message': 'List deleted successfully'}
+
+def _set_list_archived(cursor, list_id, archived):
+    cursor.execute('UPDATE lists SET archived = ? WHERE id = ?', (archived, list_id))
+    cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
+    result = cursor.fetchone()
     if result:
-        board_id = result[0]
-        cursor.execute('DELETE FROM lists WHERE id = ?', (list_id,))
-        conn.commit()
-        conn.close()
-        update_board_activity(board_id)
-        return jsonify({'message': 'List deleted successfully'})
-    
-    conn.close()
-    return jsonify({'error': 'List not found'}), 404
+        touch_board(cursor, result['board_id'])
+        record_change(cursor, result['board_id'], 'list', list_id)
+        record_changes(cursor, result['board_id'], 'card', _list_card_ids(cursor, list_id))
+
+def op_archive_list(cursor, list_id, data=None):
+    _set_list_archived(cursor, list_id, 1)
+    return {'message': 'List archived successfully'}
+
+def op_restore_list(cursor, list_id, data=None):
+    _set_list_archived(cursor, list_id, 0)
+    return {'message': 'List restored successfully'}
+
+@app.route('/api/boards/<board_id>/lists', methods=['POST'])
+def create_list(board_id):
+    return run_operation(op_create_list, board_id, request.get_json(), status=201)
+
+@app.route('/api/lists/<list_id>', methods=['PUT'])
+def update_list(list_id):
+    return run_operation(op_update_list, list_id, request.get_json())
+
+@app.route('/api/lists/<list_id>', methods=['DELETE'])
+def delete_list(list_id):
+    return run_operation(op_delete_list, list_id)
 
 @app.route('/api/lists/<list_id>/archive', methods=['PUT'])
 def archive_list(list_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE lists SET archived = 1 WHERE id = ?', (list_id,))
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'List archived successfully'})
+    return run_operation(op_archive_list, list_id)
 
 @app.route('/api/lists/<list_id>/restore', methods=['PUT'])
 def restore_list(list_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE lists SET archived = 0 WHERE id = ?', (list_id,))
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'List restored successfully'})
+    return run_operation(op_restore_list, list_id)
 
 # Card API endpoints
-@app.route('/api/lists/<list_id>/cards', methods=['POST'])
-def create_card(list_id):
-    data = request.get_json()
+# Ghi đè toàn bộ checklist của card (dùng khi tạo/cập nhật cả card)
+def replace_checklist(cursor, card_id, items):
+    cursor.execute('DELETE FROM checklist_items WHERE card_id = ?', (card_id,))
+    cursor.executemany('''
+        INSERT OR REPLACE INTO checklist_items (id, card_id, text, checked, position)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (item.get('id') or generate_id(), card_id, item.get('text') or '', 1 if item.get('checked') else 0, position)
+        for position, item in enumerate(items or []) if isinstance(item, dict)
+    ])
+
+def op_create_card(cursor, list_id, data):
     if not data or not data.get('title'):
-        return jsonify({'error': 'Card title is required'}), 400
+        raise OperationError('Card title is required')
     card_id = generate_id()
-    conn = get_db_connection()
-    cursor = conn.cursor()
     # Get board_id
     cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
-    board_id = cursor.fetchone()[0]
+    result = cursor.fetchone()
+    if not result:
+        raise OperationError('List not found', 404)
+    board_id = result['board_id']
     cursor.execute('''
-        INSERT INTO cards (id, board_id, list_id, title, description, position, due_date, type, checklist_items, start_date, end_date, dependencies, status, member)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO cards (id, board_id, list_id, title, description, position, due_date, type, start_date, end_date, dependencies, status, member)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (
         card_id,
         board_id,
@@ -721,46 +2014,32 @@ def create_card(list_id):
         data.get('position', 0),
         data.get('due_date'),
         data.get('type', 'normal'),
-        json.dumps(data.get('checklist_items', [])),
         data.get('start_date'),
         data.get('end_date'),
         data.get('dependencies'),
         data.get('status', 'todo'),
         data.get('member')
     ))
-    conn.commit()
-    conn.close()
-    update_board_activity(board_id)
-    return jsonify({'id': card_id, 'message': 'Card created successfully'}), 201
-
-@app.route('/api/cards/<card_id>', methods=['OPTIONS'])
-def options_card(card_id):
-    response = make_response()
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-    return response, 200
+    replace_checklist(cursor, card_id, data.get('checklist_items', []))
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'card', card_id, 'create')
+    return {'id': card_id, 'message': 'Card created successfully'}
 
-@app.route('/api/cards/<card_id>', methods=['PUT'])
-def update_card(card_id):
-    data = request.get_json()
+def op_update_card(cursor, card_id, data):
     if not data or not data.get('title'):
-        return make_response(jsonify({'error': 'Card title is required'}), 400)
+        raise OperationError('Card title is required')
     list_id = data.get('list_id') or data.get('listId')
     if not list_id:
-        return make_response(jsonify({'error': 'list_id is required'}), 400)
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
+        raise OperationError('list_id is required')
+    cursor.execute('SELECT board_id, start_date, end_date FROM cards WHERE id = ?', (card_id,))
     board_id_row = cursor.fetchone()
     if not board_id_row:
-        conn.close()
-        return make_response(jsonify({'error': 'Card not found'}), 404)
+        raise OperationError('Card not found', 404)
     board_id = board_id_row[0]
+    check_dependency_cycle(cursor, board_id, card_id, data.get('dependencies'))
     cursor.execute('''
         UPDATE cards 
-        SET title = ?, description = ?, position = ?, due_date = ?, list_id = ?, type = ?, checklist_items = ?, start_date = ?, end_date = ?, dependencies = ?, status = ?, member = ?
+        SET title = ?, description = ?, position = ?, due_date = ?, list_id = ?, type = ?, start_date = ?, end_date = ?, dependencies = ?, status = ?, member = ?
         WHERE id = ?
     ''', (
         data['title'],
@@ -769,7 +2048,6 @@ def update_card(card_id):
         data.get('due_date'),
         list_id,
         data.get('type', 'normal'),
-        json.dumps(data.get('checklist_items', [])),
         data.get('start_date'),
         data.get('end_date'),
         data.get('dependencies'),
@@ -777,78 +2055,69 @@ def update_card(card_id):
         data.get('member'),
         card_id
     ))
+    replace_checklist(cursor, card_id, data.get('checklist_items', []))
     # --- XỬ LÝ LABELS ---
     labels = data.get('labels')
     if labels is not None:
         # Xóa hết nhãn cũ
         cursor.execute('DELETE FROM card_labels WHERE card_id = ?', (card_id,))
         # Thêm lại nhãn mới
-        for label_id in labels:
-            cursor.execute('INSERT INTO card_labels (card_id, label_id) VALUES (?, ?)', (card_id, label_id))
-    conn.commit()
-    conn.close()
-    update_board_activity(board_id)
-    response = make_response(jsonify({'message': 'Card updated successfully'}))
-    response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-    return response
+        cursor.executemany(
+            'INSERT INTO card_labels (card_id, label_id) VALUES (?, ?)',
+            [(card_id, label_id) for label_id in labels]
+        )
+    result = {'message': 'Card updated successfully'}
+    # Đổi ngày thì dời lịch các card phụ thuộc trong cùng transaction
+    if (data.get('start_date'), data.get('end_date')) != (board_id_row['start_date'], board_id_row['end_date']):
+        result['shifted_cards'] = propagate_schedule(
+            cursor, board_id, card_id, data.get('start_date'), data.get('end_date')
+        )
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'card', card_id)
+    return result
 
-@app.route('/api/cards/<card_id>', methods=['DELETE'])
-def delete_card(card_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def op_delete_card(cursor, card_id, data=None):
     # Get board_id for activity update
     cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
     result = cursor.fetchone()
-    if result:
-        board_id = result[0]
-        cursor.execute('DELETE FROM cards WHERE id = ?', (card_id,))
-        conn.commit()
-        conn.close()
-        update_board_activity(board_id)
-        return jsonify({'message': 'Card deleted successfully'})
-    
-    conn.close()
-    return jsonify({'error': 'Card not found'}), 404
+    if not result:
+        raise OperationError('Card not found', 404)
+    cursor.execute('DELETE FROM cards WHERE id = ?', (card_id,))
+    cursor.execute('DELETE FROM checklist_items WHERE card_id = ?', (card_id,))
+    touch_board(cursor, result['board_id'])
+    record_change(cursor, result['board_id'], 'card', card_id, 'delete')
+    return {'message': 'Card deleted successfully'}
 
-@app.route('/api/cards/<card_id>/archive', methods=['PUT'])
-def archive_card(card_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE cards SET archived = 1 WHERE id = ?', (card_id,))
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'Card archived successfully'})
+def _set_card_archived(cursor, card_id, archived):
+    cursor.execute('UPDATE cards SET archived = ? WHERE id = ?', (archived, card_id))
+    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
+    result = cursor.fetchone()
+    if result:
+        touch_board(cursor, result['board_id'])
+        record_change(cursor, result['board_id'], 'card', card_id)
 
-@app.route('/api/cards/<card_id>/restore', methods=['PUT'])
-def restore_card(card_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE cards SET archived = 0 WHERE id = ?', (card_id,))
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'Card restored successfully'})
+def op_archive_card(cursor, card_id, data=None):
+    _set_card_archived(cursor, card_id, 1)
+    return {'message': 'Card archived successfully'}
 
-@app.route('/api/cards/<card_id>/copy', methods=['POST'])
-def copy_card(card_id):
-    data = request.get_json()
+def op_restore_card(cursor, card_id, data=None):
+    _set_card_archived(cursor, card_id, 0)
+    return {'message': 'Card restored successfully'}
+
+def op_copy_card(cursor, card_id, data):
+    data = data or {}
     dest_list_id = data.get('list_id')
     dest_board_id = data.get('board_id')
     if not dest_list_id or not dest_board_id:
-        return jsonify({'error': 'list_id and board_id are required'}), 400
-    conn = get_db_connection()
-    cursor = conn.cursor()
+        raise OperationError('list_id and board_id are required')
     cursor.execute('SELECT * FROM cards WHERE id = ?', (card_id,))
     card = cursor.fetchone()
     if not card:
-        conn.close()
-        return jsonify({'error': 'Card not found'}), 404
+        raise OperationError('Card not found', 404)
     new_card_id = generate_id()
     cursor.execute('''
-        INSERT INTO cards (id, board_id, list_id, title, description, position, due_date, type, checklist_items, start_date, end_date, member, created_at, archived)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO cards (id, board_id, list_id, title, description, position, due_date, type, start_date, end_date, member, created_at, archived)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', (
         new_card_id,
         dest_board_id,
@@ -858,99 +2127,136 @@ def copy_card(card_id):
         card['position'],
         card['due_date'],
         card['type'],
-        card['checklist_items'],
         card['start_date'],
         card['end_date'],
         card['member'],
         datetime.now().isoformat(),
         0
     ))
-    # Copy labels
-    cursor.execute('SELECT label_id FROM card_labels WHERE card_id = ?', (card_id,))
-    for row in cursor.fetchall():
-        cursor.execute('INSERT INTO card_labels (card_id, label_id) VALUES (?, ?)', (new_card_id, row['label_id']))
-    conn.commit()
-    conn.close()
-    return jsonify({'id': new_card_id, 'message': 'Card copied successfully'})
+    # Copy labels và checklist
+    cursor.execute('''
+        INSERT INTO card_labels (card_id, label_id)
+        SELECT ?, label_id FROM card_labels WHERE card_id = ?
+    ''', (new_card_id, card_id))
+    cursor.execute('''
+        INSERT INTO checklist_items (id, card_id, text, checked, position)
+        SELECT id, ?, text, checked, position FROM checklist_items WHERE card_id = ?
+    ''', (new_card_id, card_id))
+    touch_board(cursor, dest_board_id)
+    record_change(cursor, dest_board_id, 'card', new_card_id, 'create')
+    return {'id': new_card_id, 'message': 'Card copied successfully'}
 
-@app.route('/api/cards/<card_id>/move', methods=['PUT'])
-def move_card(card_id):
-    data = request.get_json()
+def op_move_card(cursor, card_id, data):
+    data = data or {}
     dest_list_id = data.get('list_id')
     dest_board_id = data.get('board_id')
     if not dest_list_id or not dest_board_id:
-        return jsonify({'error': 'list_id and board_id are required'}), 400
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM cards WHERE id = ?', (card_id,))
+        raise OperationError('list_id and board_id are required')
+    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
     card = cursor.fetchone()
     if not card:
-        conn.close()
-        return jsonify({'error': 'Card not found'}), 404
+        raise OperationError('Card not found', 404)
     cursor.execute('''
         UPDATE cards SET list_id = ?, board_id = ? WHERE id = ?
     ''', (dest_list_id, dest_board_id, card_id))
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'Card moved successfully'})
+    touch_board(cursor, dest_board_id)
+    record_change(cursor, dest_board_id, 'card', card_id)
+    if card['board_id'] != dest_board_id:
+        touch_board(cursor, card['board_id'])
+        record_change(cursor, card['board_id'], 'card', card_id)
+    return {'message': 'Card moved successfully'}
+
+@app.route('/api/lists/<list_id>/cards', methods=['POST'])
+def create_card(list_id):
+    return run_operation(op_create_card, list_id, request.get_json(), status=201)
+
+@app.route('/api/cards/<card_id>', methods=['OPTIONS'])
+def options_card(card_id):
+    response = make_response()
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    return response, 200
+
+@app.route('/api/cards/<card_id>', methods=['PUT'])
+def update_card(card_id):
+    response = make_response(run_operation(op_update_card, card_id, request.get_json()))
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+    return response
+
+@app.route('/api/cards/<card_id>', methods=['DELETE'])
+def delete_card(card_id):
+    return run_operation(op_delete_card, card_id)
+
+@app.route('/api/cards/<card_id>/archive', methods=['PUT'])
+def archive_card(card_id):
+    return run_operation(op_archive_card, card_id)
+
+@app.route('/api/cards/<card_id>/restore', methods=['PUT'])
+def restore_card(card_id):
+    return run_operation(op_restore_card, card_id)
+
+@app.route('/api/cards/<card_id>/copy', methods=['POST'])
+def copy_card(card_id):
+    return run_operation(op_copy_card, card_id, request.get_json())
+
+@app.route('/api/cards/<card_id>/move', methods=['PUT'])
+def move_card(card_id):
+    return run_operation(op_move_card, card_id, request.get_json())
 
 # Label API endpoints
-@app.route('/api/boards/<board_id>/labels', methods=['POST'])
-def create_label(board_id):
-    data = request.get_json()
+def op_create_label(cursor, board_id, data):
     if not data or not data.get('title'):
-        return jsonify({'error': 'Label title is required'}), 400
+        raise OperationError('Label title is required')
     label_id = generate_id()
-    conn = get_db_connection()
-    cursor = conn.cursor()
     cursor.execute('''
         INSERT INTO labels (id, board_id, title, color)
         VALUES (?, ?, ?, ?)
     ''', (label_id, board_id, data['title'], data.get('color', '#808080')))
-    conn.commit()
-    conn.close()
-    update_board_activity(board_id)
-    return jsonify({'id': label_id, 'message': 'Label created successfully'}), 201
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'label', label_id, 'create')
+    return {'id': label_id, 'message': 'Label created successfully'}
 
-@app.route('/api/cards/<card_id>/labels/<label_id>', methods=['POST'])
-def add_label_to_card(card_id, label_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def op_add_label_to_card(cursor, card_id, label_id, data=None):
+    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
+    card = cursor.fetchone()
+    if not card:
+        raise OperationError('Card not found', 404)
     try:
         cursor.execute('''
             INSERT INTO card_labels (card_id, label_id)
             VALUES (?, ?)
         ''', (card_id, label_id))
-        conn.commit()
-        
-        # Update board activity
-        cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
-        board_id = cursor.fetchone()[0]
-        update_board_activity(board_id)
-        
-        conn.close()
-        return jsonify({'message': 'Label added to card successfully'})
     except sqlite3.IntegrityError:
-        conn.close()
-        return jsonify({'error': 'Label already exists on card'}), 400
+        raise OperationError('Label already exists on card')
+    touch_board(cursor, card['board_id'])
+    record_change(cursor, card['board_id'], 'card', card_id)
+    return {'message': 'Label added to card successfully'}
 
-@app.route('/api/cards/<card_id>/labels/<label_id>', methods=['DELETE'])
-def remove_label_from_card(card_id, label_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def op_remove_label_from_card(cursor, card_id, label_id, data=None):
+    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
+    card = cursor.fetchone()
+    if not card:
+        raise OperationError('Card not found', 404)
     cursor.execute('DELETE FROM card_labels WHERE card_id = ? AND label_id = ?', 
                    (card_id, label_id))
-    conn.commit()
-    
-    # Update board activity
-    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
-    board_id = cursor.fetchone()[0]
-    update_board_activity(board_id)
-    
-    conn.close()
-    return jsonify({'message': 'Label removed from card successfully'})
+    touch_board(cursor, card['board_id'])
+    record_change(cursor, card['board_id'], 'card', card_id)
+    return {'message': 'Label removed from card successfully'}
+
+@app.route('/api/boards/<board_id>/labels', methods=['POST'])
+def create_label(board_id):
+    return run_operation(op_create_label, board_id, request.get_json(), status=201)
+
+@app.route('/api/cards/<card_id>/labels/<label_id>', methods=['POST'])
+def add_label_to_card(card_id, label_id):
+    return run_operation(op_add_label_to_card, card_id, label_id)
+
+@app.route('/api/cards/<card_id>/labels/<label_id>', methods=['DELETE'])
+def remove_label_from_card(card_id, label_id):
+    return run_operation(op_remove_label_from_card, card_id, label_id)
 
 # Member API endpoints
 @app.route('/api/members', methods=['POST'])
@@ -961,10 +2267,16 @@ def create_member():
     member_id = generate_id()
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO members (id, name, email, avatar)
-        VALUES (?, ?, ?, ?)
-    ''', (member_id, data['name'], data.get('email'), data.get('avatar')))
+    try:
+        cursor.execute('''
+            INSERT INTO members (id, name, email, avatar)
+            VALUES (?, ?, ?, ?)
+        ''', (member_id, data['name'], data.get('email'), data.get('avatar')))
+    except sqlite3.IntegrityError:
+        conn.close()
+        return jsonify({'error': 'Member with this email already exists'}), 400
+    if data.get('email'):
+        invalidate_member_permissions(cursor, data['email'])
     conn.commit()
     conn.close()
     return jsonify({'id': member_id, 'message': 'Member created successfully'}), 201
@@ -976,10 +2288,11 @@ def remove_member_from_board(board_id, member_id):
     
     cursor.execute('DELETE FROM board_members WHERE board_id = ? AND member_id = ?', 
                    (board_id, member_id))
+    touch_board(cursor, board_id)
+    invalidate_board_permissions(cursor, board_id)
+    record_change(cursor, board_id, 'member', member_id, 'delete')
     conn.commit()
     conn.close()
-    
-    update_board_activity(board_id)
     return jsonify({'message': 'Member removed from board successfully'})
 
 @app.route('/api/members/by-email')
@@ -999,10 +2312,265 @@ def get_member_by_email():
 def get_all_members():
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM members')
-    members = [dict(row) for row in cursor.fetchall()]
+    try:
+        members, next_cursor = fetch_page(cursor, 'members', 'm', None, (), [('m.rowid', 'ASC')])
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
     conn.close()
-    return jsonify(members)
+    return page_response(members, next_cursor)
+
+# Vị trí của list/card là số nguyên thưa cách nhau POSITION_STEP (giống
+# _positionStep ở board.component.ts). Kéo thả một phần tử chỉ ghi lại đúng
+# một dòng với vị trí nằm giữa hai phần tử lân cận. Khi khoảng trống quanh vị trí
+# mới nhỏ hơn POSITION_MIN_GAP, list/board được đánh số lại ở background sau khi
+# request commit (PositionRebalancer).
+POSITION_STEP = 65536
+POSITION_MIN_GAP = POSITION_STEP // 1024
+POSITION_REBALANCE_DELAY = float(os.environ.get('SCRUMBOARD_REBALANCE_DELAY', '1.0'))
+
+# Bảng -> cột xác định phạm vi sắp xếp
+POSITION_SCOPES = {'lists': 'board_id', 'cards': 'list_id'}
+
+def _position_of(cursor, table, scope_id, item_id):
+    scope_column = POSITION_SCOPES[table]
+    cursor.execute(f'SELECT position FROM {table} WHERE id = ? AND {scope_column} = ?', (item_id, scope_id))
+    row = cursor.fetchone()
+    if not row:
+        raise ValueError(f'Neighbour item not found: {item_id}')
+    return row['position']
+
+def _neighbour_positions(cursor, table, scope_id, item_id, before_id=None, after_id=None, index=None):
+    scope_column = POSITION_SCOPES[table]
+    if after_id and before_id:
+        return _position_of(cursor, table, scope_id, after_id), _position_of(cursor, table, scope_id, before_id)
+    if after_id:
+        prev = _position_of(cursor, table, scope_id, after_id)
+        cursor.execute(f'''
+            SELECT position FROM {table}
+            WHERE {scope_column} = ? AND id != ? AND id != ? AND position >= ?
+            ORDER BY position, rowid LIMIT 1
+        ''', (scope_id, item_id, after_id, prev))
+        row = cursor.fetchone()
+        return prev, row['position'] if row else None
+    if before_id:
+        nxt = _position_of(cursor, table, scope_id, before_id)
+        cursor.execute(f'''
+            SELECT position FROM {table}
+            WHERE {scope_column} = ? AND id != ? AND id != ? AND position <= ?
+            ORDER BY position DESC, rowid DESC LIMIT 1
+        ''', (scope_id, item_id, before_id, nxt))
+        row = cursor.fetchone()
+        return row['position'] if row else None, nxt
+    # Theo index: lấy hai phần tử đứng ở vị trí index - 1 và index
+    index = index or 0
+    cursor.execute(f'''
+        SELECT position FROM {table}
+        WHERE {scope_column} = ? AND id != ?
+        ORDER BY position, rowid LIMIT 2 OFFSET ?
+    ''', (scope_id, item_id, max(index - 1, 0)))
+    positions = [row['position'] for row in cursor.fetchall()]
+    if index == 0:
+        return None, positions[0] if positions else None
+    if not positions:
+        cursor.execute(f'SELECT MAX(position) FROM {table} WHERE {scope_column} = ? AND id != ?', (scope_id, item_id))
+        return cursor.fetchone()[0], None
+    return positions[0], positions[1] if len(positions) > 1 else None
+
+def _position_between(prev, nxt):
+    if prev is None and nxt is None:
+        return POSITION_STEP
+    if prev is None:
+        return int(nxt) // 2 if nxt >= 2 else None
+    if nxt is None:
+        return int(prev) + POSITION_STEP
+    prev, nxt = int(prev), int(nxt)
+    return (prev + nxt) // 2 if nxt - prev >= 2 else None
+
+def rebalance_positions(cursor, table, scope_id, exclude_id=None):
+    scope_column = POSITION_SCOPES[table]
+    cursor.execute(f'''
+        SELECT id FROM {table}
+        WHERE {scope_column} = ? AND id != ?
+        ORDER BY position, rowid
+    ''', (scope_id, exclude_id or ''))
+    ids = [row['id'] for row in cursor.fetchall()]
+    cursor.executemany(
+        f'UPDATE {table} SET position = ? WHERE id = ?',
+        [((index + 1) * POSITION_STEP, item_id) for index, item_id in enumerate(ids)]
+    )
+    return ids
+
+# Đánh số lại list/board ở background: request chỉ đăng ký (table, scope) khi commit,
+# thread ghi chờ POSITION_REBALANCE_DELAY giây rồi đánh số lại các scope đã đăng ký
+# trong một transaction, đổi version board và ghi change log cho các dòng bị đổi vị trí
+class PositionRebalancer:
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pending = set()   # (table, scope_id) chờ đánh số lại
+        self.stats = {
+            'scheduled': 0,
+            'inline': 0,
+            'rebalanced_scopes': 0,
+            'rewritten': 0,
+            'flush_errors': 0
+        }
+
+    def schedule(self, cursor, table, scope_id):
+        cursor.connection.on_commit(('rebalance', table, scope_id), lambda: self._enqueue(table, scope_id))
+
+    def count_inline(self):
+        with self._lock:
+            self.stats['inline'] += 1
+
+    def _enqueue(self, table, scope_id):
+        with self._lock:
+            self._pending.add((table, scope_id))
+            self.stats['scheduled'] += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='position-rebalancer', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            time.sleep(self.delay)
+            try:
+                self.flush()
+            except Exception:
+                app.logger.exception('Rebalancing positions failed, retrying')
+                self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending = sorted(self._pending)
+            self._pending.clear()
+        conn = get_db_connection()
+        rewritten = 0
+        try:
+            cursor = conn.cursor()
+            # Lấy write lock trước khi đọc thứ tự để không lẫn với lần kéo thả đang ghi
+            cursor.execute('BEGIN IMMEDIATE')
+            for table, scope_id in pending:
+                if table == 'lists':
+                    board_id = scope_id
+                else:
+                    cursor.execute('SELECT board_id FROM lists WHERE id = ?', (scope_id,))
+                    row = cursor.fetchone()
+                    if not row:
+                        continue
+                    board_id = row['board_id']
+                ids = rebalance_positions(cursor, table, scope_id)
+                if ids:
+                    bump_board_version(cursor, board_id)
+                    record_changes(cursor, board_id, table[:-1], ids)
+                    rewritten += len(ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            with self._lock:
+                self._pending.update(pending)
+                self.stats['flush_errors'] += 1
+            raise
+        finally:
+            release_db_connection()
+        with self._lock:
+            self.stats['rebalanced_scopes'] += len(pending)
+            self.stats['rewritten'] += rewritten
+        return len(pending)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        return stats
+
+position_rebalancer = PositionRebalancer(POSITION_REBALANCE_DELAY)
+
+# Tính vị trí mới cho item khi đặt nó sau after_id, trước before_id hoặc tại index.
+# Trả về (position, id các dòng bị đánh số lại). Khoảng trống sắp hết thì hẹn đánh số
+# lại ở background; chỉ khi đã hết hẳn (chèn liên tục vào cùng một chỗ trước khi
+# background kịp chạy) mới đánh số lại ngay trong transaction của request, vì vị trí
+# mới phải được tính trên thứ tự đã đánh số lại
+def place_item(cursor, table, item_id, scope_id, before_id=None, after_id=None, index=None):
+    prev, nxt = _neighbour_positions(cursor, table, scope_id, item_id, before_id, after_id, index)
+    if prev is not None and nxt is not None and prev > nxt:
+        raise ValueError('after_id must be positioned before before_id')
+    position = _position_between(prev, nxt)
+    rebalanced = []
+    if position is None:
+        rebalanced = rebalance_positions(cursor, table, scope_id, exclude_id=item_id)
+        position_rebalancer.count_inline()
+        prev, nxt = _neighbour_positions(cursor, table, scope_id, item_id, before_id, after_id, index)
+        position = _position_between(prev, nxt)
+    elif position - (prev or 0) < POSITION_MIN_GAP or (nxt is not None and nxt - position < POSITION_MIN_GAP):
+        position_rebalancer.schedule(cursor, table, scope_id)
+    return position, rebalanced
+
+def _placement_args(data):
+    index = data.get('index')
+    if index is not None and (not isinstance(index, int) or isinstance(index, bool) or index < 0):
+        raise ValueError('index must be a non-negative integer')
+    return data.get('before_id'), data.get('after_id'), index
+
+def op_move_list_position(cursor, list_id, data):
+    data = data or {}
+    cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise OperationError('List not found', 404)
+    board_id = row['board_id']
+    try:
+        before_id, after_id, index = _placement_args(data)
+        position, rebalanced = place_item(cursor, 'lists', list_id, board_id, before_id, after_id, index)
+    except ValueError as e:
+        raise OperationError(str(e))
+    cursor.execute('UPDATE lists SET position = ? WHERE id = ?', (position, list_id))
+    touch_board(cursor, board_id)
+    record_changes(cursor, board_id, 'list', [list_id] + rebalanced)
+    return {'id': list_id, 'position': position, 'rebalanced': bool(rebalanced)}
+
+def op_move_card_position(cursor, card_id, data):
+    data = data or {}
+    cursor.execute('SELECT list_id, board_id FROM cards WHERE id = ?', (card_id,))
+    card = cursor.fetchone()
+    if not card:
+        raise OperationError('Card not found', 404)
+    list_id = data.get('list_id') or card['list_id']
+    cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
+    dest_list = cursor.fetchone()
+    if not dest_list:
+        raise OperationError('List not found', 404)
+    board_id = dest_list['board_id']
+    try:
+        before_id, after_id, index = _placement_args(data)
+        position, rebalanced = place_item(cursor, 'cards', card_id, list_id, before_id, after_id, index)
+    except ValueError as e:
+        raise OperationError(str(e))
+    cursor.execute('''
+        UPDATE cards SET list_id = ?, board_id = ?, position = ? WHERE id = ?
+    ''', (list_id, board_id, position, card_id))
+    touch_board(cursor, board_id)
+    record_changes(cursor, board_id, 'card', [card_id] + rebalanced)
+    if card['board_id'] != board_id:
+        touch_board(cursor, card['board_id'])
+        record_change(cursor, card['board_id'], 'card', card_id)
+    return {'id': card_id, 'list_id': list_id, 'position': position, 'rebalanced': bool(rebalanced)}
+
+@app.route('/api/lists/<list_id>/position', methods=['PUT'])
+def move_list_position(list_id):
+    return run_operation(op_move_list_position, list_id, request.get_json())
+
+@app.route('/api/cards/<card_id>/position', methods=['PUT'])
+def move_card_position(card_id):
+    return run_operation(op_move_card_position, card_id, request.get_json())
 
 @app.route('/api/boards/<board_id>/lists/reorder', methods=['PUT'])
 def reorder_lists(board_id):
@@ -1012,8 +2580,12 @@ def reorder_lists(board_id):
         return jsonify({'error': 'list_ids must be a list'}), 400
     conn = get_db_connection()
     cursor = conn.cursor()
-    for position, list_id in enumerate(list_ids):
-        cursor.execute('UPDATE lists SET position = ? WHERE id = ? AND board_id = ?', (position, list_id, board_id))
+    cursor.executemany(
+        'UPDATE lists SET position = ? WHERE id = ? AND board_id = ?',
+        [((index + 1) * POSITION_STEP, list_id, board_id) for index, list_id in enumerate(list_ids)]
+    )
+    touch_board(cursor, board_id)
+    record_changes(cursor, board_id, 'list', list_ids)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Lists reordered successfully'})
@@ -1026,86 +2598,449 @@ def reorder_cards(list_id):
         return jsonify({'error': 'card_ids must be a list'}), 400
     conn = get_db_connection()
     cursor = conn.cursor()
-    for position, card_id in enumerate(card_ids):
-        cursor.execute('UPDATE cards SET position = ?, list_id = ? WHERE id = ?', (position, list_id, card_id))
+    cursor.executemany(
+        'UPDATE cards SET position = ?, list_id = ? WHERE id = ?',
+        [((index + 1) * POSITION_STEP, list_id, card_id) for index, card_id in enumerate(card_ids)]
+    )
+    cursor.execute('SELECT board_id FROM lists WHERE id = ?', (list_id,))
+    result = cursor.fetchone()
+    if result:
+        touch_board(cursor, result['board_id'])
+        record_changes(cursor, result['board_id'], 'card', card_ids)
     conn.commit()
     conn.close()
     return jsonify({'message': 'Cards reordered successfully'})
 
-@app.route('/api/cards/<card_id>/checklist', methods=['POST'])
-def add_checklist_item(card_id):
-    data = request.get_json()
-    text = data.get('text')
-    if not text:
-        return jsonify({'error': 'Checklist item text is required'}), 400
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT checklist_items FROM cards WHERE id = ?', (card_id,))
+def _checklist_card_board(cursor, card_id):
+    cursor.execute('SELECT board_id FROM cards WHERE id = ?', (card_id,))
     row = cursor.fetchone()
     if not row:
-        conn.close()
-        return jsonify({'error': 'Card not found'}), 404
-    checklist_items = json.loads(row['checklist_items']) if row['checklist_items'] else []
+        raise OperationError('Card not found', 404)
+    return row['board_id']
+
+def op_add_checklist_item(cursor, card_id, data):
+    text = (data or {}).get('text')
+    if not text:
+        raise OperationError('Checklist item text is required')
+    board_id = _checklist_card_board(cursor, card_id)
     item_id = generate_id()
-    checklist_items.append({'id': item_id, 'text': text, 'checked': False})
-    cursor.execute('UPDATE cards SET checklist_items = ? WHERE id = ?', (json.dumps(checklist_items), card_id))
-    conn.commit()
-    conn.close()
-    return jsonify({'id': item_id, 'message': 'Checklist item added'})
+    cursor.execute('''
+        INSERT INTO checklist_items (id, card_id, text, checked, position)
+        VALUES (?, ?, ?, 0, (SELECT COALESCE(MAX(position), -1) + 1 FROM checklist_items WHERE card_id = ?))
+    ''', (item_id, card_id, text, card_id))
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'card', card_id)
+    return {'id': item_id, 'message': 'Checklist item added'}
 
-@app.route('/api/cards/<card_id>/checklist/<item_id>', methods=['PUT'])
-def update_checklist_item(card_id, item_id):
-    data = request.get_json()
+def op_update_checklist_item(cursor, card_id, item_id, data):
+    data = data or {}
     text = data.get('text')
     checked = data.get('checked')
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT checklist_items FROM cards WHERE id = ?', (card_id,))
-    row = cursor.fetchone()
-    if not row:
-        conn.close()
-        return jsonify({'error': 'Card not found'}), 404
-    checklist_items = json.loads(row['checklist_items']) if row['checklist_items'] else []
-    updated = False
-    for item in checklist_items:
-        if item['id'] == item_id:
-            if text is not None:
-                item['text'] = text
-            if checked is not None:
-                item['checked'] = checked
-            updated = True
-            break
-    if not updated:
-        conn.close()
-        return jsonify({'error': 'Checklist item not found'}), 404
-    cursor.execute('UPDATE cards SET checklist_items = ? WHERE id = ?', (json.dumps(checklist_items), card_id))
-    conn.commit()
-    conn.close()
-    return jsonify({'message': 'Checklist item updated'})
+    board_id = _checklist_card_board(cursor, card_id)
+    cursor.execute('''
+        UPDATE checklist_items
+        SET text = COALESCE(?, text), checked = COALESCE(?, checked)
+        WHERE card_id = ? AND id = ?
+    ''', (text, None if checked is None else int(bool(checked)), card_id, item_id))
+    if cursor.rowcount == 0:
+        raise OperationError('Checklist item not found', 404)
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'card', card_id)
+    return {'message': 'Checklist item updated'}
+
+def op_delete_checklist_item(cursor, card_id, item_id, data=None):
+    board_id = _checklist_card_board(cursor, card_id)
+    cursor.execute('DELETE FROM checklist_items WHERE card_id = ? AND id = ?', (card_id, item_id))
+    if cursor.rowcount == 0:
+        raise OperationError('Checklist item not found', 404)
+    touch_board(cursor, board_id)
+    record_change(cursor, board_id, 'card', card_id)
+    return {'message': 'Checklist item deleted'}
+
+@app.route('/api/cards/<card_id>/checklist', methods=['POST'])
+def add_checklist_item(card_id):
+    return run_operation(op_add_checklist_item, card_id, request.get_json())
+
+@app.route('/api/cards/<card_id>/checklist/<item_id>', methods=['PUT'])
+def update_checklist_item(card_id, item_id):
+    return run_operation(op_update_checklist_item, card_id, item_id, request.get_json())
 
 @app.route('/api/cards/<card_id>/checklist/<item_id>', methods=['DELETE'])
 def delete_checklist_item(card_id, item_id):
+    return run_operation(op_delete_checklist_item, card_id, item_id)
+
+# Batch: chạy nhiều thao tác card/list/label/checklist theo thứ tự trong
+# một transaction. Giá trị dạng "$<n>" được thay bằng id do thao tác thứ n tạo ra.
+BATCH_MAX_OPERATIONS = 500
+
+# Tên thao tác -> (hàm, các khóa lấy từ operation làm tham số, status khi thành công)
+BATCH_OPERATIONS = {
+    'list.create': (op_create_list, ('board_id',), 201),
+    'list.update': (op_update_list, ('list_id',), 200),
+    'list.delete': (op_delete_list, ('list_id',), 200),
+    'list.archive': (op_archive_list, ('list_id',), 200),
+    'list.restore': (op_restore_list, ('list_id',), 200),
+    'list.position': (op_move_list_position, ('list_id',), 200),
+    'card.create': (op_create_card, ('list_id',), 201),
+    'card.update': (op_update_card, ('card_id',), 200),
+    'card.delete': (op_delete_card, ('card_id',), 200),
+    'card.archive': (op_archive_card, ('card_id',), 200),
+    'card.restore': (op_restore_card, ('card_id',), 200),
+    'card.copy': (op_copy_card, ('card_id',), 200),
+    'card.move': (op_move_card, ('card_id',), 200),
+    'card.position': (op_move_card_position, ('card_id',), 200),
+    'label.create': (op_create_label, ('board_id',), 201),
+    'card.label.add': (op_add_label_to_card, ('card_id', 'label_id'), 200),
+    'card.label.remove': (op_remove_label_from_card, ('card_id', 'label_id'), 200),
+    'checklist.add': (op_add_checklist_item, ('card_id',), 200),
+    'checklist.update': (op_update_checklist_item, ('card_id', 'item_id'), 200),
+    'checklist.delete': (op_delete_checklist_item, ('card_id', 'item_id'), 200),
+}
+
+def _resolve_batch_ref(value, results):
+    if isinstance(value, list):
+        return [_resolve_batch_ref(item, results) for item in value]
+    if not (isinstance(value, str) and value.startswith('$') and value[1:].isdigit()):
+        return value
+    ref = int(value[1:])
+    if ref >= len(results) or 'id' not in results[ref]['result']:
+        raise OperationError(f'Invalid reference {value}')
+    return results[ref]['result']['id']
+
+def _run_batch_operation(cursor, operation, results):
+    if not isinstance(operation, dict):
+        raise OperationError('Operation must be an object')
+    entry = BATCH_OPERATIONS.get(operation.get('op'))
+    if not entry:
+        raise OperationError(f"Unknown operation: {operation.get('op')}")
+    func, keys, status = entry
+    data = {key: _resolve_batch_ref(value, results) for key, value in operation.items()}
+    args = [data.get(key) for key in keys]
+    if not all(args):
+        raise OperationError(f"{', '.join(keys)} required for {operation['op']}")
+    return func(cursor, *args, data), status
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be an object with an operations list'}), 400
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}), 400
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT checklist_items FROM cards WHERE id = ?', (card_id,))
-    row = cursor.fetchone()
-    if not row:
-        conn.close()
-        return jsonify({'error': 'Card not found'}), 404
-    checklist_items = json.loads(row['checklist_items']) if row['checklist_items'] else []
-    new_items = [item for item in checklist_items if item['id'] != item_id]
-    if len(new_items) == len(checklist_items):
-        conn.close()
-        return jsonify({'error': 'Checklist item not found'}), 404
-    cursor.execute('UPDATE cards SET checklist_items = ? WHERE id = ?', (json.dumps(new_items), card_id))
+    results = []
+    for index, operation in enumerate(operations):
+        try:
+            result, status = _run_batch_operation(cursor, operation, results)
+        except OperationError as e:
+            # Một thao tác lỗi thì rollback toàn bộ batch
+            conn.close()
+            results.append({'index': index, 'op': operation.get('op') if isinstance(operation, dict) else None,
+                            'status': e.status, 'error': e.message})
+            return jsonify({'error': e.message, 'failed_index': index, 'results': results}), e.status
+        results.append({'index': index, 'op': operation['op'], 'status': status, 'result': result})
     conn.commit()
     conn.close()
-    return jsonify({'message': 'Checklist item deleted'})
+    return jsonify({'results': results})
+
+# Gantt: đồ thị phụ thuộc giữa các card. cards.dependencies là mảng JSON các id card
+# mà card này phải chờ (giống getDependencies ở example.component.ts); chuỗi id cách
+# nhau bởi dấu phẩy cũng được chấp nhận. Id không thuộc board bị bỏ qua.
+def parse_dependencies(value):
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        parsed = value.split(',')
+    if isinstance(parsed, str):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        return []
+    return [str(dep).strip() for dep in parsed if dep is not None and str(dep).strip()]
+
+# Ngày của card là 'YYYY-MM-DD' hoặc ISO datetime (có thể kèm Z), quy về datetime UTC không tz
+def parse_card_date(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+# Ghi datetime theo đúng định dạng của giá trị gốc
+def format_card_date(template, value):
+    if value is None:
+        return None
+    if template and len(template) == 10:
+        return value.date().isoformat()
+    if template and template.endswith('Z'):
+        return value.isoformat(timespec='milliseconds') + 'Z'
+    return value.isoformat()
+
+class DependencyGraph:
+    def __init__(self, cards):
+        self.cards = {card['id']: card for card in cards}
+        # Ngày dự kiến (start, end) đã parse của từng card
+        self.planned = {
+            card['id']: (parse_card_date(card.get('start_date')), parse_card_date(card.get('end_date')))
+            for card in cards
+        }
+        self.predecessors = {}
+        self.successors = {card_id: [] for card_id in self.cards}
+        for card_id, card in self.cards.items():
+            deps = [dep for dep in dict.fromkeys(parse_dependencies(card.get('dependencies'))) if dep in self.cards]
+            self.predecessors[card_id] = deps
+            for dep in deps:
+                self.successors[dep].append(card_id)
+        self._analysis = None
+
+    # Kahn: O(V + E). Card nằm trong (hoặc phụ thuộc vào) chu trình không có trong order
+    def topological_order(self):
+        indegree = {card_id: len(preds) for card_id, preds in self.predecessors.items()}
+        ready = deque(card_id for card_id, degree in indegree.items() if degree == 0)
+        order = []
+        while ready:
+            card_id = ready.popleft()
+            order.append(card_id)
+            for successor in self.successors[card_id]:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    ready.append(successor)
+        return order, [card_id for card_id, degree in indegree.items() if degree > 0]
+
+    # Nếu card_id nhận danh sách dependencies mới mà tạo chu trình thì trả về chu trình
+    # [card_id, dep, ..., card_id] theo chiều "phụ thuộc vào", ngược lại None
+    def find_cycle(self, card_id, dependencies):
+        parents = {}
+        stack = []
+        for dep in dependencies:
+            if dep == card_id:
+                return [card_id, card_id]
+            if dep in self.cards and dep not in parents:
+                parents[dep] = None
+                stack.append(dep)
+        while stack:
+            node = stack.pop()
+            for pred in self.predecessors.get(node, ()):
+                if pred == card_id:
+                    chain = [node]
+                    while parents[chain[-1]] is not None:
+                        chain.append(parents[chain[-1]])
+                    return [card_id] + chain[::-1] + [card_id]
+                if pred not in parents:
+                    parents[pred] = node
+                    stack.append(pred)
+        return None
+
+    def duration(self, card_id):
+        start, end = self.planned[card_id]
+        if start is None or end is None or end < start:
+            return timedelta(0)
+        return end - start
+
+    # CPM: earliest start = max(ngày bắt đầu dự kiến, earliest finish của các card đứng trước),
+    # latest finish = min(latest start của các card đứng sau) hoặc ngày kết thúc dự án.
+    # Mỗi bước duyệt theo thứ tự topo nên cả phân tích là O(V + E); kết quả được giữ lại
+    # cùng đồ thị (đồ thị được cache theo version của board)
+    def analyze(self):
+        if self._analysis is not None:
+            return self._analysis
+        order, cyclic = self.topological_order()
+        durations = {card_id: self.duration(card_id) for card_id in order}
+        earliest_start, earliest_finish = {}, {}
+        for card_id in order:
+            start = self.planned[card_id][0]
+            for pred in self.predecessors[card_id]:
+                finish = earliest_finish.get(pred)
+                if finish is not None and (start is None or finish > start):
+                    start = finish
+            earliest_start[card_id] = start
+            earliest_finish[card_id] = start + durations[card_id] if start is not None else None
+        finishes = [finish for finish in earliest_finish.values() if finish is not None]
+        project_end = max(finishes) if finishes else None
+        latest_start, latest_finish = {}, {}
+        for card_id in reversed(order):
+            finish = None
+            for successor in self.successors[card_id]:
+                start = latest_start.get(successor)
+                if start is not None and (finish is None or start < finish):
+                    finish = start
+            if finish is None:
+                finish = project_end
+            latest_finish[card_id] = finish
+            latest_start[card_id] = finish - durations[card_id] if finish is not None else None
+        slack = {}
+        for card_id in order:
+            if earliest_start[card_id] is not None and latest_start[card_id] is not None:
+                slack[card_id] = latest_start[card_id] - earliest_start[card_id]
+        critical = {card_id for card_id, value in slack.items() if value <= timedelta(0)}
+        # Đường găng: chuỗi card găng dài nhất mà card sau bắt đầu đúng lúc card trước kết thúc
+        chain_length, chain_prev = {}, {}
+        for card_id in order:
+            if card_id not in critical:
+                continue
+            chain_length[card_id] = 1
+            for pred in self.predecessors[card_id]:
+                if (pred in critical and earliest_finish[pred] == earliest_start[card_id]
+                        and chain_length[pred] + 1 > chain_length[card_id]):
+                    chain_length[card_id] = chain_length[pred] + 1
+                    chain_prev[card_id] = pred
+        critical_path = []
+        ends = [card_id for card_id in chain_length if earliest_finish[card_id] == project_end]
+        if ends:
+            node = max(ends, key=lambda card_id: chain_length[card_id])
+            while node is not None:
+                critical_path.append(node)
+                node = chain_prev.get(node)
+            critical_path.reverse()
+        tasks = []
+        for card_id in order + cyclic:
+            task = dict(self.cards[card_id])
+            start_template, end_template = task.get('start_date'), task.get('end_date')
+            task['predecessors'] = self.predecessors[card_id]
+            task['successors'] = self.successors[card_id]
+            task['earliest_start'] = format_card_date(start_template, earliest_start.get(card_id))
+            task['earliest_finish'] = format_card_date(end_template, earliest_finish.get(card_id))
+            task['latest_start'] = format_card_date(start_template, latest_start.get(card_id))
+            task['latest_finish'] = format_card_date(end_template, latest_finish.get(card_id))
+            task['slack_days'] = slack[card_id].total_seconds() / 86400 if card_id in slack else None
+            task['critical'] = card_id in critical
+            task['in_cycle'] = card_id in cyclic
+            tasks.append(task)
+        self._analysis = {
+            'tasks': tasks,
+            'order': order,
+            'critical_path': critical_path,
+            'cycles': cyclic,
+            'project_end': project_end.isoformat() if project_end else None
+        }
+        return self._analysis
+
+# Đồ thị phụ thuộc được cache theo (board, version): card đổi thì version board đổi theo.
+# Trong transaction ghi thì chỉ đọc cache (store=False): dữ liệu chưa commit không được
+# lưu vào cache dưới một version có thể bị rollback
+DEPENDENCY_GRAPH_CACHE_SIZE = int(os.environ.get('SCRUMBOARD_GANTT_CACHE_SIZE', '64'))
+_dependency_graphs = OrderedDict()  # board_id -> (version, DependencyGraph)
+_dependency_graphs_lock = threading.Lock()
+
+def load_dependency_graph(cursor, board_id, store=True):
+    version = get_version(cursor, f'board:{board_id}')
+    with _dependency_graphs_lock:
+        cached = _dependency_graphs.get(board_id)
+        if cached is not None and cached[0] == version:
+            _dependency_graphs.move_to_end(board_id)
+            return cached[1]
+    cursor.execute('''
+        SELECT id, title, start_date, end_date, dependencies, position, list_id, description, due_date, type, member
+        FROM cards
+        WHERE board_id = ?
+    ''', (board_id,))
+    graph = DependencyGraph([dict(row) for row in cursor.fetchall()])
+    if not store:
+        return graph
+    with _dependency_graphs_lock:
+        _dependency_graphs[board_id] = (version, graph)
+        _dependency_graphs.move_to_end(board_id)
+        while len(_dependency_graphs) > DEPENDENCY_GRAPH_CACHE_SIZE:
+            _dependency_graphs.popitem(last=False)
+    return graph
+
+# Gọi trong transaction ghi trước khi lưu dependencies mới của card
+def check_dependency_cycle(cursor, board_id, card_id, dependencies):
+    deps = parse_dependencies(dependencies)
+    if not deps:
+        return
+    cycle = load_dependency_graph(cursor, board_id, store=False).find_cycle(card_id, deps)
+    if cycle:
+        raise OperationError('Dependencies would create a cycle: ' + ' -> '.join(cycle))
+
+# Dời lịch các card đi sau card_id (trực tiếp hoặc gián tiếp) khi card_id đổi ngày.
+# Chỉ duyệt phần đồ thị đi sau card_id theo thứ tự topo; một card bị dời khi nó bắt đầu
+# trước lúc card đứng trước kết thúc, giữ nguyên độ dài. Card đứng trước xong sớm hơn thì
+# không kéo các card sau lùi lại. Trả về danh sách card đã dời (đã ghi vào DB).
+def propagate_schedule(cursor, board_id, card_id, start_date, end_date):
+    graph = load_dependency_graph(cursor, board_id, store=False)
+    if card_id not in graph.cards:
+        return []
+    reachable = set()
+    stack = [card_id]
+    while stack:
+        for successor in graph.successors[stack.pop()]:
+            if successor not in reachable and successor != card_id:
+                reachable.add(successor)
+                stack.append(successor)
+    if not reachable:
+        return []
+    indegree = {
+        node: sum(1 for pred in graph.predecessors[node] if pred in reachable or pred == card_id)
+        for node in reachable
+    }
+    finish = {card_id: parse_card_date(end_date) or parse_card_date(start_date)}
+    ready = deque()
+    for successor in graph.successors[card_id]:
+        indegree[successor] -= 1
+        if indegree[successor] == 0:
+            ready.append(successor)
+    shifted = []
+    while ready:
+        node = ready.popleft()
+        start, end = graph.planned[node]
+        required = None
+        for pred in graph.predecessors[node]:
+            pred_finish = finish[pred] if pred in finish else (graph.planned[pred][1] or graph.planned[pred][0])
+            if pred_finish is not None and (required is None or pred_finish > required):
+                required = pred_finish
+        if start is not None and required is not None and start < required:
+            delta = required - start
+            start, end = required, (end + delta if end is not None else None)
+            shifted.append((node, start, end))
+            finish[node] = end or start
+        else:
+            finish[node] = (end or start) if start is not None else required
+        for successor in graph.successors[node]:
+            if successor in indegree:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    ready.append(successor)
+    changes = []
+    for node, start, end in shifted:
+        card = graph.cards[node]
+        changes.append({
+            'id': node,
+            'title': card['title'],
+            'start_date': format_card_date(card['start_date'], start),
+            'end_date': format_card_date(card['end_date'], end) if end is not None else card['end_date']
+        })
+    cursor.executemany(
+        'UPDATE cards SET start_date = ?, end_date = ? WHERE id = ?',
+        [(change['start_date'], change['end_date'], change['id']) for change in changes]
+    )
+    record_changes(cursor, board_id, 'card', [change['id'] for change in changes])
+    return changes
 
 @app.route('/api/boards/<board_id>/gantt', methods=['GET'])
 def get_gantt_data(board_id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    # ?analyze=1: thứ tự topo, ES/EF/LS/LF, slack và đường găng tính sẵn ở server
+    if request.args.get('analyze') in ('1', 'true'):
+        conn.execute('BEGIN')
+        etag = make_etag('gantt', board_id, get_version(cursor, f'board:{board_id}'))
+        cached = not_modified(etag)
+        if cached:
+            conn.close()
+            return cached
+        analysis = load_dependency_graph(cursor, board_id).analyze()
+        conn.close()
+        return with_etag(jsonify(analysis), etag)
     # Lấy tất cả các card của board (bao gồm cả archived nếu muốn, hoặc chỉ chưa archived)
     cursor.execute('''
         SELECT id, title, start_date, end_date, dependencies, position, list_id, description, due_date, type, member
@@ -1120,10 +3055,13 @@ def get_gantt_data(board_id):
 def get_companies():
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM companies')
-    companies = [dict(row) for row in cursor.fetchall()]
+    try:
+        companies, next_cursor = fetch_page(cursor, 'companies', 'c', None, (), [('c.rowid', 'ASC')])
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
     conn.close()
-    return jsonify(companies)
+    return page_response(companies, next_cursor)
 
 @app.route('/api/companies', methods=['POST'])
 def create_company():
@@ -1169,13 +3107,17 @@ def get_departments():
     company_id = request.args.get('company_id')
     conn = get_db_connection()
     cursor = conn.cursor()
-    if company_id:
-        cursor.execute('SELECT * FROM departments WHERE company_id = ?', (company_id,))
-    else:
-        cursor.execute('SELECT * FROM departments')
-    departments = [dict(row) for row in cursor.fetchall()]
+    try:
+        if company_id:
+            departments, next_cursor = fetch_page(cursor, 'departments', 'd', 'd.company_id = ?', (company_id,),
+                                                  [('d.rowid', 'ASC')])
+        else:
+            departments, next_cursor = fetch_page(cursor, 'departments', 'd', None, (), [('d.rowid', 'ASC')])
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
     conn.close()
-    return jsonify(departments)
+    return page_response(departments, next_cursor)
 
 @app.route('/api/departments', methods=['POST'])
 def create_department():
@@ -1224,11 +3166,7 @@ def require_company_member(func):
         user_email = request.args.get('user_email')
         if not user_email or not company_id:
             return jsonify({'error': 'Missing user_email or company_id'}), 403
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM members WHERE email = ?', (user_email,))
-        member = cursor.fetchone()
-        conn.close()
+        member = current_member(user_email)
         if not member or str(member['company_id']) != str(company_id):
             return jsonify({'error': 'Permission denied'}), 403
         return func(*args, **kwargs)
@@ -1242,11 +3180,7 @@ def require_department_member(func):
         user_email = request.args.get('user_email')
         if not user_email or not department_id:
             return jsonify({'error': 'Missing user_email or department_id'}), 403
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM members WHERE email = ?', (user_email,))
-        member = cursor.fetchone()
-        conn.close()
+        member = current_member(user_email)
         if not member or str(member['department_id']) != str(department_id):
             return jsonify({'error': 'Permission denied'}), 403
         return func(*args, **kwargs)
@@ -1277,10 +3211,14 @@ def get_boards_by_department(department_id):
 def get_members_by_company(company_id):
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM members WHERE company_id = ?', (company_id,))
-    members = [dict(row) for row in cursor.fetchall()]
+    try:
+        members, next_cursor = fetch_page(cursor, 'members', 'm', 'm.company_id = ?', (company_id,),
+                                          [('m.rowid', 'ASC')])
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
     conn.close()
-    return jsonify(members)
+    return page_response(members, next_cursor)
 
 @app.route('/api/members/by-department/<department_id>', methods=['GET'])
 @require_department_member
@@ -1301,17 +3239,28 @@ def get_widgets():
     
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
+    user = current_member(user_email)
     if not user:
         conn.close()
         return jsonify({'error': 'User not found'}), 404
     
+    etag = make_etag('widgets', user['id'], get_version(cursor, f"widgets:{user['id']}"))
+    cached = not_modified(etag)
+    if cached:
+        conn.close()
+        return cached
+    
+    widgets = load_active_widgets(cursor, user['id'])
+    
+    conn.close()
+    return with_etag(jsonify(widgets), etag)
+
+def load_active_widgets(cursor, user_id):
     cursor.execute('''
         SELECT * FROM widgets 
         WHERE user_id = ? AND is_active = 1 
         ORDER BY position
-    ''', (user['id'],))
+    ''', (user_id,))
     widgets = [dict(row) for row in cursor.fetchall()]
     
     # Parse config JSON
@@ -1323,9 +3272,7 @@ def get_widgets():
                 widget['config'] = {}
         else:
             widget['config'] = {}
-    
-    conn.close()
-    return jsonify(widgets)
+    return widgets
 
 @app.route('/api/widgets', methods=['POST'])
 def create_widget():
@@ -1340,8 +3287,7 @@ def create_widget():
     
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
+    user = current_member(user_email)
     if not user:
         conn.close()
         return jsonify({'error': 'User not found'}), 404
@@ -1351,6 +3297,7 @@ def create_widget():
         INSERT INTO widgets (id, user_id, type, title, config, position)
         VALUES (?, ?, ?, ?, ?, ?)
     ''', (widget_id, user['id'], widget_type, title, json.dumps(config), data.get('position', 0)))
+    bump_version(cursor, f"widgets:{user['id']}")
     
     conn.commit()
     conn.close()
@@ -1425,6 +3372,7 @@ def update_widget(widget_id):
             SET {', '.join(update_fields)}
             WHERE id = ?
         ''', params)
+        bump_version(cursor, f"widgets:{widget['user_id']}")
         
         conn.commit()
     
@@ -1453,6 +3401,7 @@ def delete_widget(widget_id):
         return jsonify({'error': 'Widget not found or access denied'}), 404
     
     cursor.execute('DELETE FROM widgets WHERE id = ?', (widget_id,))
+    bump_version(cursor, f"widgets:{widget['user_id']}")
     conn.commit()
     conn.close()
     
@@ -1471,8 +3420,7 @@ def reorder_widgets():
     cursor = conn.cursor()
     
     # Kiểm tra user
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
+    user = current_member(user_email)
     if not user:
         conn.close()
         return jsonify({'error': 'User not found'}), 404
@@ -1487,52 +3435,249 @@ def reorder_widgets():
                 UPDATE widgets 
                 SET position = ?, updated_at = ?
                 WHERE id = ? AND user_id = ?
-            ''', (position, datetime.now().isoformat(), widget_id, user['id']))
-    
-    conn.commit()
-    conn.close()
-    
-    return jsonify({'message': 'Widgets reordered successfully'})
-
-# API lấy dữ liệu cho các loại widget
-@app.route('/api/widgets/data/<widget_type>', methods=['GET'])
-def get_widget_data(widget_type):
-    user_email = request.args.get('user_email')
-    board_id = request.args.get('board_id')
+            ''', (position, datetime.now().isoformat(), widget_id, user['id']))
+    bump_version(cursor, f"widgets:{user['id']}")
     
-    if not user_email:
-        return jsonify({'error': 'user_email is required'}), 400
+    conn.commit()
+    conn.close()
     
+    return jsonify({'message': 'Widgets reordered successfully'})
+
+# Số card chưa archived theo (board, status), cập nhật bằng trigger khi card được tạo,
+# sửa status, archive/restore, xóa hoặc chuyển board. status NULL được lưu là ''.
+def create_status_counters(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'board_status_counts'")
+    if cursor.fetchone():
+        return
+    cursor.execute('''
+        CREATE TABLE board_status_counts (
+            board_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (board_id, status)
+        )
+    ''')
+    increment = '''
+        INSERT INTO board_status_counts (board_id, status, count)
+        VALUES (NEW.board_id, COALESCE(NEW.status, ''), 1)
+        ON CONFLICT (board_id, status) DO UPDATE SET count = count + 1;
+    '''
+    decrement = '''
+        UPDATE board_status_counts SET count = count - 1
+        WHERE board_id = OLD.board_id AND status = COALESCE(OLD.status, '');
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER status_counts_cards_ai AFTER INSERT ON cards
+        WHEN COALESCE(NEW.archived, 0) = 0
+        BEGIN {increment} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER status_counts_cards_ad AFTER DELETE ON cards
+        WHEN COALESCE(OLD.archived, 0) = 0
+        BEGIN {decrement} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER status_counts_cards_au_old AFTER UPDATE OF board_id, status, archived ON cards
+        WHEN COALESCE(OLD.archived, 0) = 0
+        BEGIN {decrement} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER status_counts_cards_au_new AFTER UPDATE OF board_id, status, archived ON cards
+        WHEN COALESCE(NEW.archived, 0) = 0
+        BEGIN {increment} END
+    ''')
+    cursor.execute('''
+        INSERT INTO board_status_counts (board_id, status, count)
+        SELECT board_id, COALESCE(status, '') AS status, COUNT(*) AS count
+        FROM cards
+        WHERE archived IS NULL OR archived = 0
+        GROUP BY board_id, COALESCE(status, '')
+    ''')
+
+_STATUS_COUNTS_SCAN = '''
+    SELECT board_id, COALESCE(status, '') AS status, COUNT(*) AS count
+    FROM cards
+    WHERE archived IS NULL OR archived = 0
+    GROUP BY board_id, COALESCE(status, '')
+'''
+
+# So bộ đếm với kết quả quét toàn bộ bảng cards, trả về các dòng lệch
+def check_status_counts(cursor):
+    cursor.execute(_STATUS_COUNTS_SCAN)
+    expected = {(row['board_id'], row['status']): row['count'] for row in cursor.fetchall()}
+    cursor.execute('SELECT board_id, status, count FROM board_status_counts WHERE count != 0')
+    actual = {(row['board_id'], row['status']): row['count'] for row in cursor.fetchall()}
+    return [
+        {'board_id': board_id, 'status': status, 'expected': expected.get((board_id, status), 0),
+         'actual': actual.get((board_id, status), 0)}
+        for board_id, status in sorted(set(expected) | set(actual))
+        if expected.get((board_id, status), 0) != actual.get((board_id, status), 0)
+    ]
+
+def rebuild_status_counts(cursor):
+    cursor.execute('DELETE FROM board_status_counts')
+    cursor.execute(f'INSERT INTO board_status_counts (board_id, status, count) {_STATUS_COUNTS_SCAN}')
+
+# flask --app api status-counts [--rebuild]
+@app.cli.command('status-counts')
+@click.option('--rebuild', is_flag=True, help='Tính lại bộ đếm từ bảng cards.')
+def status_counts_command(rebuild):
     conn = get_db_connection()
     cursor = conn.cursor()
-    
-    # Kiểm tra user
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
-    if not user:
-        conn.close()
-        return jsonify({'error': 'User not found'}), 404
-    
+    mismatches = check_status_counts(cursor)
+    for mismatch in mismatches:
+        click.echo('{board_id} {status!r}: expected {expected}, counted {actual}'.format(**mismatch))
+    if rebuild:
+        rebuild_status_counts(cursor)
+        conn.commit()
+        click.echo('Status counters rebuilt.')
+    elif not mismatches:
+        click.echo('Status counters are consistent.')
+    conn.close()
+    release_db_connection()
+    if mismatches and not rebuild:
+        raise SystemExit(1)
+
+# Cache kết quả widget theo (user, type, board_id). Mỗi entry sống tối đa TTL giây
+# của loại widget và bị bỏ khi version của board (hoặc 'boards' với widget gộp tất
+# cả board) thay đổi. TTL theo loại đặt bằng SCRUMBOARD_WIDGET_CACHE_TTLS, ví dụ
+# "status_chart=30,recent_activities=10"; TTL 0 là không cache loại đó.
+WIDGET_CACHE_MAX_ENTRIES = int(os.environ.get('SCRUMBOARD_WIDGET_CACHE_ENTRIES', '2048'))
+WIDGET_CACHE_MAX_BYTES = int(os.environ.get('SCRUMBOARD_WIDGET_CACHE_BYTES', str(16 * 1024 * 1024)))
+WIDGET_CACHE_DEFAULT_TTL = float(os.environ.get('SCRUMBOARD_WIDGET_CACHE_TTL', '15'))
+WIDGET_CACHE_TTLS = {
+    'status_chart': 30.0,
+    'recent_activities': 10.0,
+    'gantt_chart': 60.0,
+}
+for _item in os.environ.get('SCRUMBOARD_WIDGET_CACHE_TTLS', '').split(','):
+    if '=' in _item:
+        _type, _ttl = _item.split('=', 1)
+        WIDGET_CACHE_TTLS[_type.strip()] = float(_ttl)
+
+class WidgetDataCache:
+    def __init__(self, max_entries, max_bytes, ttls, default_ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()   # (user_id, type, board_id) -> {'version', 'expires', 'size', 'data'}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'stale': 0,
+            'stores': 0,
+            'evictions': 0,
+            'flushes': 0
+        }
+
+    def ttl(self, widget_type):
+        return self.ttls.get(widget_type, self.default_ttl)
+
+    def get(self, key, version):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry['expires'] <= now or entry['version'] != version:
+                self.stats['expired' if entry['expires'] <= now else 'stale'] += 1
+                self.stats['misses'] += 1
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry['data']
+
+    def put(self, key, version, data):
+        ttl = self.ttl(key[1])
+        if ttl <= 0:
+            return
+        size = len(json.dumps(data, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = {
+                'version': version,
+                'expires': time.monotonic() + ttl,
+                'size': size,
+                'data': data
+            }
+            self._bytes += size
+            self.stats['stores'] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def flush(self):
+        with self._lock:
+            flushed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self.stats['flushes'] += 1
+        return flushed
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry['size']
+        return True
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        stats['ttls'] = dict(self.ttls, default=self.default_ttl)
+        return stats
+
+widget_cache = WidgetDataCache(WIDGET_CACHE_MAX_ENTRIES, WIDGET_CACHE_MAX_BYTES,
+                               WIDGET_CACHE_TTLS, WIDGET_CACHE_DEFAULT_TTL)
+
+# Lấy dữ liệu widget qua widget_cache. Version đọc trước khi tính nên nếu có
+# transaction commit xen giữa, entry lưu lại mang version cũ và lần sau sẽ bị bỏ
+def get_widget_data_cached(cursor, user_id, widget_type, board_id=None):
+    if widget_cache.ttl(widget_type) <= 0:
+        return compute_widget_data(cursor, user_id, widget_type, board_id)
+    key = (user_id, widget_type, board_id)
+    version = get_version(cursor, f'board:{board_id}' if board_id else 'boards')
+    data = widget_cache.get(key, version)
+    if data is None:
+        data = compute_widget_data(cursor, user_id, widget_type, board_id)
+        widget_cache.put(key, version, data)
+    return data
+
+# Tính dữ liệu của một widget; board_id rỗng nghĩa là gộp tất cả board của user
+def compute_widget_data(cursor, user_id, widget_type, board_id=None):
     data = {}
     
     if widget_type == 'status_chart':
-        # Dữ liệu cho biểu đồ trạng thái task
+        # Dữ liệu cho biểu đồ trạng thái task, đọc từ bộ đếm board_status_counts
         if board_id:
             cursor.execute('''
-                SELECT status, COUNT(*) as count
-                FROM cards 
-                WHERE board_id = ? AND (archived IS NULL OR archived = 0)
-                GROUP BY status
+                SELECT status, count
+                FROM board_status_counts
+                WHERE board_id = ?
             ''', (board_id,))
         else:
-            # Lấy tất cả board của user
+            # Cộng dồn bộ đếm của tất cả board của user
             cursor.execute('''
-                SELECT status, COUNT(*) as count
-                FROM cards c
-                JOIN board_members bm ON c.board_id = bm.board_id
-                WHERE bm.member_id = ? AND (c.archived IS NULL OR c.archived = 0)
-                GROUP BY status
-            ''', (user['id'],))
+                SELECT s.status, SUM(s.count) as count
+                FROM board_status_counts s
+                JOIN board_members bm ON s.board_id = bm.board_id
+                WHERE bm.member_id = ?
+                GROUP BY s.status
+            ''', (user_id,))
         
         status_data = {row['status']: row['count'] for row in cursor.fetchall()}
         data = {
@@ -1569,7 +3714,7 @@ def get_widget_data(widget_type):
                 WHERE bm.member_id = ? AND (c.archived IS NULL OR c.archived = 0)
                 ORDER BY c.updated_at DESC
                 LIMIT 10
-            ''', (user['id'],))
+            ''', (user_id,))
         
         activities = [dict(row) for row in cursor.fetchall()]
         data = {'activities': activities}
@@ -1593,56 +3738,208 @@ def get_widget_data(widget_type):
                 WHERE bm.member_id = ? AND (c.archived IS NULL OR c.archived = 0)
                 AND c.start_date IS NOT NULL AND c.end_date IS NOT NULL
                 ORDER BY c.start_date
-            ''', (user['id'],))
+            ''', (user_id,))
         
         gantt_data = [dict(row) for row in cursor.fetchall()]
         data = {'tasks': gantt_data}
     
+    return data
+
+# API lấy dữ liệu cho các loại widget
+@app.route('/api/widgets/data/<widget_type>', methods=['GET'])
+def get_widget_data(widget_type):
+    user_email = request.args.get('user_email')
+    board_id = request.args.get('board_id')
+    
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    # Kiểm tra user
+    user = current_member(user_email)
+    if not user:
+        conn.close()
+        return jsonify({'error': 'User not found'}), 404
+    
+    data = get_widget_data_cached(cursor, user['id'], widget_type, board_id)
     conn.close()
     return jsonify(data)
 
+# Số worker để tính widget song song trong /api/widgets/render, 0 = tính tuần tự
+# trên connection của request (một snapshot nhất quán)
+WIDGET_RENDER_WORKERS = int(os.environ.get('SCRUMBOARD_WIDGET_WORKERS', '0'))
+_widget_executor = None
+_widget_executor_lock = threading.Lock()
+
+def get_widget_executor():
+    global _widget_executor
+    with _widget_executor_lock:
+        if _widget_executor is None:
+            _widget_executor = ThreadPoolExecutor(
+                max_workers=WIDGET_RENDER_WORKERS, thread_name_prefix='widget-render')
+        return _widget_executor
+
+# Tính các widget cùng phạm vi board; jobs là danh sách (widget_type, board_id)
+def compute_widget_scope(cursor, user_id, jobs):
+    return {job: get_widget_data_cached(cursor, user_id, *job) for job in jobs}
+
+# Chạy trên thread của executor: dùng connection riêng của thread và trả lại pool
+def _compute_widget_scope_pooled(user_id, jobs):
+    conn = get_db_connection()
+    try:
+        return compute_widget_scope(conn.cursor(), user_id, jobs)
+    finally:
+        conn.close()
+        release_db_connection()
+
+# API trả về tất cả widget đang bật của user kèm dữ liệu trong một request.
+# board_id của widget lấy từ config.board_id, mặc định theo query board_id. Config
+# không phải object JSON (hoặc board_id không phải chuỗi) thì dùng board_id mặc định
+@app.route('/api/widgets/render', methods=['GET'])
+def render_widgets():
+    user_email = request.args.get('user_email')
+    default_board_id = request.args.get('board_id')
+    
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    user = current_member(user_email)
+    if not user:
+        conn.close()
+        return jsonify({'error': 'User not found'}), 404
+    
+    # Đọc trong một transaction để mọi widget thấy cùng một trạng thái dữ liệu
+    conn.execute('BEGIN')
+    widgets = load_active_widgets(cursor, user['id'])
+    
+    # Gom widget theo phạm vi board, widget trùng (type, board) chỉ tính một lần
+    scopes = {}
+    for widget in widgets:
+        config = widget['config']
+        board_id = config.get('board_id') if isinstance(config, dict) else None
+        if not isinstance(board_id, str) or not board_id:
+            board_id = default_board_id
+        widget['board_id'] = board_id
+        jobs = scopes.setdefault(board_id, [])
+        if (widget['type'], board_id) not in jobs:
+            jobs.append((widget['type'], board_id))
+    
+    results = {}
+    if WIDGET_RENDER_WORKERS > 0 and len(scopes) > 1:
+        executor = get_widget_executor()
+        futures = [executor.submit(_compute_widget_scope_pooled, user['id'], jobs)
+                   for jobs in scopes.values()]
+        for future in futures:
+            results.update(future.result())
+    else:
+        for jobs in scopes.values():
+            results.update(compute_widget_scope(cursor, user['id'], jobs))
+    conn.close()
+    
+    for widget in widgets:
+        widget['data'] = results[(widget['type'], widget['board_id'])]
+    return jsonify(widgets)
+
+# Số ngày tối đa của một khoảng start_date/end_date trong GET /api/daily-tasks
+DAILY_TASK_MAX_RANGE_DAYS = 366
+
+# Daily tasks của user kèm instance trong khoảng ngày, đọc bằng một LEFT JOIN
+# (dùng index (daily_task_id, task_date)). Trả về danh sách (task, instance hoặc None)
+# theo thứ tự task, một task có thể xuất hiện nhiều lần nếu có nhiều ngày.
+def load_daily_tasks_with_instances(cursor, user_id, start_date, end_date):
+    instance_columns = table_columns(cursor, 'daily_task_instances')
+    cursor.execute(f'''
+        SELECT dt.*, {', '.join(f'dti."{column}" AS "instance.{column}"' for column in instance_columns)}
+        FROM daily_tasks dt
+        LEFT JOIN daily_task_instances dti
+            ON dti.daily_task_id = dt.id AND dti.task_date BETWEEN ? AND ?
+        WHERE dt.user_id = ? AND dt.is_active = 1
+        ORDER BY dt.created_at DESC
+    ''', (start_date, end_date, user_id))
+    rows = []
+    for row in cursor.fetchall():
+        values = dict(row)
+        instance = {column: values.pop(f'instance.{column}') for column in instance_columns}
+        rows.append((values, instance if instance['id'] is not None else None))
+    return rows
+
 # Daily Tasks API endpoints
 @app.route('/api/daily-tasks', methods=['GET'])
 def get_daily_tasks():
     user_email = request.args.get('user_email')
     date = request.args.get('date')  # Format: YYYY-MM-DD
+    # Khoảng ngày cho view tuần/tháng: trả về ma trận tasks x days
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
     
     if not user_email:
         return jsonify({'error': 'user_email is required'}), 400
     
+    dates = None
+    if start_date or end_date:
+        try:
+            first = datetime.strptime(start_date or '', '%Y-%m-%d')
+            last = datetime.strptime(end_date or '', '%Y-%m-%d')
+        except ValueError:
+            return jsonify({'error': 'start_date and end_date must both be YYYY-MM-DD'}), 400
+        if last < first or (last - first).days >= DAILY_TASK_MAX_RANGE_DAYS:
+            return jsonify({'error': f'Date range must be 1 to {DAILY_TASK_MAX_RANGE_DAYS} days'}), 400
+        dates = [(first + timedelta(days=offset)).strftime('%Y-%m-%d')
+                 for offset in range((last - first).days + 1)]
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     # Lấy user_id
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
+    user = current_member(user_email)
     if not user:
         conn.close()
         return jsonify({'error': 'User not found'}), 404
     
-    # Lấy danh sách daily tasks của user
-    cursor.execute('''
-        SELECT * FROM daily_tasks 
-        WHERE user_id = ? AND is_active = 1
-        ORDER BY created_at DESC
-    ''', (user['id'],))
-    daily_tasks = [dict(row) for row in cursor.fetchall()]
+    etag = make_etag('daily-tasks', user['id'], get_version(cursor, f"daily-tasks:{user['id']}"),
+                     date, start_date, end_date)
+    cached = not_modified(etag)
+    if cached:
+        conn.close()
+        return cached
+    
+    if dates:
+        # Ma trận: mỗi task có 'days' cùng thứ tự với 'dates', phần tử là instance hoặc null
+        tasks = {}
+        for task, instance in load_daily_tasks_with_instances(cursor, user['id'], dates[0], dates[-1]):
+            if task['id'] not in tasks:
+                task['days'] = dict.fromkeys(dates)
+                tasks[task['id']] = task
+            days = tasks[task['id']]['days']
+            if instance and instance['task_date'] in days:
+                days[instance['task_date']] = instance
+        conn.close()
+        for task in tasks.values():
+            task['days'] = list(task['days'].values())
+        return with_etag(jsonify({'dates': dates, 'tasks': list(tasks.values())}), etag)
     
-    # Nếu có date, lấy instances cho ngày đó
     if date:
-        for task in daily_tasks:
-            cursor.execute('''
-                SELECT * FROM daily_task_instances 
-                WHERE daily_task_id = ? AND task_date = ?
-            ''', (task['id'], date))
-            instance = cursor.fetchone()
-            if instance:
-                task['instance'] = dict(instance)
-            else:
-                task['instance'] = None
+        # Lấy danh sách daily tasks kèm instance của ngày đó
+        daily_tasks = []
+        for task, instance in load_daily_tasks_with_instances(cursor, user['id'], date, date):
+            task['instance'] = instance
+            daily_tasks.append(task)
+    else:
+        # Lấy danh sách daily tasks của user
+        cursor.execute('''
+            SELECT * FROM daily_tasks 
+            WHERE user_id = ? AND is_active = 1
+            ORDER BY created_at DESC
+        ''', (user['id'],))
+        daily_tasks = [dict(row) for row in cursor.fetchall()]
     
     conn.close()
-    return jsonify(daily_tasks)
+    return with_etag(jsonify(daily_tasks), etag)
 
 @app.route('/api/daily-tasks', methods=['POST'])
 def create_daily_task():
@@ -1658,8 +3955,7 @@ def create_daily_task():
     cursor = conn.cursor()
     
     # Lấy user_id
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
+    user = current_member(user_email)
     if not user:
         conn.close()
         return jsonify({'error': 'User not found'}), 404
@@ -1670,6 +3966,7 @@ def create_daily_task():
         VALUES (?, ?, ?, ?, ?, ?, ?)
     ''', (task_id, user['id'], title, data.get('description'), frequency, 
           data.get('start_date'), data.get('end_date')))
+    bump_version(cursor, f"daily-tasks:{user['id']}")
     
     conn.commit()
     conn.close()
@@ -1740,6 +4037,7 @@ def update_daily_task(task_id):
             SET {', '.join(update_fields)}
             WHERE id = ?
         ''', params)
+        bump_version(cursor, f"daily-tasks:{task['user_id']}")
         
         conn.commit()
     
@@ -1768,11 +4066,124 @@ def delete_daily_task(task_id):
         return jsonify({'error': 'Task not found or access denied'}), 404
     
     cursor.execute('DELETE FROM daily_tasks WHERE id = ?', (task_id,))
+    bump_version(cursor, f"daily-tasks:{task['user_id']}")
     conn.commit()
     conn.close()
     
     return jsonify({'message': 'Daily task deleted successfully'})
 
+# Cột thời gian/ghi chú được ghi theo từng trạng thái của instance
+DAILY_TASK_STATUS_COLUMNS = {
+    'in_progress': ('started_at',),
+    'completed': ('completed_at', 'notes'),
+    'skipped': ('notes',),
+}
+
+# Ghi trạng thái cho các instance (daily_task_id, task_date, notes) bằng một UPSERT
+# trên unique index (daily_task_id, task_date), không cần đọc instance trước
+def upsert_daily_task_instances(cursor, status, rows):
+    columns = DAILY_TASK_STATUS_COLUMNS[status]
+    now = datetime.now().isoformat()
+    updates = ', '.join(['status = excluded.status'] + [f'{column} = excluded.{column}' for column in columns])
+    cursor.executemany(f'''
+        INSERT INTO daily_task_instances (id, daily_task_id, task_date, status, started_at, completed_at, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (daily_task_id, task_date) DO UPDATE SET {updates}
+    ''', [
+        (generate_id(), task_id, date, status,
+         now if 'started_at' in columns else None,
+         now if 'completed_at' in columns else None,
+         notes if 'notes' in columns else None)
+        for task_id, date, notes in rows
+    ])
+
+# Cập nhật trạng thái nhiều task của user cho một ngày trong một transaction.
+# Body: {user_email, date, updates: [{task_id, status, notes?}]}
+@app.route('/api/daily-tasks/bulk-status', methods=['POST'])
+def bulk_update_daily_task_status():
+    data = request.get_json()
+    user_email = data.get('user_email')
+    date = data.get('date')  # Format: YYYY-MM-DD
+    updates = data.get('updates')
+    
+    if not user_email or not date or not isinstance(updates, list):
+        return jsonify({'error': 'user_email, date and updates are required'}), 400
+    
+    rows_by_status = {}
+    for update in updates:
+        if not isinstance(update, dict) or not update.get('task_id'):
+            return jsonify({'error': 'Each update needs a task_id'}), 400
+        status = update.get('status')
+        if status not in DAILY_TASK_STATUS_COLUMNS:
+            return jsonify({'error': f'Invalid status: {status}'}), 400
+        rows_by_status.setdefault(status, []).append((update['task_id'], date, update.get('notes')))
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    user = current_member(user_email)
+    if not user:
+        conn.close()
+        return jsonify({'error': 'User not found'}), 404
+    
+    # Kiểm tra quyền sở hữu của tất cả task trong một lượt
+    task_ids = list({update['task_id'] for update in updates})
+    owned = {row['id'] for row in _select_in(
+        cursor, 'SELECT id FROM daily_tasks WHERE user_id = ? AND id IN ({ids})', (user['id'],), task_ids)}
+    missing = [task_id for task_id in task_ids if task_id not in owned]
+    if missing:
+        conn.close()
+        return jsonify({'error': 'Task not found or access denied', 'task_ids': missing}), 404
+    
+    for status, rows in rows_by_status.items():
+        upsert_daily_task_instances(cursor, status, rows)
+    if updates:
+        bump_version(cursor, f"daily-tasks:{user['id']}")
+    
+    conn.commit()
+    conn.close()
+    
+    return jsonify({'message': 'Tasks updated successfully', 'updated': len(updates)})
+
+# Tạo sẵn instance 'pending' cho các daily task đến hạn vào ngày date (daily: mọi
+# ngày, weekly: cùng thứ với start_date, monthly: cùng ngày trong tháng), bỏ qua
+# instance đã có. Trả về số instance được tạo.
+def generate_daily_task_instances(cursor, date):
+    cursor.execute('''
+        SELECT id, user_id FROM daily_tasks
+        WHERE is_active = 1
+        AND (start_date IS NULL OR start_date <= ?)
+        AND (end_date IS NULL OR end_date >= ?)
+        AND (
+            frequency IS NULL OR frequency = 'daily'
+            OR (frequency = 'weekly' AND strftime('%w', COALESCE(start_date, created_at)) = strftime('%w', ?))
+            OR (frequency = 'monthly' AND strftime('%d', COALESCE(start_date, created_at)) = strftime('%d', ?))
+        )
+    ''', (date, date, date, date))
+    tasks = cursor.fetchall()
+    cursor.executemany('''
+        INSERT INTO daily_task_instances (id, daily_task_id, task_date, status)
+        VALUES (?, ?, ?, 'pending')
+        ON CONFLICT (daily_task_id, task_date) DO NOTHING
+    ''', [(generate_id(), task['id'], date) for task in tasks])
+    created = cursor.rowcount if tasks else 0
+    for user_id in {task['user_id'] for task in tasks}:
+        bump_version(cursor, f'daily-tasks:{user_id}')
+    return created
+
+# Chạy theo lịch (cron) mỗi ngày: flask --app api daily-tasks-generate [--date YYYY-MM-DD]
+@app.cli.command('daily-tasks-generate')
+@click.option('--date', 'date', default=None, help='Ngày cần tạo instance, mặc định hôm nay.')
+def daily_tasks_generate_command(date):
+    date = date or datetime.now().strftime('%Y-%m-%d')
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    created = generate_daily_task_instances(cursor, date)
+    conn.commit()
+    conn.close()
+    release_db_connection()
+    click.echo(f'Created {created} daily task instances for {date}.')
+
 @app.route('/api/daily-tasks/<task_id>/start', methods=['POST'])
 def start_daily_task(task_id):
     data = request.get_json()
@@ -1797,27 +4208,8 @@ def start_daily_task(task_id):
         conn.close()
         return jsonify({'error': 'Task not found or access denied'}), 404
     
-    # Kiểm tra instance đã tồn tại chưa
-    cursor.execute('''
-        SELECT * FROM daily_task_instances 
-        WHERE daily_task_id = ? AND task_date = ?
-    ''', (task_id, date))
-    instance = cursor.fetchone()
-    
-    if instance:
-        # Cập nhật instance hiện tại
-        cursor.execute('''
-            UPDATE daily_task_instances 
-            SET status = ?, started_at = ?
-            WHERE id = ?
-        ''', ('in_progress', datetime.now().isoformat(), instance['id']))
-    else:
-        # Tạo instance mới
-        instance_id = generate_id()
-        cursor.execute('''
-            INSERT INTO daily_task_instances (id, daily_task_id, task_date, status, started_at)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (instance_id, task_id, date, 'in_progress', datetime.now().isoformat()))
+    upsert_daily_task_instances(cursor, 'in_progress', [(task_id, date, None)])
+    bump_version(cursor, f"daily-tasks:{task['user_id']}")
     
     conn.commit()
     conn.close()
@@ -1849,27 +4241,8 @@ def complete_daily_task(task_id):
         conn.close()
         return jsonify({'error': 'Task not found or access denied'}), 404
     
-    # Kiểm tra instance
-    cursor.execute('''
-        SELECT * FROM daily_task_instances 
-        WHERE daily_task_id = ? AND task_date = ?
-    ''', (task_id, date))
-    instance = cursor.fetchone()
-    
-    if instance:
-        # Cập nhật instance
-        cursor.execute('''
-            UPDATE daily_task_instances 
-            SET status = ?, completed_at = ?, notes = ?
-            WHERE id = ?
-        ''', ('completed', datetime.now().isoformat(), notes, instance['id']))
-    else:
-        # Tạo instance mới với trạng thái completed
-        instance_id = generate_id()
-        cursor.execute('''
-            INSERT INTO daily_task_instances (id, daily_task_id, task_date, status, completed_at, notes)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (instance_id, task_id, date, 'completed', datetime.now().isoformat(), notes))
+    upsert_daily_task_instances(cursor, 'completed', [(task_id, date, notes)])
+    bump_version(cursor, f"daily-tasks:{task['user_id']}")
     
     conn.commit()
     conn.close()
@@ -1901,27 +4274,8 @@ def skip_daily_task(task_id):
         conn.close()
         return jsonify({'error': 'Task not found or access denied'}), 404
     
-    # Kiểm tra instance
-    cursor.execute('''
-        SELECT * FROM daily_task_instances 
-        WHERE daily_task_id = ? AND task_date = ?
-    ''', (task_id, date))
-    instance = cursor.fetchone()
-    
-    if instance:
-        # Cập nhật instance
-        cursor.execute('''
-            UPDATE daily_task_instances 
-            SET status = ?, notes = ?
-            WHERE id = ?
-        ''', ('skipped', notes, instance['id']))
-    else:
-        # Tạo instance mới với trạng thái skipped
-        instance_id = generate_id()
-        cursor.execute('''
-            INSERT INTO daily_task_instances (id, daily_task_id, task_date, status, notes)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (instance_id, task_id, date, 'skipped', notes))
+    upsert_daily_task_instances(cursor, 'skipped', [(task_id, date, notes)])
+    bump_version(cursor, f"daily-tasks:{task['user_id']}")
     
     conn.commit()
     conn.close()
@@ -1953,23 +4307,21 @@ def get_daily_task_instances(task_id):
         return jsonify({'error': 'Task not found or access denied'}), 404
     
     # Lấy instances
-    if start_date and end_date:
-        cursor.execute('''
-            SELECT * FROM daily_task_instances 
-            WHERE daily_task_id = ? AND task_date BETWEEN ? AND ?
-            ORDER BY task_date DESC
-        ''', (task_id, start_date, end_date))
-    else:
-        cursor.execute('''
-            SELECT * FROM daily_task_instances 
-            WHERE daily_task_id = ?
-            ORDER BY task_date DESC
-        ''', (task_id,))
-    
-    instances = [dict(row) for row in cursor.fetchall()]
+    order = [('i.task_date', 'DESC'), ('i.rowid', 'DESC')]
+    try:
+        if start_date and end_date:
+            instances, next_cursor = fetch_page(cursor, 'daily_task_instances', 'i',
+                                                'i.daily_task_id = ? AND i.task_date BETWEEN ? AND ?',
+                                                (task_id, start_date, end_date), order)
+        else:
+            instances, next_cursor = fetch_page(cursor, 'daily_task_instances', 'i', 'i.daily_task_id = ?',
+                                                (task_id,), order)
+    except ValueError as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 400
     conn.close()
     
-    return jsonify(instances)
+    return page_response(instances, next_cursor)
 
 @app.route('/api/daily-tasks/summary', methods=['GET'])
 def get_daily_tasks_summary():
@@ -1983,8 +4335,7 @@ def get_daily_tasks_summary():
     cursor = conn.cursor()
     
     # Lấy user_id
-    cursor.execute('SELECT id FROM members WHERE email = ?', (user_email,))
-    user = cursor.fetchone()
+    user = current_member(user_email)
     if not user:
         conn.close()
         return jsonify({'error': 'User not found'}), 404
@@ -2022,11 +4373,12 @@ def get_daily_tasks_summary():
     tasks = [dict(row) for row in cursor.fetchall()]
     
     # Tính toán thống kê
+    status_counts = Counter(t['status'] for t in tasks)
     total_tasks = len(tasks)
-    completed_tasks = len([t for t in tasks if t['status'] == 'completed'])
-    in_progress_tasks = len([t for t in tasks if t['status'] == 'in_progress'])
-    pending_tasks = len([t for t in tasks if t['status'] == 'pending' or t['status'] is None])
-    skipped_tasks = len([t for t in tasks if t['status'] == 'skipped'])
+    completed_tasks = status_counts['completed']
+    in_progress_tasks = status_counts['in_progress']
+    pending_tasks = status_counts['pending'] + status_counts[None]
+    skipped_tasks = status_counts['skipped']
     
     summary = {
         'date': date or datetime.now().strftime('%Y-%m-%d'),
@@ -2042,8 +4394,619 @@ def get_daily_tasks_summary():
     conn.close()
     return jsonify(summary)
 
-# Initialize database and run app
+# Migration 10: số instance theo trạng thái cho mỗi (user, ngày), cập nhật bằng trigger
+# khi instance được tạo, đổi trạng thái hoặc bị xóa, và khi daily task bị xóa. Bảng tính
+# cả task đã tắt và ngày không đến hạn nên không khớp với số task đến hạn của analytics;
+# migration 14 bỏ bảng và trigger này
+_DAILY_ROLLUP_INCREMENT = '''
+    INSERT INTO daily_task_rollups (user_id, task_date, completed, in_progress, skipped, pending)
+    SELECT user_id, NEW.task_date,
+        COALESCE(NEW.status = 'completed', 0), COALESCE(NEW.status = 'in_progress', 0),
+        COALESCE(NEW.status = 'skipped', 0), COALESCE(NEW.status NOT IN ('completed', 'in_progress', 'skipped'), 1)
+    FROM daily_tasks WHERE id = NEW.daily_task_id
+    ON CONFLICT (user_id, task_date) DO UPDATE SET
+        completed = completed + excluded.completed, in_progress = in_progress + excluded.in_progress,
+        skipped = skipped + excluded.skipped, pending = pending + excluded.pending;
+'''
+_DAILY_ROLLUP_DECREMENT = '''
+    UPDATE daily_task_rollups SET
+        completed = completed - COALESCE(OLD.status = 'completed', 0),
+        in_progress = in_progress - COALESCE(OLD.status = 'in_progress', 0),
+        skipped = skipped - COALESCE(OLD.status = 'skipped', 0),
+        pending = pending - COALESCE(OLD.status NOT IN ('completed', 'in_progress', 'skipped'), 1)
+    WHERE user_id = (SELECT user_id FROM daily_tasks WHERE id = OLD.daily_task_id)
+    AND task_date = OLD.task_date;
+'''
+
+def create_daily_task_rollups(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'daily_task_rollups'")
+    if cursor.fetchone():
+        return
+    cursor.execute('''
+        CREATE TABLE daily_task_rollups (
+            user_id TEXT NOT NULL,
+            task_date TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            in_progress INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            pending INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, task_date)
+        )
+    ''')
+    cursor.execute(f'CREATE TRIGGER daily_rollups_instances_ai AFTER INSERT ON daily_task_instances BEGIN {_DAILY_ROLLUP_INCREMENT} END')
+    cursor.execute(f'CREATE TRIGGER daily_rollups_instances_ad AFTER DELETE ON daily_task_instances BEGIN {_DAILY_ROLLUP_DECREMENT} END')
+    cursor.execute(f'''
+        CREATE TRIGGER daily_rollups_instances_au
+        AFTER UPDATE OF daily_task_id, task_date, status ON daily_task_instances
+        BEGIN {_DAILY_ROLLUP_DECREMENT} {_DAILY_ROLLUP_INCREMENT} END
+    ''')
+    # Xóa task: trừ các instance của task trước khi dòng daily_tasks biến mất
+    cursor.execute('''
+        CREATE TRIGGER daily_rollups_tasks_bd BEFORE DELETE ON daily_tasks
+        BEGIN
+            UPDATE daily_task_rollups SET
+                completed = daily_task_rollups.completed - c.completed,
+                in_progress = daily_task_rollups.in_progress - c.in_progress,
+                skipped = daily_task_rollups.skipped - c.skipped,
+                pending = daily_task_rollups.pending - c.pending
+            FROM (
+                SELECT task_date,
+                    SUM(COALESCE(i.status = 'completed', 0)) AS completed,
+                    SUM(COALESCE(i.status = 'in_progress', 0)) AS in_progress,
+                    SUM(COALESCE(i.status = 'skipped', 0)) AS skipped,
+                    SUM(COALESCE(i.status NOT IN ('completed', 'in_progress', 'skipped'), 1)) AS pending
+                FROM daily_task_instances i WHERE i.daily_task_id = OLD.id
+                GROUP BY task_date
+            ) AS c
+            WHERE daily_task_rollups.user_id = OLD.user_id AND daily_task_rollups.task_date = c.task_date;
+        END
+    ''')
+    cursor.execute('''
+        INSERT INTO daily_task_rollups (user_id, task_date, completed, in_progress, skipped, pending)
+        SELECT t.user_id, i.task_date,
+            SUM(COALESCE(i.status = 'completed', 0)), SUM(COALESCE(i.status = 'in_progress', 0)),
+            SUM(COALESCE(i.status = 'skipped', 0)),
+            SUM(COALESCE(i.status NOT IN ('completed', 'in_progress', 'skipped'), 1))
+        FROM daily_task_instances i
+        JOIN daily_tasks t ON t.id = i.daily_task_id
+        GROUP BY t.user_id, i.task_date
+    ''')
+
+# Migration 14: analytics đếm trạng thái theo ngày từ schedule ghép instance
+def drop_daily_task_rollups(cursor):
+    for trigger in ('daily_rollups_instances_ai', 'daily_rollups_instances_ad',
+                    'daily_rollups_instances_au', 'daily_rollups_tasks_bd'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    cursor.execute('DROP TABLE IF EXISTS daily_task_rollups')
+
+# Ngày đến hạn của từng daily task đang bật của user trong khoảng [:start, :end],
+# cùng quy tắc frequency với generate_daily_task_instances. Ngày bắt đầu là
+# start_date, hoặc ngày tạo task nếu không có start_date. Thứ/ngày trong tháng
+# được tính sẵn một lần cho mỗi ngày và mỗi task (MATERIALIZED) thay vì cho từng cặp.
+_DAILY_SCHEDULE_CTE = '''
+    days(day) AS (
+        SELECT :start UNION ALL SELECT date(day, '+1 day') FROM days WHERE day < :end
+    ),
+    calendar AS MATERIALIZED (
+        SELECT day, strftime('%w', day) AS weekday, strftime('%d', day) AS monthday FROM days
+    ),
+    tasks AS MATERIALIZED (
+        SELECT id, frequency, end_date,
+            COALESCE(start_date, date(created_at)) AS first_day,
+            strftime('%w', COALESCE(start_date, created_at)) AS weekday,
+            strftime('%d', COALESCE(start_date, created_at)) AS monthday
+        FROM daily_tasks
+        WHERE user_id = :user_id AND is_active = 1
+    ),
+    schedule AS (
+        SELECT t.id AS task_id, d.day
+        FROM tasks t
+        JOIN calendar d ON d.day >= t.first_day
+            AND (t.end_date IS NULL OR d.day <= t.end_date)
+            AND (
+                t.frequency IS NULL OR t.frequency = 'daily'
+                OR (t.frequency = 'weekly' AND d.weekday = t.weekday)
+                OR (t.frequency = 'monthly' AND d.monthday = t.monthday)
+            )
+    )
+'''
+
+# Chuỗi liên tiếp trên nguồn (key, day, done) theo kiểu gaps-and-islands: số ngày
+# chưa xong tính dồn tới mỗi ngày không đổi trong một đoạn done liên tục.
+# Chuỗi hiện tại là đoạn chứa ngày đến hạn cuối cùng; nếu ngày đó là :end và
+# chưa xong thì tính tới ngày đến hạn trước đó.
+def _streaks_cte(source):
+    return f'''
+    runs AS (
+        SELECT key, day, done,
+            LEAD(day) OVER by_day AS next_day,
+            SUM(1 - done) OVER by_day AS grp
+        FROM {source}
+        WINDOW by_day AS (PARTITION BY key ORDER BY day)
+    ),
+    islands AS (
+        SELECT key, COUNT(*) AS length, MAX(day) AS last_day
+        FROM runs WHERE done GROUP BY key, grp
+    ),
+    ends AS (
+        SELECT key, MAX(day) AS last_day, MAX(CASE WHEN next_day IS NOT NULL THEN day END) AS prev_day
+        FROM runs GROUP BY key
+    ),
+    streaks AS (
+        SELECT e.key,
+            COALESCE(MAX(s.length), 0) AS longest_streak,
+            COALESCE(MAX(CASE WHEN s.last_day >= CASE WHEN e.last_day = :end
+                THEN COALESCE(e.prev_day, e.last_day) ELSE e.last_day END
+                THEN s.length END), 0) AS current_streak
+        FROM ends e LEFT JOIN islands s ON s.key = e.key
+        GROUP BY e.key
+    )
+'''
+
+# Khoảng ngày tối đa của /api/daily-tasks/analytics
+DAILY_ANALYTICS_MAX_DAYS = 3 * DAILY_TASK_MAX_RANGE_DAYS
+
+# Thống kê daily task trong khoảng start_date..end_date (mặc định 365 ngày tới hôm nay):
+# tỉ lệ hoàn thành theo ngày và theo task, chuỗi ngày liên tiếp và heatmap (mức 0-4)
+@app.route('/api/daily-tasks/analytics', methods=['GET'])
+def get_daily_tasks_analytics():
+    user_email = request.args.get('user_email')
+    
+    if not user_email:
+        return jsonify({'error': 'user_email is required'}), 400
+    
+    try:
+        last = datetime.strptime(request.args.get('end_date') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d')
+        first = datetime.strptime(request.args.get('start_date') or (last - timedelta(days=364)).strftime('%Y-%m-%d'),
+                                  '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date must be YYYY-MM-DD'}), 400
+    if last < first or (last - first).days >= DAILY_ANALYTICS_MAX_DAYS:
+        return jsonify({'error': f'Date range must be 1 to {DAILY_ANALYTICS_MAX_DAYS} days'}), 400
+    start_date, end_date = first.strftime('%Y-%m-%d'), last.strftime('%Y-%m-%d')
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    user = current_member(user_email)
+    if not user:
+        conn.close()
+        return jsonify({'error': 'User not found'}), 404
+    
+    etag = make_etag('daily-analytics', user['id'], get_version(cursor, f"daily-tasks:{user['id']}"),
+                     start_date, end_date)
+    cached = not_modified(etag)
+    if cached:
+        conn.close()
+        return cached
+    
+    params = {'user_id': user['id'], 'start': start_date, 'end': end_date}
+    conn.execute('BEGIN')
+    
+    # Theo ngày: task đến hạn ghép với instance của ngày đó, nên chỉ đếm trạng thái của
+    # task đang bật vào ngày đến hạn (cùng nguồn với thống kê theo task bên dưới)
+    cursor.execute(f'''
+        WITH RECURSIVE {_DAILY_SCHEDULE_CTE},
+        per_day AS (
+            SELECT d.day, COUNT(s.task_id) AS scheduled,
+                COALESCE(SUM(i.status = 'completed'), 0) AS completed,
+                COALESCE(SUM(i.status = 'in_progress'), 0) AS in_progress,
+                COALESCE(SUM(i.status = 'skipped'), 0) AS skipped
+            FROM calendar d
+            LEFT JOIN schedule s ON s.day = d.day
+            LEFT JOIN daily_task_instances i ON i.daily_task_id = s.task_id AND i.task_date = s.day
+            GROUP BY d.day
+        ),
+        perfect AS (
+            SELECT 'user' AS key, day, completed >= scheduled AS done FROM per_day WHERE scheduled > 0
+        ),
+        {_streaks_cte('perfect')}
+        SELECT p.*,
+            (SELECT longest_streak FROM streaks) AS longest_streak,
+            (SELECT current_streak FROM streaks) AS current_streak
+        FROM per_day p
+        ORDER BY p.day
+    ''', params)
+    day_rows = cursor.fetchall()
+    
+    # Theo task: ngày đến hạn ghép với instance của ngày đó
+    cursor.execute(f'''
+        WITH RECURSIVE {_DAILY_SCHEDULE_CTE},
+        task_days AS (
+            SELECT s.task_id AS key, s.day, COALESCE(i.status, 'pending') AS status,
+                COALESCE(i.status = 'completed', 0) AS done
+            FROM schedule s
+            LEFT JOIN daily_task_instances i ON i.daily_task_id = s.task_id AND i.task_date = s.day
+        ),
+        {_streaks_cte('task_days')},
+        totals AS (
+            SELECT key, COUNT(*) AS scheduled,
+                SUM(status = 'completed') AS completed,
+                SUM(status = 'in_progress') AS in_progress,
+                SUM(status = 'skipped') AS skipped
+            FROM task_days GROUP BY key
+        )
+        SELECT t.id, t.title, t.frequency,
+            COALESCE(c.scheduled, 0) AS scheduled,
+            COALESCE(c.completed, 0) AS completed,
+            COALESCE(c.in_progress, 0) AS in_progress,
+            COALESCE(c.skipped, 0) AS skipped,
+            COALESCE(s.current_streak, 0) AS current_streak,
+            COALESCE(s.longest_streak, 0) AS longest_streak
+        FROM daily_tasks t
+        LEFT JOIN totals c ON c.key = t.id
+        LEFT JOIN streaks s ON s.key = t.id
+        WHERE t.user_id = :user_id AND t.is_active = 1
+        ORDER BY t.created_at DESC
+    ''', params)
+    tasks = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    
+    def completion_rate(completed, scheduled):
+        return min(completed / scheduled * 100, 100) if scheduled > 0 else 0
+    
+    days = []
+    heatmap = {}
+    for row in day_rows:
+        day = {
+            'date': row['day'],
+            'scheduled': row['scheduled'],
+            'completed': row['completed'],
+            'in_progress': row['in_progress'],
+            'skipped': row['skipped'],
+            'pending': max(row['scheduled'] - row['completed'] - row['in_progress'] - row['skipped'], 0),
+            'completion_rate': completion_rate(row['completed'], row['scheduled'])
+        }
+        days.append(day)
+        if not row['completed']:
+            heatmap[row['day']] = 0
+        else:
+            heatmap[row['day']] = max(1, row['completed'] * 4 // row['scheduled'])
+    for task in tasks:
+        task['pending'] = task['scheduled'] - task['completed'] - task['in_progress'] - task['skipped']
+        task['completion_rate'] = completion_rate(task['completed'], task['scheduled'])
+    
+    scheduled = sum(day['scheduled'] for day in days)
+    completed = sum(day['completed'] for day in days)
+    return with_etag(jsonify({
+        'start_date': start_date,
+        'end_date': end_date,
+        'totals': {
+            'scheduled': scheduled,
+            'completed': completed,
+            'in_progress': sum(day['in_progress'] for day in days),
+            'skipped': sum(day['skipped'] for day in days),
+            'pending': sum(day['pending'] for day in days),
+            'completion_rate': completion_rate(completed, scheduled),
+            'current_streak': day_rows[0]['current_streak'] or 0,
+            'longest_streak': day_rows[0]['longest_streak'] or 0
+        },
+        'days': days,
+        'tasks': tasks,
+        'heatmap': heatmap
+    }), etag)
+
+# API nội bộ /api/admin/*: request phải gửi header X-Admin-Token đúng bằng
+# SCRUMBOARD_ADMIN_TOKEN. Không đặt biến môi trường thì các API này luôn trả 403
+ADMIN_TOKEN = os.environ.get('SCRUMBOARD_ADMIN_TOKEN', '')
+
+def require_admin_token(func):
+    from functools import wraps
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token', '')
+        if not ADMIN_TOKEN or not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Permission denied. Admin token required.'}), 403
+        return func(*args, **kwargs)
+    return wrapper
+
+# Thống kê nội bộ phục vụ đo hiệu năng
+@app.route('/api/admin/stats', methods=['GET'])
+@require_admin_token
+def get_admin_stats():
+    return jsonify({
+        'board_activity': board_activity.snapshot(),
+        'position_rebalancer': position_rebalancer.snapshot(),
+        'board_cache': board_cache.snapshot(),
+        'board_events': board_events.snapshot(),
+        'widget_cache': widget_cache.snapshot(),
+        'permissions': permissions.snapshot(),
+        'change_watcher': change_watcher.snapshot(),
+        'pid': os.getpid()
+    })
+
+@app.route('/api/admin/widget-cache', methods=['DELETE'])
+@require_admin_token
+def flush_widget_cache():
+    flushed = widget_cache.flush()
+    return jsonify({'message': 'Widget cache flushed', 'flushed': flushed})
+
+# flask --app api audit-indexes; exit code 1 nếu có câu quét toàn bảng lớn hoặc câu
+# không lập được plan. Phần audit nằm trong sql_audit.py
+@app.cli.command('audit-indexes')
+def audit_indexes_command():
+    import sql_audit
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    problems, skipped = sql_audit.audit_query_plans(cursor)
+    conn.close()
+    release_db_connection()
+    for problem in problems:
+        click.echo('line {line} ({function}): {detail} [{table}]'.format(**problem))
+    for statement in skipped:
+        click.echo('not planned line {line} ({function}): {error}'.format(**statement))
+    if problems or skipped:
+        raise SystemExit(1)
+    click.echo('No full scans on large tables.')
+
+# Migration đánh số, mỗi migration chạy đúng một lần trong transaction riêng và được
+# ghi vào schema_version. Chỉ thêm migration mới vào cuối, không sửa migration đã chạy:
+# DDL của mỗi bước được viết cố định trong hàm của bước đó (không dùng hàm/hằng số
+# runtime có thể đổi về sau), thêm index hay đổi trigger là thêm migration mới.
+# DB tạo trước khi có schema_version chạy lại toàn bộ danh sách: các bước đều kiểm tra
+# trước khi tạo nên chỉ bổ sung phần còn thiếu rồi ghi version
+MIGRATIONS = [
+    (1, 'base_schema', migrate_base_schema),
+    (2, 'legacy_columns', migrate_legacy_columns),
+    (3, 'member_indexes', create_member_indexes),
+    (4, 'change_log', migrate_change_log),
+    (5, 'checklist_items', migrate_checklist_items),
+    (6, 'search_index', create_search_index),
+    (7, 'status_counters', create_status_counters),
+    (8, 'entity_versions', migrate_entity_versions),
+    (9, 'daily_task_instances_unique', migrate_daily_task_instances_unique),
+    (10, 'daily_task_rollups', create_daily_task_rollups),
+    (11, 'declared_indexes', create_filter_indexes),
+    (12, 'board_owner_activity_index', create_board_owner_activity_index),
+    (13, 'position_indexes', create_position_indexes),
+    (14, 'drop_daily_task_rollups', drop_daily_task_rollups),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# None nếu DB chưa có bảng schema_version (DB mới hoặc DB cũ chưa baseline)
+def get_schema_version(cursor):
+    try:
+        cursor.execute('SELECT MAX(version) FROM schema_version')
+    except sqlite3.OperationalError:
+        return None
+    return cursor.fetchone()[0] or 0
+
+# Chạy các migration còn thiếu, trả về danh sách version vừa áp dụng. DB đã cập nhật
+# chỉ tốn một câu query nên khởi động không phụ thuộc kích thước DB
+def migrate_database():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    current = get_schema_version(cursor)
+    applied = []
+    if current is not None and current >= SCHEMA_VERSION:
+        conn.close()
+        return applied
+    for version, name, migration in MIGRATIONS:
+        if current is not None and version <= current:
+            continue
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TEXT NOT NULL
+                )
+            ''')
+            # Process khác có thể đã chạy migration này trong lúc chờ write lock
+            cursor.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,))
+            if cursor.fetchone():
+                conn.rollback()
+                continue
+            migration(cursor)
+            cursor.execute('INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)',
+                           (version, name, datetime.now().isoformat()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    conn.close()
+    return applied
+
+# flask --app api migrate
+@app.cli.command('migrate')
+def migrate_command():
+    applied = migrate_database()
+    release_db_connection()
+    for version, name, _ in MIGRATIONS:
+        if version in applied:
+            click.echo(f'Applied {version:03d} {name}')
+    click.echo(f'Schema version {SCHEMA_VERSION}.')
+
+# flask --app api seed
+@app.cli.command('seed')
+def seed_command():
+    migrate_database()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    seed_database(cursor)
+    conn.commit()
+    conn.close()
+    release_db_connection()
+    click.echo('Sample data seeded.')
+
+# Đồng bộ giữa các worker process: board_cache, cache quyền và SSE hub nằm trong từng
+# process, nên mỗi worker chạy một thread theo dõi DB. Khi PRAGMA data_version đổi
+# (có connection khác đã commit), thread đọc change_log mới để phát event SSE và bỏ
+# cache của các board có thay đổi, rồi so version các board còn trong board_cache (bắt
+# các lần đổi version không ghi change_log). Dữ liệu của worker khác
+# hiện ra chậm tối đa SCRUMBOARD_SYNC_INTERVAL giây. Tạo member mới thì cache quyền
+# của email đó ở worker khác vẫn theo AUTHZ_CACHE_TTL
+SYNC_INTERVAL = float(os.environ.get('SCRUMBOARD_SYNC_INTERVAL', '0.25'))
+
+class ChangeWatcher:
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._data_version = None
+        self._seq = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'polls': 0,
+            'syncs': 0,
+            'events': 0,
+            'board_invalidations': 0,
+            'errors': 0
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='change-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except sqlite3.Error:
+                # Lỗi tạm thời (DB bận), lần poll sau đọc lại từ cursor cũ
+                with self._lock:
+                    self.stats['errors'] += 1
+        release_db_connection()
+
+    def poll(self):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA data_version')
+        data_version = cursor.fetchone()[0]
+        with self._lock:
+            self.stats['polls'] += 1
+        if data_version == self._data_version:
+            return 0
+        if self._seq is None:
+            # Lần đầu chỉ lấy mốc, những gì trước đó process này chưa cache
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+            row = cursor.fetchone()
+            self._seq = row['seq'] if row else 0
+            self._data_version = data_version
+            return 0
+        cursor.execute('''
+            SELECT seq, board_id, entity_type FROM change_log
+            WHERE seq > ? ORDER BY seq
+        ''', (self._seq,))
+        latest = {}
+        access_changed = set()
+        for row in cursor.fetchall():
+            latest[row['board_id']] = row['seq']
+            if row['entity_type'] in ('board', 'member'):
+                access_changed.add(row['board_id'])
+        stale = set(latest)
+        cached = {board_id: version for board_id, version in board_cache.versions().items() if board_id not in stale}
+        if cached:
+            rows = _select_in(cursor, 'SELECT scope, version FROM entity_versions WHERE scope IN ({ids})', [],
+                              [f'board:{board_id}' for board_id in cached])
+            current = {row['scope'][len('board:'):]: row['version'] for row in rows}
+            stale.update(board_id for board_id, version in cached.items() if current.get(board_id, 0) != version)
+        for board_id in stale:
+            board_cache.invalidate(board_id)
+        for board_id in access_changed:
+            permissions.invalidate_board(board_id)
+        for board_id, seq in latest.items():
+            board_events.publish(board_id, {'board_id': board_id, 'cursor': seq})
+        if latest:
+            self._seq = max(latest.values())
+        self._data_version = data_version
+        with self._lock:
+            self.stats['syncs'] += 1
+            self.stats['events'] += len(latest)
+            self.stats['board_invalidations'] += len(stale)
+        return len(stale)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        stats['interval'] = self.interval
+        return stats
+
+change_watcher = ChangeWatcher(SYNC_INTERVAL)
+
+# Chạy production: flask --app api serve. Dùng gunicorn với worker gthread (mỗi worker
+# một process, mỗi process nhiều thread); các giá trị mặc định đặt bằng biến môi trường
+SERVE_BIND = os.environ.get('SCRUMBOARD_BIND', '0.0.0.0:5000')
+SERVE_WORKERS = int(os.environ.get('SCRUMBOARD_WORKERS', str(os.cpu_count() or 1)))
+SERVE_THREADS = int(os.environ.get('SCRUMBOARD_THREADS', '8'))
+SERVE_KEEPALIVE = int(os.environ.get('SCRUMBOARD_KEEPALIVE', '5'))
+SERVE_TIMEOUT = int(os.environ.get('SCRUMBOARD_WORKER_TIMEOUT', '60'))
+SERVE_GRACEFUL_TIMEOUT = int(os.environ.get('SCRUMBOARD_GRACEFUL_TIMEOUT', '30'))
+
+def serve_post_worker_init(worker):
+    # SIGTERM: gunicorn chờ các request đang chạy xong, stream SSE thì phải tự kết thúc
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        board_events.close()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+    if worker.cfg.workers > 1:
+        change_watcher.start()
+
+def serve_worker_exit(server, worker):
+    change_watcher.stop()
+    board_activity.flush()
+    release_db_connection()
+
+@app.cli.command('serve')
+@click.option('--bind', default=SERVE_BIND, show_default=True, help='Địa chỉ host:port.')
+@click.option('--workers', type=int, default=SERVE_WORKERS, show_default=True, help='Số worker process.')
+@click.option('--threads', type=int, default=SERVE_THREADS, show_default=True, help='Số thread mỗi worker.')
+@click.option('--keepalive', type=int, default=SERVE_KEEPALIVE, show_default=True,
+              help='Số giây giữ kết nối keep-alive.')
+@click.option('--timeout', type=int, default=SERVE_TIMEOUT, show_default=True,
+              help='Worker treo quá số giây này thì bị khởi động lại.')
+@click.option('--graceful-timeout', type=int, default=SERVE_GRACEFUL_TIMEOUT, show_default=True,
+              help='Số giây chờ request đang chạy khi tắt/reload.')
+@click.option('--request-timeout', type=float, default=REQUEST_TIMEOUT, show_default=True,
+              help='Số giây tối đa cho query SQLite của một request, 0 là không giới hạn.')
+def serve_command(bind, workers, threads, keepalive, timeout, graceful_timeout, request_timeout):
+    global REQUEST_TIMEOUT
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        click.echo('gunicorn is not installed (pip install gunicorn); use python api.py for development.', err=True)
+        raise SystemExit(1)
+
+    class ScrumboardServer(BaseApplication):
+        def load_config(self):
+            for name, value in {
+                'bind': bind,
+                'workers': workers,
+                'worker_class': 'gthread',
+                'threads': threads,
+                'keepalive': keepalive,
+                'timeout': timeout,
+                'graceful_timeout': graceful_timeout,
+                'post_worker_init': serve_post_worker_init,
+                'worker_exit': serve_worker_exit,
+            }.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app
+
+    REQUEST_TIMEOUT = request_timeout
+    # Migrate một lần ở process chính, rồi đóng connection trước khi fork worker
+    migrate_database()
+    release_db_connection()
+    db_pool.close_idle()
+    ScrumboardServer().run()
+
+# Initialize database and run app (server phát triển, production dùng flask --app api serve)
 if __name__ == '__main__':
     migrate_database()
-    init_database()
+    release_db_connection()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,258 @@
+import ast
+import re
+import sqlite3
+
+import api
+
+# Audit index cho api.py: chạy EXPLAIN QUERY PLAN cho mọi câu SQL trong api.py và báo
+# các câu quét toàn bộ (SCAN, kể cả quét hết một index) một bảng lớn. SQL động được
+# dựng lại trước khi lập plan: mẫu "IN ({ids})" của _select_in, f-string được tính với
+# namespace của module api cộng tham số mẫu trong AUDIT_SAMPLES và các biến cục bộ gán
+# trước đó trong hàm, từng chỗ gọi fetch_page (qua build_page_query) và
+# build_search_query với các giá trị order/cursor/fields đại diện. Câu nào không dựng
+# lại hoặc không lập được plan đều là lỗi (trừ AUDIT_NOT_PLANNED). Các hàm
+# migrate/bảo trì trong AUDIT_FULL_SCAN_ALLOWED được phép quét toàn bảng.
+# Chạy bằng: flask --app api audit-indexes, hoặc test tests/test_audit.py
+AUDIT_LARGE_TABLES = {
+    'boards', 'lists', 'cards', 'labels', 'card_labels', 'members', 'board_members',
+    'checklist_items', 'change_log', 'widgets', 'daily_tasks', 'daily_task_instances',
+    'search_docs', 'board_status_counts'
+}
+AUDIT_FULL_SCAN_ALLOWED = {
+    'migrate_legacy_columns', 'migrate_checklist_items', 'migrate_daily_task_instances_unique',
+    'seed_database', 'create_member_indexes', 'create_search_index',
+    'create_status_counters', 'check_status_counts', 'rebuild_status_counts',
+    '_STATUS_COUNTS_SCAN', 'generate_daily_task_instances'
+}
+# Hàm không lập plan được trên schema hiện tại, kèm lý do
+AUDIT_NOT_PLANNED = {
+    'create_daily_task_rollups': 'migration 10, daily_task_rollups dropped by migration 14',
+}
+# Hàm dựng SQL được audit gọi trực tiếp (audit_page_queries, audit_search_queries)
+AUDIT_RENDERED_BUILDERS = {'keyset_conditions', 'build_page_query', 'build_search_query'}
+# Giá trị mẫu cho tham số/biến của hàm dựng f-string, mỗi dict là một biến thể được
+# lập plan riêng. Biến cục bộ gán bằng biểu thức thuần (không gọi hàm ngoài join,
+# list, tuple, sorted, str, len) trước f-string được tính tự động từ các giá trị này
+AUDIT_SAMPLES = {
+    '_position_of': [{'table': table} for table in api.POSITION_SCOPES],
+    '_neighbour_positions': [{'table': table} for table in api.POSITION_SCOPES],
+    'rebalance_positions': [{'table': table} for table in api.POSITION_SCOPES],
+    'update_widget': [{'update_fields': ['title = ?', 'updated_at = ?']}],
+    'update_daily_task': [{'update_fields': ['title = ?', 'updated_at = ?']}],
+    'load_daily_tasks_with_instances': [{'instance_columns': ['id', 'daily_task_id', 'status']}],
+    'upsert_daily_task_instances': [{'status': status} for status in api.DAILY_TASK_STATUS_COLUMNS],
+}
+
+_SQL_STATEMENT = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\s')
+_SQL_TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_SQL_NAMED_PARAM = re.compile(r'(?<![:\w]):([A-Za-z_]\w*)')
+_PURE_CALLS = {'join', 'list', 'tuple', 'sorted', 'str', 'len'}
+
+# Giá trị hằng của một biểu thức trong source: hằng, tuple/list hằng, hoặc tên được gán
+# trong names (list có .append() được gộp sẵn). Phần không tĩnh (tham số request...) là None
+def _audit_value(node, names):
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return [_audit_value(element, names) for element in node.elts]
+    if isinstance(node, ast.Name) and node.id in names:
+        return _audit_value(names[node.id], dict(names, **{node.id: None}))
+    return None
+
+# Các phép gán tên = biểu thức trong body; list gán rồi .append() thêm phần tử được
+# gộp thành một list
+def _audit_names(body, names=None):
+    names = dict(names or {})
+    for node in ast.walk(ast.Module(body=body, type_ignores=[])):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            value = node.value
+            names[node.targets[0].id] = ast.List(elts=list(value.elts)) if isinstance(value, ast.List) else value
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'append'
+              and isinstance(node.func.value, ast.Name) and isinstance(names.get(node.func.value.id), ast.List)
+              and len(node.args) == 1):
+            names[node.func.value.id].elts.append(node.args[0])
+    return names
+
+def _is_pure(node):
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call):
+            func = child.func
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+            if name not in _PURE_CALLS:
+                return False
+    return True
+
+def _evaluate(node, namespace):
+    return eval(compile(ast.Expression(body=node), '<audit>', 'eval'), namespace)
+
+# Tính f-string với namespace của api, tham số mẫu và biến cục bộ thuần gán trước dòng
+# của f-string. Trả về danh sách (câu SQL hoặc None nếu không tính được, lỗi)
+def _render_joined_str(node, function, assigns):
+    rendered = []
+    for sample in AUDIT_SAMPLES.get(function, [{}]):
+        namespace = dict(vars(api), **sample)
+        for assign in assigns:
+            name = assign.targets[0].id
+            if assign.lineno < node.lineno and name not in sample and _is_pure(assign.value):
+                try:
+                    namespace[name] = _evaluate(assign.value, namespace)
+                except Exception:
+                    namespace.pop(name, None)
+        try:
+            sql = _evaluate(node, namespace)
+        except Exception as e:
+            rendered.append((None, f'dynamic SQL is not rendered: {type(e).__name__}: {e}'))
+            continue
+        rendered.append((sql, None) if isinstance(sql, str) else (None, 'f-string is not a string'))
+    return rendered
+
+def _local_assigns(function_node):
+    return sorted(
+        (node for node in ast.walk(function_node)
+         if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)),
+        key=lambda node: node.lineno
+    )
+
+def _walk_functions(source, handle):
+    tree = ast.parse(source)
+    module_names = _audit_names([node for node in tree.body if isinstance(node, ast.Assign)])
+    def visit(node, function, names, assigns):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(child, f'{function}.{child.name}' if function else child.name,
+                      _audit_names(child.body, names), _local_assigns(child))
+            elif isinstance(child, ast.Assign) and function is None and isinstance(child.targets[0], ast.Name):
+                if handle(child, child.targets[0].id, names, []) is not False:
+                    visit(child, child.targets[0].id, names, [])
+            elif handle(child, function, names, assigns) is not False:
+                visit(child, function, names, assigns)
+    visit(tree, None, module_names, [])
+
+def _is_statement(sql):
+    return bool(_SQL_STATEMENT.match(sql)) and 'NEW.' not in sql and 'OLD.' not in sql
+
+# Các chuỗi SQL trong source, kèm tên hàm (hoặc hằng số module) chứa nó và số dòng.
+# Bỏ qua thân trigger (tham chiếu NEW./OLD.) vì không lập plan riêng được. f-string
+# không dựng lại được có sql = None và error
+def extract_sql_statements(source):
+    statements = []
+    def handle(node, function, names, assigns):
+        if isinstance(node, ast.JoinedStr):
+            if (function or '').split('.')[-1] in AUDIT_RENDERED_BUILDERS:
+                return False
+            head = ''.join(value.value for value in node.values if isinstance(value, ast.Constant))
+            for sql, error in _render_joined_str(node, function, assigns):
+                if sql is not None and _is_statement(sql):
+                    statements.append({'function': function, 'line': node.lineno, 'sql': sql})
+                elif sql is None and _is_statement(head):
+                    statements.append({'function': function, 'line': node.lineno, 'sql': None, 'error': error})
+            return False
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            sql = node.value.replace('{ids}', '?, ?')
+            if _is_statement(sql) and '{' not in sql:
+                statements.append({'function': function, 'line': node.lineno, 'sql': sql})
+            return False
+        return None
+    _walk_functions(source, handle)
+    return statements
+
+# Các chỗ gọi fetch_page(cursor, table, alias, where, params, order) với table/alias/
+# where/order tĩnh; where có thể là danh sách nhánh dựng bằng .append()
+def extract_page_calls(source):
+    calls = []
+    def handle(node, function, names, assigns):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'fetch_page'
+                and len(node.args) == 6):
+            table, alias, where, _, order = (_audit_value(arg, names) for arg in node.args[1:])
+            branches = where if isinstance(where, list) else [(where, ())]
+            calls.append({'function': function, 'line': node.lineno, 'table': table, 'alias': alias,
+                          'branches': [(branch[0], ()) for branch in branches], 'order': order})
+    _walk_functions(source, handle)
+    return calls
+
+# Dựng câu của từng chỗ gọi fetch_page: trang đầu, cursor khác NULL và cursor NULL ở các
+# khóa trước rowid; fields mặc định (mọi cột) và một cột. Trang đầu không có điều kiện
+# là bounded: SCAN theo đúng thứ tự ORDER BY dừng sau LIMIT dòng. Trang không có
+# limit/cursor đọc toàn bộ danh sách theo thiết kế nên không được audit
+def audit_page_queries(cursor, source):
+    statements = []
+    for call in extract_page_calls(source):
+        statement = {'function': call['function'], 'line': call['line']}
+        try:
+            columns = api.table_columns(cursor, call['table'])
+            order = [(expr, direction) for expr, direction in call['order']]
+            if not columns or not all(isinstance(where, (str, type(None))) for where, _ in call['branches']):
+                raise ValueError('fetch_page arguments are not static')
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            statements.append(dict(statement, sql=None, error=str(e)))
+            continue
+        cursors = [None, [1] * len(order)]
+        if len(order) > 1:
+            cursors.append([None] * (len(order) - 1) + [1])
+        rendered = set()
+        for selected in (columns, columns[:1]):
+            for values in cursors:
+                sql, _ = api.build_page_query(call['table'], call['alias'], selected, call['branches'], order,
+                                              values, api.PAGE_DEFAULT_LIMIT + 1)
+                if sql not in rendered:
+                    rendered.add(sql)
+                    bounded = values is None and call['branches'] == [(None, ())]
+                    statements.append(dict(statement, sql=sql, bounded=bounded))
+    return statements
+
+# Dựng câu tìm kiếm với mọi tổ hợp bộ lọc board_id/type và cursor
+def audit_search_queries(source):
+    if 'def build_search_query(' not in source:
+        return []
+    line = source[:source.index('def build_search_query(')].count('\n') + 1
+    statements = []
+    for board_id in (None, 'board'):
+        for entity_type in (None, 'card'):
+            for values in (None, [0.0, 1]):
+                sql, _ = api.build_search_query('q', 'member', board_id, entity_type, values,
+                                                api.SEARCH_MAX_LIMIT + 1)
+                statements.append({'function': 'build_search_query', 'line': line, 'sql': sql})
+    return statements
+
+# Trả về (problems, skipped): problems là các câu quét toàn bảng lớn, skipped là các
+# câu không dựng lại hoặc không lập được plan. Cả hai đều là lỗi của audit
+def audit_query_plans(cursor, source=None):
+    if source is None:
+        with open(api.__file__, encoding='utf-8') as f:
+            source = f.read()
+    problems = []
+    skipped = []
+    statements = extract_sql_statements(source) + audit_page_queries(cursor, source) + audit_search_queries(source)
+    for statement in statements:
+        function = statement['function'] or ''
+        if function.split('.')[0] in AUDIT_NOT_PLANNED:
+            continue
+        sql = statement['sql']
+        if sql is None:
+            skipped.append(statement)
+            continue
+        names = set(_SQL_NAMED_PARAM.findall(sql))
+        params = dict.fromkeys(names) if names else [None] * sql.count('?')
+        try:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = cursor.fetchall()
+        except sqlite3.Error as e:
+            skipped.append(dict(statement, error=str(e)))
+            continue
+        if function.split('.')[0] in AUDIT_FULL_SCAN_ALLOWED:
+            continue
+        if statement.get('bounded') and not any('TEMP B-TREE' in row['detail'] for row in plan):
+            continue
+        # Một alias có thể trỏ tới nhiều bảng (CTE và câu chính dùng cùng alias): chỉ báo khi
+        # mọi bảng của alias đều lớn
+        tables = {}
+        for table, alias in _SQL_TABLE_REF.findall(sql):
+            tables.setdefault(table, set()).add(table)
+            if alias:
+                tables.setdefault(alias, set()).add(table)
+        for row in plan:
+            match = re.match(r'SCAN (\w+)', row['detail'])
+            scanned = tables.get(match.group(1), {match.group(1)}) if match else set()
+            if scanned and scanned <= AUDIT_LARGE_TABLES:
+                problems.append(dict(statement, table=', '.join(sorted(scanned)), detail=row['detail']))
+    return problems, skipped
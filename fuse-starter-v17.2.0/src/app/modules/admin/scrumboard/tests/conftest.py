@@ -0,0 +1,74 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+SCRUMBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRUMBOARD_DIR)
+
+import api  # noqa: E402
+
+
+# Mỗi test chạy trên một bản sao đã migrate của scrumboard.db, với cache và
+# tracker mới để trạng thái trong process không lọt từ test này sang test khác
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = tmp_path / 'scrumboard.db'
+    shutil.copy(os.path.join(SCRUMBOARD_DIR, 'scrumboard.db'), path)
+    api.release_db_connection()
+    api.db_pool.close_idle()
+    monkeypatch.setattr(api, 'DATABASE', str(path))
+    monkeypatch.setattr(api, '_table_columns', {})
+    monkeypatch.setattr(api, 'board_cache', api.BoardCache(api.BOARD_CACHE_MAX_ENTRIES, api.BOARD_CACHE_MAX_BYTES))
+    monkeypatch.setattr(api, 'permissions', api.PermissionResolver(api.AUTHZ_CACHE_MAX_ENTRIES, api.AUTHZ_CACHE_TTL))
+    monkeypatch.setattr(api, 'widget_cache', api.WidgetDataCache(
+        api.WIDGET_CACHE_MAX_ENTRIES, api.WIDGET_CACHE_MAX_BYTES, api.WIDGET_CACHE_TTLS, api.WIDGET_CACHE_DEFAULT_TTL))
+    monkeypatch.setattr(api, 'board_activity', api.BoardActivityTracker(api.BOARD_ACTIVITY_INTERVAL))
+    monkeypatch.setattr(api, 'position_rebalancer', api.PositionRebalancer(api.POSITION_REBALANCE_DELAY))
+    api.migrate_database()
+    api.release_db_connection()
+    yield path
+    # Ghi nốt phần background còn chờ khi DATABASE vẫn trỏ vào bản sao của test
+    api.board_activity.flush()
+    api.position_rebalancer.flush()
+    api.release_db_connection()
+    api.db_pool.close_idle()
+
+
+@pytest.fixture
+def client(db):
+    return api.app.test_client()
+
+
+# Chạy hàm với connection của thread hiện tại (connection mà request trong test client dùng)
+@pytest.fixture
+def query(db):
+    def run(sql, params=()):
+        conn = api.get_db_connection()
+        rows = [dict(row) for row in conn.execute(sql, params).fetchall()]
+        conn.close()
+        api.release_db_connection()
+        return rows
+    return run
+
+
+USER_EMAIL = 'user@example.com'
+
+
+def create_board(client, title='Board', owner_email=USER_EMAIL):
+    response = client.post('/api/boards', json={'title': title, 'owner_email': owner_email})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def create_list(client, board_id, title='List'):
+    response = client.post(f'/api/boards/{board_id}/lists', json={'title': title})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def create_card(client, list_id, title='Card', **fields):
+    response = client.post(f'/api/lists/{list_id}/cards', json=dict(fields, title=title))
+    assert response.status_code == 201
+    return response.get_json()['id']
@@ -0,0 +1,20 @@
+import pytest
+
+import api
+
+ADMIN_ENDPOINTS = [('get', '/api/admin/stats'), ('delete', '/api/admin/widget-cache')]
+
+
+@pytest.mark.parametrize('method, url', ADMIN_ENDPOINTS)
+def test_admin_endpoints_are_closed_without_configured_token(client, monkeypatch, method, url):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', '')
+    assert getattr(client, method)(url).status_code == 403
+    assert getattr(client, method)(url, headers={'X-Admin-Token': ''}).status_code == 403
+
+
+@pytest.mark.parametrize('method, url', ADMIN_ENDPOINTS)
+def test_admin_endpoints_require_matching_token(client, monkeypatch, method, url):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', 'secret')
+    assert getattr(client, method)(url).status_code == 403
+    assert getattr(client, method)(url, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert getattr(client, method)(url, headers={'X-Admin-Token': 'secret'}).status_code == 200
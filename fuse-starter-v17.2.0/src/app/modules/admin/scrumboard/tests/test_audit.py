@@ -0,0 +1,36 @@
+import api
+import sql_audit
+
+
+def _audit(source=None):
+    conn = api.get_db_connection()
+    try:
+        return sql_audit.audit_query_plans(conn.cursor(), source)
+    finally:
+        conn.close()
+        api.release_db_connection()
+
+
+def test_every_statement_is_planned_without_full_scans(db):
+    problems, skipped = _audit()
+    assert problems == []
+    assert skipped == []
+    assert api.app.test_cli_runner().invoke(args=['audit-indexes']).exit_code == 0
+
+
+def test_dropped_index_is_reported(db, query):
+    query('DROP INDEX idx_cards_list_id')
+    query('DROP INDEX idx_cards_list_position')
+    problems, _ = _audit()
+    assert any(problem['table'] == 'cards' for problem in problems)
+    assert api.app.test_cli_runner().invoke(args=['audit-indexes']).exit_code == 1
+
+
+def test_unrenderable_statement_is_a_failure(db):
+    source = (
+        'def load(cursor, table):\n'
+        '    cursor.execute(f"SELECT id FROM {table} WHERE id = ?", (1,))\n'
+    )
+    problems, skipped = _audit(source)
+    assert problems == []
+    assert [(statement['function'], statement['line']) for statement in skipped] == [('load', 2)]
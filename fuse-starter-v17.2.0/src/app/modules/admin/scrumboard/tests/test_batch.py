@@ -0,0 +1,44 @@
+import pytest
+
+from conftest import create_board, create_list
+
+
+@pytest.mark.parametrize('body', [[{'op': 'list.create'}], 'operations', 1])
+def test_batch_body_must_be_an_object(client, body):
+    response = client.post('/api/batch', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_failing_operation_rolls_back_the_batch(client, query):
+    board_id = create_board(client)
+    list_id = create_list(client, board_id, 'Existing')
+    before = query('SELECT COUNT(*) AS n FROM change_log')[0]['n']
+
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'list.create', 'board_id': board_id, 'title': 'New list'},
+        {'op': 'card.create', 'list_id': '$0', 'title': 'New card'},
+        {'op': 'list.update', 'list_id': list_id, 'title': 'Renamed'},
+        {'op': 'card.delete', 'card_id': 'missing-card'},
+    ]})
+
+    assert response.status_code == 404
+    body = response.get_json()
+    assert body['failed_index'] == 3
+    assert [result['status'] for result in body['results']] == [201, 201, 200, 404]
+    assert query('SELECT title FROM lists WHERE board_id = ?', (board_id,)) == [{'title': 'Existing'}]
+    assert query('SELECT COUNT(*) AS n FROM cards WHERE board_id = ?', (board_id,))[0]['n'] == 0
+    assert query('SELECT COUNT(*) AS n FROM change_log')[0]['n'] == before
+
+
+def test_batch_commits_all_operations(client, query):
+    board_id = create_board(client)
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'list.create', 'board_id': board_id, 'title': 'New list'},
+        {'op': 'card.create', 'list_id': '$0', 'title': 'New card'},
+    ]})
+    assert response.status_code == 200
+    list_id = response.get_json()['results'][0]['result']['id']
+    assert query('SELECT list_id, title FROM cards WHERE board_id = ?', (board_id,)) == [
+        {'list_id': list_id, 'title': 'New card'}
+    ]
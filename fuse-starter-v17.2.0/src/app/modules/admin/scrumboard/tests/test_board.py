@@ -0,0 +1,33 @@
+import api
+from conftest import create_board, create_card, create_list
+
+
+def _get_board_statements(client, board_id):
+    statements = []
+    conn = api.get_db_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        api.board_cache.invalidate(board_id)
+        response = client.get(f'/api/boards/{board_id}')
+    finally:
+        conn.set_trace_callback(None)
+    assert response.status_code == 200
+    return response.get_json(), [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+
+
+def test_get_board_query_count_does_not_grow_with_board(client):
+    small = create_board(client, 'Small')
+    create_card(client, create_list(client, small))
+    large = create_board(client, 'Large')
+    for i in range(5):
+        list_id = create_list(client, large, f'List {i}')
+        for j in range(4):
+            create_card(client, list_id, f'Card {i}.{j}', checklist_items=[{'text': 'item', 'checked': j % 2}])
+
+    small_board, small_queries = _get_board_statements(client, small)
+    large_board, large_queries = _get_board_statements(client, large)
+
+    assert len(small_board['lists']) == 1
+    assert sum(len(lst['cards']) for lst in large_board['lists']) == 20
+    assert all(len(card['checklist_items']) == 1 for lst in large_board['lists'] for card in lst['cards'])
+    assert len(large_queries) == len(small_queries)
@@ -0,0 +1,56 @@
+import api
+from conftest import create_board
+
+
+def test_inline_write_is_recorded_only_after_commit(client):
+    board_id = create_board(client)
+    tracker = api.BoardActivityTracker(60)
+
+    conn = api.get_db_connection()
+    tracker.touch(conn.cursor(), board_id)
+    conn.rollback()
+    assert board_id not in tracker._last_write
+
+    tracker.touch(conn.cursor(), board_id)
+    conn.commit()
+    assert board_id in tracker._last_write
+    assert tracker.snapshot()['inline_writes'] == 2
+
+    # Trong cùng interval thì chỉ gộp vào hàng chờ
+    tracker.touch(conn.cursor(), board_id)
+    conn.commit()
+    api.release_db_connection()
+    assert tracker.snapshot()['coalesced'] == 1
+    assert tracker.snapshot()['pending'] == 1
+
+
+def test_flush_keeps_board_cache_and_bumps_board_list_version(client, query):
+    board_id = create_board(client)
+    etag = client.get(f'/api/boards/{board_id}').headers['ETag']
+    assert api.board_cache.versions()
+    versions = {row['scope']: row['version'] for row in query('SELECT scope, version FROM entity_versions')}
+
+    tracker = api.BoardActivityTracker(60)
+    tracker._pending[board_id] = '2100-01-01T00:00:00'
+    assert tracker.flush() == 1
+
+    after = {row['scope']: row['version'] for row in query('SELECT scope, version FROM entity_versions')}
+    assert after[f'board:{board_id}'] == versions[f'board:{board_id}']
+    assert after['boards'] == versions['boards'] + 1
+    assert board_id in api.board_cache.versions()
+    assert client.get(f'/api/boards/{board_id}').headers['ETag'] == etag
+    assert query('SELECT last_activity FROM boards WHERE id = ?', (board_id,))[0]['last_activity'] == '2100-01-01T00:00:00'
+    assert tracker.snapshot()['pending'] == 0
+    assert board_id in tracker._last_write
+
+
+def test_last_write_is_pruned(db, monkeypatch):
+    monkeypatch.setattr(api, 'BOARD_ACTIVITY_PRUNE_AT', 8)
+    tracker = api.BoardActivityTracker(0)
+    conn = api.get_db_connection()
+    for i in range(50):
+        tracker.touch(conn.cursor(), f'board-{i}')
+        conn.commit()
+    api.release_db_connection()
+    assert tracker.snapshot()['tracked'] <= 8
+    assert tracker.snapshot()['inline_writes'] == 50
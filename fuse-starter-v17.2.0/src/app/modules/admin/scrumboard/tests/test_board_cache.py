@@ -0,0 +1,89 @@
+import pytest
+
+import api
+from conftest import USER_EMAIL, create_board, create_card, create_list
+
+
+@pytest.fixture
+def board(client, query):
+    board_id = create_board(client)
+    list_id = create_list(client, board_id, 'Todo')
+    other_list_id = create_list(client, board_id, 'Done')
+    card_id = create_card(client, list_id, checklist_items=[{'text': 'item'}])
+    other_card_id = create_card(client, list_id, 'Other')
+    label_id = client.post(f'/api/boards/{board_id}/labels', json={'title': 'Bug'}).get_json()['id']
+    item_id = query('SELECT id FROM checklist_items WHERE card_id = ?', (card_id,))[0]['id']
+    member_id = query("SELECT id FROM members WHERE email = 'company@example.com'")[0]['id']
+    return {
+        'board': board_id, 'list': list_id, 'other_list': other_list_id, 'card': card_id,
+        'other_card': other_card_id, 'label': label_id, 'item': item_id, 'member': member_id
+    }
+
+
+WRITES = {
+    'update_board': lambda c, b: c.put(f"/api/boards/{b['board']}", json={'title': 'Renamed'}),
+    'create_list': lambda c, b: c.post(f"/api/boards/{b['board']}/lists", json={'title': 'New'}),
+    'update_list': lambda c, b: c.put(f"/api/lists/{b['list']}", json={'title': 'Renamed'}),
+    'archive_list': lambda c, b: c.put(f"/api/lists/{b['other_list']}/archive"),
+    'delete_list': lambda c, b: c.delete(f"/api/lists/{b['other_list']}"),
+    'reorder_lists': lambda c, b: c.put(f"/api/boards/{b['board']}/lists/reorder",
+                                        json={'list_ids': [b['other_list'], b['list']]}),
+    'move_list_position': lambda c, b: c.put(f"/api/lists/{b['other_list']}/position", json={'index': 0}),
+    'create_card': lambda c, b: c.post(f"/api/lists/{b['list']}/cards", json={'title': 'New'}),
+    'update_card': lambda c, b: c.put(f"/api/cards/{b['card']}", json={'title': 'Renamed', 'list_id': b['list']}),
+    'archive_card': lambda c, b: c.put(f"/api/cards/{b['card']}/archive"),
+    'delete_card': lambda c, b: c.delete(f"/api/cards/{b['card']}"),
+    'copy_card': lambda c, b: c.post(f"/api/cards/{b['card']}/copy",
+                                     json={'list_id': b['other_list'], 'board_id': b['board']}),
+    'move_card': lambda c, b: c.put(f"/api/cards/{b['card']}/move",
+                                    json={'list_id': b['other_list'], 'board_id': b['board']}),
+    'move_card_position': lambda c, b: c.put(f"/api/cards/{b['card']}/position", json={'after_id': b['other_card']}),
+    'reorder_cards': lambda c, b: c.put(f"/api/lists/{b['list']}/cards/reorder",
+                                        json={'card_ids': [b['other_card'], b['card']]}),
+    'create_label': lambda c, b: c.post(f"/api/boards/{b['board']}/labels", json={'title': 'Feature'}),
+    'add_card_label': lambda c, b: c.post(f"/api/cards/{b['card']}/labels/{b['label']}"),
+    'add_checklist_item': lambda c, b: c.post(f"/api/cards/{b['card']}/checklist", json={'text': 'more'}),
+    'update_checklist_item': lambda c, b: c.put(f"/api/cards/{b['card']}/checklist/{b['item']}",
+                                                json={'text': 'item', 'checked': True}),
+    'delete_checklist_item': lambda c, b: c.delete(f"/api/cards/{b['card']}/checklist/{b['item']}"),
+    'add_member': lambda c, b: c.post(f"/api/boards/{b['board']}/members/{b['member']}?user_email={USER_EMAIL}",
+                                      json={'role': 'member'}),
+    'batch': lambda c, b: c.post('/api/batch', json={'operations': [
+        {'op': 'card.update', 'card_id': b['card'], 'list_id': b['list'], 'title': 'Batched'}]}),
+}
+
+
+def test_repeated_get_is_served_from_cache(client, board):
+    api.board_cache.invalidate(board['board'])
+    first = client.get(f"/api/boards/{board['board']}")
+    second = client.get(f"/api/boards/{board['board']}")
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    stats = api.board_cache.snapshot()
+    assert (stats['misses'], stats['hits']) == (1, 1)
+
+
+@pytest.mark.parametrize('write', sorted(WRITES))
+def test_write_invalidates_cached_board(client, board, write):
+    url = f"/api/boards/{board['board']}"
+    before = client.get(url)
+    assert board['board'] in api.board_cache.versions()
+
+    response = WRITES[write](client, board)
+    assert response.status_code in (200, 201), response.get_json()
+
+    assert board['board'] not in api.board_cache.versions()
+    misses = api.board_cache.snapshot()['misses']
+    after = client.get(url)
+    assert api.board_cache.snapshot()['misses'] == misses + 1
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.get_data() != before.get_data()
+
+
+def test_rolled_back_write_keeps_cached_board(client, board):
+    client.get(f"/api/boards/{board['board']}")
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'card.update', 'card_id': board['card'], 'list_id': board['list'], 'title': 'Batched'},
+        {'op': 'card.delete', 'card_id': 'missing-card'}]})
+    assert response.status_code == 404
+    assert board['board'] in api.board_cache.versions()
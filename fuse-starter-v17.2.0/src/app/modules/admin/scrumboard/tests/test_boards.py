@@ -0,0 +1,29 @@
+from conftest import USER_EMAIL, create_board
+
+
+def _board_ids(client, email):
+    response = client.get(f'/api/boards?email={email}')
+    assert response.status_code == 200
+    return {board['id'] for board in response.get_json()}
+
+
+def test_boards_are_resolved_by_email_not_display_name(client):
+    response = client.post('/api/members', json={'name': USER_EMAIL, 'email': 'impostor@example.com'})
+    assert response.status_code == 201
+    own = create_board(client, 'Own')
+    impostor = create_board(client, 'Impostor', owner_email='impostor@example.com')
+
+    assert own in _board_ids(client, USER_EMAIL)
+    assert impostor not in _board_ids(client, USER_EMAIL)
+    assert impostor in _board_ids(client, 'impostor@example.com')
+    assert not {own, impostor} & _board_ids(client, 'nobody@example.com')
+
+
+def test_board_owner_is_resolved_by_email(client, query):
+    client.post('/api/members', json={'name': 'Display Name', 'email': 'display@example.com'})
+    by_name = create_board(client, 'By name', owner_email='Display Name')
+    by_email = create_board(client, 'By email', owner_email='display@example.com')
+    owners = {row['id']: row['owner_id'] for row in query(
+        'SELECT id, owner_id FROM boards WHERE id IN (?, ?)', (by_name, by_email))}
+    member_id = query("SELECT id FROM members WHERE email = 'display@example.com'")[0]['id']
+    assert owners == {by_name: None, by_email: member_id}
@@ -0,0 +1,79 @@
+from conftest import USER_EMAIL
+
+
+def _create_task(client, title='Task', email=USER_EMAIL, frequency='daily'):
+    response = client.post('/api/daily-tasks', json={
+        'user_email': email, 'title': title, 'frequency': frequency, 'start_date': '2026-10-01'})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def test_repeated_check_ins_keep_one_instance_per_day(client, query):
+    task_id = _create_task(client)
+    other_id = _create_task(client, 'Other')
+    for date in ['2026-10-05', '2026-10-06']:
+        for action in ['start', 'complete', 'start', 'skip', 'start', 'complete', 'complete']:
+            response = client.post(f'/api/daily-tasks/{task_id}/{action}',
+                                   json={'user_email': USER_EMAIL, 'date': date, 'notes': action})
+            assert response.status_code == 200
+        for status in ['in_progress', 'completed', 'completed']:
+            response = client.post('/api/daily-tasks/bulk-status', json={
+                'user_email': USER_EMAIL, 'date': date,
+                'updates': [{'task_id': task_id, 'status': status}, {'task_id': other_id, 'status': status}]})
+            assert response.status_code == 200
+
+    duplicates = query('''
+        SELECT daily_task_id, task_date, COUNT(*) AS n FROM daily_task_instances
+        GROUP BY daily_task_id, task_date HAVING COUNT(*) > 1
+    ''')
+    assert duplicates == []
+    rows = query('''
+        SELECT daily_task_id, task_date, status FROM daily_task_instances
+        WHERE daily_task_id IN (?, ?) ORDER BY task_date, daily_task_id = ?
+    ''', (task_id, other_id, task_id))
+    assert rows == [
+        {'daily_task_id': other_id, 'task_date': '2026-10-05', 'status': 'completed'},
+        {'daily_task_id': task_id, 'task_date': '2026-10-05', 'status': 'completed'},
+        {'daily_task_id': other_id, 'task_date': '2026-10-06', 'status': 'completed'},
+        {'daily_task_id': task_id, 'task_date': '2026-10-06', 'status': 'completed'},
+    ]
+
+
+def test_instances_are_unique_per_task_and_day(client, query):
+    index = [row for row in query("PRAGMA index_list(daily_task_instances)") if row["unique"]]
+    columns = [
+        [column['name'] for column in query(f"PRAGMA index_info({row['name']})")] for row in index
+    ]
+    assert ['daily_task_id', 'task_date'] in columns
+
+
+def _complete(client, email, task_id, date):
+    response = client.post(f'/api/daily-tasks/{task_id}/complete', json={'user_email': email, 'date': date})
+    assert response.status_code == 200
+
+
+def test_analytics_counts_only_active_tasks_on_due_days(client):
+    email = 'analytics@example.com'
+    assert client.post('/api/members', json={'name': 'Analytics', 'email': email}).status_code == 201
+    active = _create_task(client, 'Active', email)
+    inactive = _create_task(client, 'Inactive', email)
+    # 2026-10-01 là thứ Năm: task weekly chỉ đến hạn ngày 01
+    weekly = _create_task(client, 'Weekly', email, 'weekly')
+    _complete(client, email, inactive, '2026-10-02')
+    _complete(client, email, weekly, '2026-10-02')
+    _complete(client, email, active, '2026-10-03')
+    response = client.put(f'/api/daily-tasks/{inactive}', json={'user_email': email, 'is_active': 0})
+    assert response.status_code == 200
+
+    response = client.get(f'/api/daily-tasks/analytics?user_email={email}&start_date=2026-10-01&end_date=2026-10-03')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [(day['date'], day['scheduled'], day['completed'], day['pending']) for day in body['days']] == [
+        ('2026-10-01', 2, 0, 2),
+        ('2026-10-02', 1, 0, 1),
+        ('2026-10-03', 1, 1, 0),
+    ]
+    assert body['heatmap'] == {'2026-10-01': 0, '2026-10-02': 0, '2026-10-03': 4}
+    assert (body['totals']['longest_streak'], body['totals']['current_streak']) == (1, 1)
+    assert {task['title']: task['completed'] for task in body['tasks']} == {'Active': 1, 'Weekly': 0}
@@ -0,0 +1,38 @@
+import json
+
+from conftest import create_board, create_card, create_list
+
+
+def _update_dependencies(client, list_id, card_id, dependencies):
+    return client.put(f'/api/cards/{card_id}', json={
+        'title': 'Card', 'list_id': list_id, 'dependencies': json.dumps(dependencies)})
+
+
+def test_cycle_is_rejected_with_its_path(client, query):
+    list_id = create_list(client, create_board(client))
+    a = create_card(client, list_id, 'A')
+    b = create_card(client, list_id, 'B', dependencies=json.dumps([a]))
+    c = create_card(client, list_id, 'C', dependencies=json.dumps([b]))
+
+    response = _update_dependencies(client, list_id, a, [c])
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Dependencies would create a cycle: ' + ' -> '.join([a, c, b, a])
+    assert query('SELECT dependencies FROM cards WHERE id = ?', (a,))[0]['dependencies'] is None
+
+
+def test_self_dependency_is_rejected(client):
+    list_id = create_list(client, create_board(client))
+    a = create_card(client, list_id, 'A')
+    response = _update_dependencies(client, list_id, a, [a])
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'Dependencies would create a cycle: {a} -> {a}'
+
+
+def test_acyclic_dependencies_are_saved(client, query):
+    list_id = create_list(client, create_board(client))
+    a = create_card(client, list_id, 'A')
+    b = create_card(client, list_id, 'B', dependencies=json.dumps([a]))
+    c = create_card(client, list_id, 'C')
+    assert _update_dependencies(client, list_id, c, [a, b]).status_code == 200
+    assert json.loads(query('SELECT dependencies FROM cards WHERE id = ?', (c,))[0]['dependencies']) == [a, b]
@@ -0,0 +1,36 @@
+import api
+
+
+def _create_members(client, count):
+    for i in range(count):
+        response = client.post('/api/members', json={'name': f'Page {i}', 'email': f'page{i}@example.com'})
+        assert response.status_code == 201
+
+
+def test_list_without_limit_or_cursor_is_not_truncated(client, query, monkeypatch):
+    monkeypatch.setattr(api, 'PAGE_DEFAULT_LIMIT', 2)
+    _create_members(client, 3)
+    response = client.get('/api/members')
+    assert response.status_code == 200
+    assert 'X-Next-Cursor' not in response.headers
+    assert len(response.get_json()) == query('SELECT COUNT(*) AS n FROM members')[0]['n']
+
+
+def test_limit_and_cursor_walk_every_page(client, query, monkeypatch):
+    monkeypatch.setattr(api, 'PAGE_DEFAULT_LIMIT', 2)
+    _create_members(client, 3)
+    response = client.get('/api/members?limit=3&fields=id')
+    ids = [member['id'] for member in response.get_json()]
+    assert len(ids) == 3
+    while 'X-Next-Cursor' in response.headers:
+        # Trang sau không có limit thì dùng PAGE_DEFAULT_LIMIT
+        response = client.get(f"/api/members?fields=id&cursor={response.headers['X-Next-Cursor']}")
+        page = response.get_json()
+        assert 0 < len(page) <= 2
+        ids += [member['id'] for member in page]
+    assert ids == [row['id'] for row in query('SELECT id FROM members ORDER BY rowid')]
+
+
+def test_invalid_limit_is_rejected(client):
+    assert client.get('/api/members?limit=0').status_code == 400
+    assert client.get('/api/members?limit=x').status_code == 400
@@ -0,0 +1,59 @@
+import api
+from conftest import USER_EMAIL, create_board
+
+MEMBER_EMAIL = 'company@example.com'
+
+
+def _member_id(query, email):
+    return query('SELECT id FROM members WHERE email = ?', (email,))[0]['id']
+
+
+def test_role_change_and_removal_invalidate_cached_permissions(client, query):
+    board_id = create_board(client)
+    member_id = _member_id(query, MEMBER_EMAIL)
+    other_id = _member_id(query, 'department@example.com')
+    members_url = f'/api/boards/{board_id}/members?user_email={MEMBER_EMAIL}'
+    add_other_url = f'/api/boards/{board_id}/members/{other_id}?user_email={MEMBER_EMAIL}'
+    role_url = f'/api/boards/{board_id}/members/{member_id}/role?user_email={USER_EMAIL}'
+
+    assert client.get(members_url).status_code == 403
+    response = client.post(f'/api/boards/{board_id}/members/{member_id}?user_email={USER_EMAIL}',
+                           json={'role': 'member'})
+    assert response.status_code == 200
+    assert client.get(members_url).status_code == 200
+    assert client.post(add_other_url, json={'role': 'member'}).status_code == 403
+    hits = api.permissions.snapshot()['hits']
+    assert client.post(add_other_url, json={'role': 'member'}).status_code == 403
+    assert api.permissions.snapshot()['hits'] > hits
+
+    assert client.put(role_url, json={'role': 'admin'}).status_code == 200
+    assert client.post(add_other_url, json={'role': 'member'}).status_code == 200
+
+    assert client.put(role_url, json={'role': 'member'}).status_code == 200
+    remove_other_url = f'/api/boards/{board_id}/members/{other_id}'
+    assert client.delete(remove_other_url).status_code == 200
+    assert client.post(add_other_url, json={'role': 'member'}).status_code == 403
+
+    assert client.delete(f'/api/boards/{board_id}/members/{member_id}').status_code == 200
+    assert client.get(members_url).status_code == 403
+
+
+def test_rolled_back_role_change_keeps_cached_permissions(client, query):
+    board_id = create_board(client)
+    member_id = _member_id(query, MEMBER_EMAIL)
+    client.post(f'/api/boards/{board_id}/members/{member_id}?user_email={USER_EMAIL}', json={'role': 'member'})
+    assert client.get(f'/api/boards/{board_id}/members?user_email={MEMBER_EMAIL}').status_code == 200
+    invalidations = api.permissions.snapshot()['invalidations']
+
+    conn = api.get_db_connection()
+    api.invalidate_board_permissions(conn.cursor(), board_id)
+    conn.rollback()
+    api.release_db_connection()
+
+    assert api.permissions.snapshot()['invalidations'] == invalidations
+
+    conn = api.get_db_connection()
+    api.invalidate_board_permissions(conn.cursor(), board_id)
+    conn.commit()
+    api.release_db_connection()
+    assert api.permissions.snapshot()['invalidations'] == invalidations + 1
@@ -0,0 +1,79 @@
+import api
+from conftest import create_board, create_card, create_list
+
+
+def _set_positions(positions):
+    conn = api.get_db_connection()
+    conn.executemany('UPDATE cards SET position = ? WHERE id = ?', [(p, card_id) for card_id, p in positions.items()])
+    conn.commit()
+    api.release_db_connection()
+
+
+def _cards(query, list_id):
+    return query('SELECT id, position FROM cards WHERE list_id = ? ORDER BY position, rowid', (list_id,))
+
+
+def _setup(client):
+    board_id = create_board(client)
+    list_id = create_list(client, board_id)
+    a, b, c = (create_card(client, list_id, title) for title in 'ABC')
+    return board_id, list_id, a, b, c
+
+
+def test_move_into_tie_rebalances_inline(client, query):
+    board_id, list_id, a, b, c = _setup(client)
+    _set_positions({a: 1, b: 2, c: 3})
+    seq = query('SELECT MAX(seq) AS seq FROM change_log')[0]['seq']
+
+    response = client.put(f'/api/cards/{c}/position', json={'after_id': a})
+    assert response.status_code == 200
+    assert response.get_json()['rebalanced'] is True
+
+    cards = _cards(query, list_id)
+    assert [card['id'] for card in cards] == [a, c, b]
+    assert [card['id'] for card in cards if card['position'] % api.POSITION_STEP] == [c]
+    changed = {row['entity_id'] for row in query(
+        "SELECT entity_id FROM change_log WHERE seq > ? AND entity_type = 'card'", (seq,))}
+    assert changed == {a, b, c}
+    assert api.position_rebalancer.snapshot()['inline'] == 1
+
+
+def test_small_gap_is_rebalanced_in_background(client, query, monkeypatch):
+    monkeypatch.setattr(api, 'position_rebalancer', api.PositionRebalancer(3600))
+    board_id, list_id, a, b, c = _setup(client)
+    _set_positions({a: api.POSITION_STEP, b: api.POSITION_STEP + 40, c: 3 * api.POSITION_STEP})
+
+    response = client.put(f'/api/cards/{c}/position', json={'after_id': a})
+    assert response.get_json() == {'id': c, 'list_id': list_id, 'position': api.POSITION_STEP + 20, 'rebalanced': False}
+    assert api.position_rebalancer.snapshot()['pending'] == 1
+
+    client.get(f'/api/boards/{board_id}')
+    assert board_id in api.board_cache.versions()
+    seq = query('SELECT MAX(seq) AS seq FROM change_log')[0]['seq']
+    assert api.position_rebalancer.flush() == 1
+
+    cards = _cards(query, list_id)
+    assert cards == [
+        {'id': a, 'position': api.POSITION_STEP},
+        {'id': c, 'position': 2 * api.POSITION_STEP},
+        {'id': b, 'position': 3 * api.POSITION_STEP},
+    ]
+    assert board_id not in api.board_cache.versions()
+    changed = {row['entity_id'] for row in query(
+        "SELECT entity_id FROM change_log WHERE seq > ? AND entity_type = 'card'", (seq,))}
+    assert changed == {a, b, c}
+    assert api.position_rebalancer.snapshot() == {
+        'scheduled': 1, 'inline': 0, 'rebalanced_scopes': 1, 'rewritten': 3, 'flush_errors': 0, 'pending': 0
+    }
+
+
+def test_rolled_back_move_does_not_schedule(client, query, monkeypatch):
+    monkeypatch.setattr(api, 'position_rebalancer', api.PositionRebalancer(3600))
+    board_id, list_id, a, b, c = _setup(client)
+    _set_positions({a: api.POSITION_STEP, b: api.POSITION_STEP + 40, c: 3 * api.POSITION_STEP})
+
+    conn = api.get_db_connection()
+    api.place_item(conn.cursor(), 'cards', c, list_id, after_id=a)
+    conn.rollback()
+    api.release_db_connection()
+    assert api.position_rebalancer.snapshot()['pending'] == 0
@@ -0,0 +1,52 @@
+import api
+from conftest import create_board, create_card, create_list
+
+
+def _mismatches():
+    conn = api.get_db_connection()
+    mismatches = api.check_status_counts(conn.cursor())
+    conn.close()
+    api.release_db_connection()
+    return mismatches
+
+
+def test_counters_match_full_scan_after_card_writes(client, query):
+    assert _mismatches() == []
+    board_id = create_board(client)
+    other_board_id = create_board(client, 'Other')
+    list_id = create_list(client, board_id)
+    other_list_id = create_list(client, other_board_id)
+    cards = [create_card(client, list_id, f'Card {i}', status=status)
+             for i, status in enumerate(['todo', 'todo', 'in_progress', 'done', None])]
+    assert _mismatches() == []
+
+    steps = [
+        lambda: client.put(f'/api/cards/{cards[0]}', json={'title': 'Card 0', 'list_id': list_id, 'status': 'done'}),
+        lambda: client.put(f'/api/cards/{cards[1]}/archive'),
+        lambda: client.put(f'/api/cards/{cards[1]}/restore'),
+        lambda: client.put(f'/api/cards/{cards[2]}/archive'),
+        lambda: client.put(f'/api/cards/{cards[3]}/move', json={'list_id': other_list_id, 'board_id': other_board_id}),
+        lambda: client.post(f'/api/cards/{cards[0]}/copy', json={'list_id': other_list_id, 'board_id': other_board_id}),
+        lambda: client.delete(f'/api/cards/{cards[4]}'),
+        lambda: client.put(f'/api/lists/{list_id}/archive'),
+        lambda: client.delete(f'/api/lists/{list_id}'),
+        lambda: client.delete(f'/api/boards/{other_board_id}'),
+    ]
+    for step in steps:
+        assert step().status_code in (200, 201)
+        assert _mismatches() == []
+
+    assert query('SELECT COUNT(*) AS n FROM board_status_counts WHERE count < 0')[0]['n'] == 0
+
+
+def test_status_chart_uses_counters(client):
+    board_id = create_board(client)
+    list_id = create_list(client, board_id)
+    for status in ['todo', 'todo', 'done', 'in_progress']:
+        create_card(client, list_id, status=status)
+    client.put(f"/api/cards/{create_card(client, list_id, status='done')}/archive")
+    conn = api.get_db_connection()
+    data = api.compute_widget_data(conn.cursor(), None, 'status_chart', board_id)
+    conn.close()
+    api.release_db_connection()
+    assert data['datasets'][0]['data'] == [2, 1, 1]
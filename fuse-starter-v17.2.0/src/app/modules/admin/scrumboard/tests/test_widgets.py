@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import USER_EMAIL, create_board, create_card, create_list
+
+
+@pytest.mark.parametrize('config', [[1], 'x', 5, None, {'board_id': [1]}, {'board_id': 7}])
+def test_render_ignores_config_that_is_not_a_board_object(client, config):
+    board_id = create_board(client)
+    create_card(client, create_list(client, board_id), status='done')
+    response = client.post('/api/widgets', json={
+        'user_email': USER_EMAIL, 'type': 'status_chart', 'title': 'Status', 'config': config})
+    assert response.status_code == 201
+
+    response = client.get(f'/api/widgets/render?user_email={USER_EMAIL}&board_id={board_id}')
+
+    assert response.status_code == 200
+    widget = next(w for w in response.get_json() if w['title'] == 'Status')
+    assert widget['config'] == config
+    assert widget['board_id'] == board_id
+    assert widget['data']['datasets'][0]['data'] == [0, 0, 1]
+
+
+def test_render_uses_board_from_config(client):
+    board_id = create_board(client)
+    other_board_id = create_board(client, 'Other')
+    create_card(client, create_list(client, board_id), status='todo')
+    client.post('/api/widgets', json={
+        'user_email': USER_EMAIL, 'type': 'status_chart', 'title': 'Status', 'config': {'board_id': board_id}})
+
+    response = client.get(f'/api/widgets/render?user_email={USER_EMAIL}&board_id={other_board_id}')
+
+    widget = next(w for w in response.get_json() if w['title'] == 'Status')
+    assert widget['board_id'] == board_id
+    assert widget['data']['datasets'][0]['data'] == [1, 0, 0]